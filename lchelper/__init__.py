@@ -1,6 +1,10 @@
 from . import utils
+from .browser import *
+from .cache import *
+from .checkpoint import *
 from .codegen import *
 from .common import *
 from .crawler import *
+from .crawlers import *
 from .logging import *
 from .parser import *
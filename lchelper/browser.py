@@ -0,0 +1,653 @@
+import atexit
+import contextlib
+import json
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+from typing import IO, Collection, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+    import msvcrt
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+from lchelper.logging import log
+
+__all__ = [
+    "PooledBrowser",
+    "BrowserPool",
+    "get_browser_pool",
+    "get_profile_path",
+    "has_profile",
+    "login_browser",
+    "stop_persistent_browsers",
+]
+
+BROWSER_FOLDER = "browsers/"
+PROFILE_FOLDER = "profiles/"
+# Files in the profile folder of an account. The base profile is signed in at login,
+# and copied for each browser that crawls with the account.
+PROFILE_BASE = "base"
+LOGIN_MARKER = "login"  # written after a successful login
+CLONE_MARKER = "cloned"  # written after the base profile is copied
+SLOT_LOCK = "lock"  # locked by the process that is using the slot
+# Maximum number of slots in each folder. Browsers that cannot claim a slot run on a
+# temporary user data directory instead.
+MAX_SLOTS = 16
+# Files that are not copied from the base profile: locks held by the Chrome process
+# using the profile, and caches that each browser builds up by itself.
+PROFILE_IGNORED_FILES = ["Singleton*", "lockfile", "DevToolsActivePort", "*Cache*"]
+CHROME_BINARIES = [
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+    "chrome",
+]
+
+# Resources that are not needed for reading problems, and are blocked when the pool is
+# created with `block_resources=True`.
+BLOCKED_EXTENSIONS = [
+    # Images.
+    "png",
+    "jpg",
+    "jpeg",
+    "gif",
+    "svg",
+    "webp",
+    "ico",
+    # Fonts.
+    "woff",
+    "woff2",
+    "ttf",
+    "otf",
+    "eot",
+    # Stylesheets.
+    "css",
+]
+BLOCKED_DOMAINS = [
+    # Analytics and advertising.
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "sentry.io",
+    "hm.baidu.com",
+    "growingio.com",
+]
+BLOCKED_URL_PATTERNS = (
+    [f"*.{ext}" for ext in BLOCKED_EXTENSIONS]
+    + [f"*.{ext}?*" for ext in BLOCKED_EXTENSIONS]
+    + [f"*://*.{domain}/*" for domain in BLOCKED_DOMAINS]
+    + [f"*://{domain}/*" for domain in BLOCKED_DOMAINS]
+)
+
+
+class PooledBrowser:
+    """
+    A WebDriver instance owned by a :class:`BrowserPool`. Attribute access is
+    forwarded to the underlying driver, so it can be used as a drop-in replacement.
+    """
+
+    def __init__(
+        self,
+        driver: webdriver.Chrome,
+        slot: Optional[int] = None,
+        temp_dir: Optional[str] = None,
+        pid: Optional[int] = None,
+        pages_loaded: int = 0,
+    ):
+        self.driver = driver
+        # Slot of the browser in the folder of the pool, or `None` for browsers that
+        # are not kept across runs.
+        self.slot = slot
+        # Temporary user data directory, which is deleted when the browser is discarded.
+        self.temp_dir = temp_dir
+        # The process that Chrome runs under, including Chrome and its child processes.
+        self.pid = pid
+        # Number of pages loaded since the browser is launched, including those loaded
+        # by previous processes for persistent browsers.
+        self.pages_loaded = pages_loaded
+        self.load_time = 0.0  # total seconds spent on loading pages
+        # Cookies that are loaded into the browser, keyed by site.
+        self.cookie_paths: Dict[str, str] = {}
+
+    def get(self, url: str) -> None:
+        self.pages_loaded += 1
+        start_time = time.time()
+        self.driver.get(url)
+        elapsed = time.time() - start_time
+        self.load_time += elapsed
+        log(f"Loaded page in {elapsed:.2f}s: {url}")
+
+    def __getattr__(self, name: str):
+        return getattr(self.driver, name)
+
+
+def _find_chrome_binary() -> str:
+    for name in CHROME_BINARIES:
+        path = shutil.which(name)
+        if path is not None:
+            return path
+    raise RuntimeError(
+        f"Cannot find the Chrome executable. Tried: {', '.join(CHROME_BINARIES)}"
+    )
+
+
+def _slot_path(slot: int, root: str = BROWSER_FOLDER) -> str:
+    return os.path.join(root, str(slot))
+
+
+def _try_lock(f: IO) -> bool:
+    """Try to take an exclusive lock on the file without blocking."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _claim_slot(root: str, excluded: Collection[int] = ()) -> Optional[Tuple[int, IO]]:
+    """
+    Claim the first slot in the folder that is not used by this or any other process.
+    A slot is in use while the lock file in the slot is locked. The lock is released
+    when the returned file is closed, or when the process exits.
+
+    :param root: The folder of slots.
+    :param excluded: Slots to skip, e.g., those already claimed by this process.
+    :return: The slot and its locked lock file, or ``None`` if all slots are in use.
+    """
+    for slot in range(MAX_SLOTS):
+        if slot in excluded:
+            continue
+        slot_path = _slot_path(slot, root)
+        os.makedirs(slot_path, exist_ok=True)
+        f = open(os.path.join(slot_path, SLOT_LOCK), "a")
+        if _try_lock(f):
+            return slot, f
+        f.close()
+    return None
+
+
+def _read_state(slot_path: str) -> Optional[Dict[str, int]]:
+    path = os.path.join(slot_path, "state.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_state(slot_path: str, state: Dict[str, int]) -> None:
+    path = os.path.join(slot_path, "state.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+def _process_memory(pid: int) -> Optional[int]:
+    """
+    Return the memory used by a process and all its descendants in bytes, i.e., the
+    proportional set size (or resident set size, on older kernels), summed over the
+    processes. Returns ``None`` if memory usage could not be read, e.g., on systems
+    without ``/proc``.
+    """
+    children: Dict[int, List[int]] = {}
+    try:
+        names = os.listdir("/proc")
+    except OSError:
+        return None
+    for name in names:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue  # already exited
+        # The process name is parenthesized and could contain spaces.
+        ppid = int(stat[stat.rindex(")") + 2 :].split()[1])
+        children.setdefault(ppid, []).append(int(name))
+
+    total = 0
+    found = False
+    stack = [pid]
+    while len(stack) > 0:
+        current = stack.pop()
+        stack.extend(children.get(current, []))
+        for path, field in [
+            (f"/proc/{current}/smaps_rollup", "Pss:"),
+            (f"/proc/{current}/status", "VmRSS:"),
+        ]:
+            try:
+                with open(path) as f:
+                    line = next((line for line in f if line.startswith(field)), None)
+            except OSError:
+                continue
+            if line is not None:
+                total += int(line.split()[1]) * 1024  # in kB
+                found = True
+                break
+    return total if found else None
+
+
+def _is_alive(port: int) -> bool:
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/json/version", timeout=1):
+            return True
+    except OSError:
+        return False
+
+
+def launch_chrome(
+    user_data_dir: str, detach: bool = False, timeout: float = 10.0
+) -> Tuple[subprocess.Popen, int]:
+    """
+    Launch a headless Chrome process with remote debugging enabled.
+
+    :param user_data_dir: The profile directory for Chrome.
+    :param detach: If ``True``, the process outlives the current process.
+    :param timeout: Number of seconds to wait for Chrome to start.
+    :return: The Chrome process, and its remote debugging port.
+    """
+    os.makedirs(user_data_dir, exist_ok=True)
+    port_file = os.path.join(user_data_dir, "DevToolsActivePort")
+    if os.path.exists(port_file):
+        os.remove(port_file)
+    process = subprocess.Popen(
+        [
+            _find_chrome_binary(),
+            "--headless",
+            "--remote-debugging-port=0",  # let Chrome pick a free port
+            f"--user-data-dir={user_data_dir}",
+            # Store cookies in a way that does not depend on the system keyring, so
+            # that profiles signed in from a normal browser work in headless ones.
+            "--password-store=basic",
+            "--window-size=3840,600",
+            "about:blank",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=detach,  # do not get killed with the current process
+    )
+    deadline = time.time() + timeout
+    while not os.path.exists(port_file):
+        if time.time() > deadline or process.poll() is not None:
+            process.kill()
+            raise RuntimeError("Failed to launch a headless Chrome instance")
+        time.sleep(0.05)
+    with open(port_file) as f:
+        port = int(f.readline())
+    return process, port
+
+
+def _launch_persistent_chrome(slot_path: str) -> int:
+    """
+    Launch a headless Chrome process that outlives the current process, and return
+    its remote debugging port.
+    """
+    user_data_dir = os.path.abspath(os.path.join(slot_path, "profile"))
+    process, port = launch_chrome(user_data_dir, detach=True)
+    _write_state(slot_path, {"pid": process.pid, "port": port, "pages_loaded": 0})
+    log(f"Launched persistent Chrome (pid {process.pid}) on port {port}")
+    return port
+
+
+def _kill_persistent_chrome(slot_path: str) -> None:
+    state = _read_state(slot_path)
+    if state is None:
+        return
+    try:
+        os.kill(state["pid"], signal.SIGTERM)
+    except OSError:
+        pass  # already exited
+    os.remove(os.path.join(slot_path, "state.json"))
+
+
+def stop_persistent_browsers() -> int:
+    """
+    Shut down all persistent Chrome instances, except those in use by running processes.
+
+    :return: The number of instances that were shut down.
+    """
+    roots = [BROWSER_FOLDER]
+    if os.path.exists(PROFILE_FOLDER):
+        roots += [
+            os.path.join(PROFILE_FOLDER, name) for name in os.listdir(PROFILE_FOLDER)
+        ]
+    count = 0
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        for name in os.listdir(root):
+            slot_path = os.path.join(root, name)
+            if not name.isdigit() or _read_state(slot_path) is None:
+                continue
+            with open(os.path.join(slot_path, SLOT_LOCK), "a") as f:
+                if not _try_lock(f):
+                    log(f"Browser in '{slot_path}' is in use, skipping")
+                    continue
+                _kill_persistent_chrome(slot_path)
+                count += 1
+    return count
+
+
+def get_profile_path(cookie_path: str) -> str:
+    """
+    Return the folder of Chrome profiles for the account whose cookies are stored at
+    the path. Profiles are kept for each account, named after the cookie file.
+    """
+    name = os.path.splitext(os.path.basename(cookie_path))[0]
+    return os.path.join(PROFILE_FOLDER, name)
+
+
+def has_profile(profile_path: str) -> bool:
+    """Return whether the profile folder contains a signed in base profile."""
+    return os.path.exists(os.path.join(profile_path, LOGIN_MARKER))
+
+
+@contextlib.contextmanager
+def login_browser(profile_path: str) -> Iterator["PooledBrowser"]:
+    """
+    Open a visible browser using a fresh base profile in the profile folder. The
+    profile is marked as signed in if the block exits without errors, after which
+    browsers of a :class:`BrowserPool` created with the profile folder start signed in.
+    """
+    base_path = os.path.abspath(os.path.join(profile_path, PROFILE_BASE))
+    shutil.rmtree(base_path, ignore_errors=True)
+    login_marker = os.path.join(profile_path, LOGIN_MARKER)
+    if os.path.exists(login_marker):
+        os.remove(login_marker)
+    options = webdriver.ChromeOptions()
+    options.add_argument(f"user-data-dir={base_path}")
+    options.add_argument("password-store=basic")
+    browser = PooledBrowser(webdriver.Chrome(options=options))
+    try:
+        yield browser
+    finally:
+        browser.quit()  # flush the profile to disk
+    with open(login_marker, "w"):
+        pass
+
+
+def _is_clone_up_to_date(profile_path: str, user_data_dir: str) -> bool:
+    """Return whether the copy of the base profile is made after the last login."""
+    clone_marker = os.path.join(user_data_dir, CLONE_MARKER)
+    login_time = os.path.getmtime(os.path.join(profile_path, LOGIN_MARKER))
+    return os.path.exists(clone_marker) and os.path.getmtime(clone_marker) >= login_time
+
+
+def _clone_profile(profile_path: str, user_data_dir: str) -> None:
+    """
+    Copy the base profile in the profile folder to the user data directory, unless
+    the copy is already up to date. Copies are kept across runs so that their caches
+    stay warm.
+    """
+    if _is_clone_up_to_date(profile_path, user_data_dir):
+        return
+    shutil.rmtree(user_data_dir, ignore_errors=True)
+    shutil.copytree(
+        os.path.join(profile_path, PROFILE_BASE),
+        user_data_dir,
+        ignore=shutil.ignore_patterns(*PROFILE_IGNORED_FILES),
+    )
+    with open(os.path.join(user_data_dir, CLONE_MARKER), "w"):
+        pass
+
+
+def _block_resources(driver: webdriver.Chrome) -> None:
+    """Block requests to unneeded resources through the DevTools protocol."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    except WebDriverException as e:
+        log(f"Failed to block resources ({e.msg}), loading all", level="warning")
+
+
+class BrowserPool:
+    r"""
+    A pool of headless Chrome instances that are kept alive across crawls, so that only
+    the first crawl in a process pays the cost of launching a browser.
+
+    Browsers are recycled (i.e., quit and replaced by fresh ones on the next request)
+    after they have loaded ``max_pages`` pages, or when Chrome uses more than
+    ``max_memory`` megabytes of memory, counting all of its processes. Where process
+    memory cannot be read (i.e., outside Linux), the JavaScript heap of the current
+    page is checked instead. The number of pages loaded by persistent browsers is kept
+    across runs.
+
+    If ``persistent`` is ``True``, Chrome processes are launched separately and keep
+    running after the current process exits. Subsequent processes attach to these
+    browsers instead of launching new ones. Persistent browsers can be shut down using
+    :func:`stop_persistent_browsers`.
+
+    Browsers that are kept across runs live in numbered slots. Each browser claims its
+    slot with a lock that is held until the browser is discarded or the pool is closed,
+    so processes running at the same time never share a browser or a profile. If all
+    slots are in use, the browser runs on a temporary copy of the profile instead.
+
+    If ``block_resources`` is ``True``, browsers do not load images, fonts,
+    stylesheets, or analytics scripts (see :attr:`BLOCKED_URL_PATTERNS`), none of
+    which are needed for reading problems. This is enabled by default for headless
+    browsers.
+
+    If ``profile`` is specified, each browser runs on its own copy of the signed in
+    profile in the profile folder (see :func:`login_browser`), so browsers start
+    signed in without loading cookies, and their caches are kept across runs.
+    """
+
+    def __init__(
+        self,
+        headless: bool = True,
+        max_pages: int = 100,
+        max_memory: int = 1024,
+        persistent: bool = False,
+        block_resources: Optional[bool] = None,
+        profile: Optional[str] = None,
+    ):
+        if persistent and not headless:
+            raise ValueError("Persistent browsers must be headless")
+        if profile is not None and not has_profile(profile):
+            raise ValueError(f"No signed in profile found in '{profile}'")
+        self.headless = headless
+        self.max_pages = max_pages
+        self.max_memory = max_memory
+        self.persistent = persistent
+        self.block_resources = headless if block_resources is None else block_resources
+        self.profile = profile
+        # Slots are folders for browsers that are kept across runs.
+        self._slot_root = profile if profile is not None else BROWSER_FOLDER
+        self._lock = threading.Lock()
+        self._idle: List[PooledBrowser] = []
+        self._slot_locks: Dict[int, IO] = {}  # lock files of claimed slots
+        self._closed = False
+
+    def _create(self) -> PooledBrowser:
+        options = webdriver.ChromeOptions()
+        slot = temp_dir = None
+        state: Optional[Dict[str, int]] = None
+        if self.persistent or self.profile is not None:
+            with self._lock:
+                claimed = _claim_slot(self._slot_root, excluded=self._slot_locks)
+                if claimed is not None:
+                    slot, self._slot_locks[claimed[0]] = claimed
+            if slot is None:
+                log(
+                    f"All browser slots in '{self._slot_root}' are in use, using a"
+                    f" temporary browser",
+                    level="warning",
+                )
+                temp_dir = tempfile.mkdtemp(prefix="lchelper-")
+        try:
+            if self.persistent and slot is not None:
+                slot_path = _slot_path(slot, self._slot_root)
+                user_data_dir = os.path.join(slot_path, "profile")
+                state = _read_state(slot_path)
+                if (
+                    state is not None
+                    and _is_alive(state["port"])
+                    # Browsers started before the account logged in again are stale.
+                    and (
+                        self.profile is None
+                        or _is_clone_up_to_date(self.profile, user_data_dir)
+                    )
+                ):
+                    port = state["port"]
+                else:
+                    _kill_persistent_chrome(slot_path)
+                    if self.profile is not None:
+                        _clone_profile(self.profile, user_data_dir)
+                    port = _launch_persistent_chrome(slot_path)
+                    state = _read_state(slot_path)
+                options.debugger_address = f"127.0.0.1:{port}"
+            else:
+                if self.headless:
+                    options.add_argument("headless")
+                if slot is not None:
+                    base_dir = _slot_path(slot, self._slot_root)
+                else:
+                    base_dir = temp_dir
+                if self.profile is not None and base_dir is not None:
+                    user_data_dir = os.path.abspath(os.path.join(base_dir, "profile"))
+                    _clone_profile(self.profile, user_data_dir)
+                    options.add_argument(f"user-data-dir={user_data_dir}")
+                    options.add_argument("password-store=basic")
+            driver = webdriver.Chrome(options=options)
+        except Exception:
+            self._release_slot(slot, temp_dir)
+            raise
+        if self.headless:
+            driver.set_window_position(0, 0)
+            driver.set_window_size(
+                3840, 600
+            )  # a wide enough window so code does not get wrapped
+        if self.block_resources:
+            _block_resources(driver)
+        if state is not None:
+            pid = state["pid"]
+            pages_loaded = state.get("pages_loaded", 0)
+        else:
+            # Chrome runs as a child process of ChromeDriver.
+            process = getattr(getattr(driver, "service", None), "process", None)
+            pid = process.pid if process is not None else None
+            pages_loaded = 0
+        return PooledBrowser(driver, slot, temp_dir, pid, pages_loaded)
+
+    def _release_slot(self, slot: Optional[int], temp_dir: Optional[str]) -> None:
+        if slot is not None:
+            with self._lock:
+                lock_file = self._slot_locks.pop(slot, None)
+            if lock_file is not None:
+                lock_file.close()
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _should_recycle(self, browser: PooledBrowser) -> bool:
+        if browser.pages_loaded >= self.max_pages:
+            return True
+        try:
+            heap_size = browser.execute_script(
+                "return performance.memory ? performance.memory.usedJSHeapSize : 0"
+            )
+        except WebDriverException:
+            return True  # the browser probably crashed
+        memory = _process_memory(browser.pid) if browser.pid is not None else None
+        if memory is None:
+            memory = heap_size
+        return memory > self.max_memory * 1024 * 1024
+
+    def _discard(self, browser: PooledBrowser) -> None:
+        try:
+            browser.quit()
+        except WebDriverException:
+            pass
+        if browser.slot is not None and self.persistent:
+            _kill_persistent_chrome(_slot_path(browser.slot, self._slot_root))
+        self._release_slot(browser.slot, browser.temp_dir)
+
+    def acquire(self) -> PooledBrowser:
+        """Take an idle browser from the pool, or launch a new one if none is idle."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Browser pool is already closed")
+            if len(self._idle) > 0:
+                return self._idle.pop()
+        return self._create()
+
+    def release(self, browser: PooledBrowser) -> None:
+        """Return a browser to the pool, recycling it if it is worn out."""
+        if self.persistent and browser.slot is not None:
+            # Keep the page count for later processes attaching to the browser.
+            slot_path = _slot_path(browser.slot, self._slot_root)
+            state = _read_state(slot_path)
+            if state is not None:
+                _write_state(slot_path, {**state, "pages_loaded": browser.pages_loaded})
+        if self._closed:
+            self._discard(browser)
+            return
+        if self._should_recycle(browser):
+            log(
+                f"Recycling browser after {browser.pages_loaded} page(s)",
+                level="warning",
+            )
+            self._discard(browser)
+            return
+        with self._lock:
+            self._idle.append(browser)
+
+    @contextlib.contextmanager
+    def browser(self) -> Iterator[PooledBrowser]:
+        browser = self.acquire()
+        try:
+            yield browser
+        finally:
+            self.release(browser)
+
+    def close(self) -> None:
+        """
+        Quit all idle browsers and release their slots. Persistent Chrome processes are
+        kept alive, to be claimed by later processes.
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for browser in idle:
+            try:
+                browser.quit()
+            except WebDriverException:
+                pass
+            self._release_slot(browser.slot, browser.temp_dir)
+
+
+_pools: Dict[Tuple[bool, bool, Optional[bool], Optional[str]], BrowserPool] = {}
+
+
+def get_browser_pool(
+    headless: bool = True,
+    persistent: bool = False,
+    block_resources: Optional[bool] = None,
+    profile: Optional[str] = None,
+) -> BrowserPool:
+    """Return the browser pool shared within the current process."""
+    key = (headless, persistent, block_resources, profile)
+    if key not in _pools:
+        pool = BrowserPool(
+            headless=headless,
+            persistent=persistent,
+            block_resources=block_resources,
+            profile=profile,
+        )
+        atexit.register(pool.close)
+        _pools[key] = pool
+    return _pools[key]
@@ -0,0 +1,752 @@
+import contextlib
+import dataclasses
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from lchelper.common import InteractiveProblemSignature, Problem, ProblemSignature
+from lchelper.logging import log
+from lchelper.parser import PARSER_VERSION
+
+__all__ = [
+    "ContestKey",
+    "CachedContest",
+    "CachedProblem",
+    "CacheVersionError",
+    "ProblemCache",
+    "problem_digest",
+]
+
+CACHE_FILE = "contest_problems.db"
+LEGACY_CACHE_FILE = "contest_problems.pkl"  # the cache format before `ProblemCache`
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024  # in bytes
+# Seconds to wait for other processes to release the database before giving up.
+LOCK_TIMEOUT = 60.0
+# Version of the database schema, stored as `PRAGMA user_version`. Bump this whenever
+# the schema or the format of stored data changes. Version 0 means the database is new.
+SCHEMA_VERSION = 1
+
+# Key of a contest in the cache: (site, contest name). The site is `None` for contests
+# that are specified by name only.
+ContestKey = Tuple[Optional[str], str]
+
+Signature = Union[ProblemSignature, InteractiveProblemSignature]
+
+# Problem statements take up most of the space, and are only needed by code generators
+# when code is not cached, so they are stored separately from other parts of problems.
+# Problem data and statements are stored as JSON compressed by zlib. Statements are
+# keyed by the digest of the problem, since they are immutable.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contests (
+    site TEXT NOT NULL,
+    contest TEXT NOT NULL,
+    updated REAL NOT NULL,
+    accessed REAL NOT NULL,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (site, contest)
+);
+CREATE INDEX IF NOT EXISTS contests_accessed ON contests (pinned, accessed);
+CREATE TABLE IF NOT EXISTS problems (
+    site TEXT NOT NULL,
+    contest TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    slug TEXT NOT NULL,
+    url TEXT NOT NULL,
+    name TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (site, contest, idx),
+    FOREIGN KEY (site, contest) REFERENCES contests (site, contest) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS problems_slug ON problems (slug);
+CREATE INDEX IF NOT EXISTS problems_digest ON problems (digest);
+CREATE TABLE IF NOT EXISTS statements (
+    digest TEXT NOT NULL PRIMARY KEY,
+    statement BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS signatures (
+    digest TEXT NOT NULL,
+    site TEXT NOT NULL,
+    parser_version INTEGER NOT NULL,
+    signature BLOB NOT NULL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (digest, site, parser_version)
+);
+CREATE INDEX IF NOT EXISTS signatures_accessed ON signatures (accessed);
+CREATE TABLE IF NOT EXISTS outputs (
+    digest TEXT NOT NULL PRIMARY KEY,
+    code BLOB NOT NULL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outputs_accessed ON outputs (accessed);
+CREATE TABLE IF NOT EXISTS stats (
+    kind TEXT NOT NULL PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT NOT NULL PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Tables of entries that count towards the size of the cache, and could be evicted.
+EVICTABLE_TABLES = ["contests", "signatures", "outputs"]
+
+
+class CacheVersionError(RuntimeError):
+    """The database is created with an unsupported version of the schema."""
+
+    pass
+
+
+def _compress(obj: Any) -> bytes:
+    return zlib.compress(json.dumps(obj, ensure_ascii=False).encode("utf-8"))
+
+
+def _decompress(data: bytes) -> Any:
+    return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+def _problem_slug(url: str) -> str:
+    return url.rstrip("/").split("/")[-1]
+
+
+def _problem_from_dict(problem: Any) -> Problem:
+    """Convert a problem from a dictionary, checking that all fields are present."""
+    fields = set(field.name for field in dataclasses.fields(Problem))
+    if not isinstance(problem, dict) or set(problem.keys()) != fields:
+        raise ValueError(f"Malformed problem: {problem!r:.100}")
+    return Problem(**problem)
+
+
+class CachedProblem(Problem):
+    """
+    A problem loaded from :class:`ProblemCache`. Its statement, which takes up most of
+    the space, is only read from the cache when it is first accessed. The digest of
+    the problem is also loaded from the cache, so that it does not require reading the
+    statement (see :func:`problem_digest`).
+
+    Cached problems compare equal to :class:`~lchelper.common.Problem` instances with
+    the same contents, and are pickled as plain problems.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        name: str,
+        statement: Optional[str],
+        examples: List[str],
+        code: List[str],
+    ):
+        self._statement: Optional[str] = None
+        self._load_statement: Optional[Callable[[], str]] = None
+        self._digest: Optional[str] = None
+        super().__init__(url, name, statement, examples, code)  # type: ignore
+
+    @classmethod
+    def lazy(
+        cls,
+        url: str,
+        name: str,
+        examples: List[str],
+        code: List[str],
+        digest: str,
+        load_statement: Callable[[], str],
+    ) -> "CachedProblem":
+        """Create a problem whose statement is loaded with ``load_statement``."""
+        problem = cls(url, name, None, examples, code)
+        problem._load_statement = load_statement
+        problem._digest = digest
+        return problem
+
+    @property  # type: ignore
+    def statement(self) -> str:  # type: ignore
+        if self._statement is None:
+            assert self._load_statement is not None
+            self._statement = self._load_statement()
+        return self._statement
+
+    @statement.setter
+    def statement(self, statement: Optional[str]) -> None:
+        self._statement = statement
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if not name.startswith("_"):
+            # The stored digest is no longer valid once the contents are changed.
+            super().__setattr__("_digest", None)
+        super().__setattr__(name, value)
+
+    def __eq__(self, other):
+        if not isinstance(other, Problem):
+            return NotImplemented
+        return all(
+            getattr(self, field.name) == getattr(other, field.name)
+            for field in dataclasses.fields(Problem)
+        )
+
+    def __reduce__(self):
+        fields = dataclasses.fields(Problem)
+        return Problem, tuple(getattr(self, field.name) for field in fields)
+
+
+def problem_digest(problem: Problem) -> str:
+    """Return a digest of the contents of the problem."""
+    if isinstance(problem, CachedProblem) and problem._digest is not None:
+        return problem._digest
+    contents = json.dumps(dataclasses.asdict(problem), sort_keys=True)
+    return hashlib.sha256(contents.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedContest:
+    """Information about a contest in the cache."""
+
+    site: Optional[str]
+    contest: str
+    n_problems: int
+    size: int  # in bytes
+    updated: float  # timestamp when the contest was stored
+    accessed: float  # timestamp when the contest was last read or stored
+    pinned: bool  # pinned contests are never evicted
+
+
+class ProblemCache:
+    """
+    Crawled problems, stored in an indexed SQLite database. Problems are keyed by the
+    contest (see :attr:`ContestKey`) and by their slugs, and each contest is read and
+    written separately, so the cost of an access does not grow with the size of the
+    cache.
+
+    Problems are compressed, and their statements are stored separately, so that they
+    are only read when needed (see :class:`CachedProblem`). The version of the schema is
+    stored in the database, and databases of unsupported versions are refused with a
+    :exc:`CacheVersionError`.
+
+    Caches in the legacy pickle format are migrated when the cache is opened, after
+    which the pickle file is renamed with a ``.migrated`` suffix. Malformed entries in
+    the pickle are skipped.
+
+    The size of the cache is capped by :attr:`max_size`, which is stored in the
+    database. When the cap is exceeded, the least recently used entries (contests,
+    parsed signatures, and generated code) are evicted, except for pinned contests. The
+    numbers of hits and misses are recorded for each kind of entry.
+
+    The cache can be shared by multiple threads, and by multiple processes (e.g.,
+    several ``main.py get`` runs in parallel). Each change is made in a transaction,
+    which either takes effect as a whole or not at all, even if the process crashes.
+    Writes from different processes wait for each other instead of overwriting each
+    other's changes, and readers are never blocked by writers.
+    """
+
+    def __init__(
+        self, path: str = CACHE_FILE, legacy_path: Optional[str] = LEGACY_CACHE_FILE
+    ):
+        """
+        :param path: Path to the database.
+        :param legacy_path: Path to the cache in the legacy pickle format. It is
+                            migrated into the database if it exists.
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        # Transactions are managed explicitly, see `_transaction`.
+        self._conn = sqlite3.connect(
+            path, timeout=LOCK_TIMEOUT, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        # In write-ahead logging mode, reads see a consistent snapshot and run
+        # concurrently with writes from other processes.
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        try:
+            with self._transaction():
+                self._init_schema()
+        except BaseException:
+            self._conn.close()
+            raise
+        if legacy_path is not None and os.path.exists(legacy_path):
+            self._migrate(legacy_path)
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """
+        Run a write transaction, holding the lock. The write lock of the database is
+        taken when the transaction begins (``BEGIN IMMEDIATE``), so that writers from
+        different processes are serialized, rather than failing when two transactions
+        that have both read the database try to write. Nested transactions are merged
+        into the outermost one.
+        """
+        with self._lock:
+            if self._conn.in_transaction:
+                yield
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+
+    def _execute_script(self, script: str) -> None:
+        # `executescript` would commit the current transaction.
+        for statement in script.split(";"):
+            if statement.strip() != "":
+                self._conn.execute(statement)
+
+    def _init_schema(self) -> None:
+        # Must be called in a transaction.
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == SCHEMA_VERSION:
+            return
+        if version != 0:
+            raise CacheVersionError(
+                f"The cache {self.path!r} has schema version {version}, which is not"
+                f" supported by this version of LCHelper (version {SCHEMA_VERSION})."
+                f" Move or delete the cache to start over"
+            )
+        self._execute_script(SCHEMA)
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _migrate(self, legacy_path: str) -> None:
+        n_contests = n_skipped = 0
+        with self._transaction():
+            try:
+                with open(legacy_path, "rb") as f:
+                    info = pickle.load(f)
+                if not isinstance(info, dict):
+                    raise ValueError(f"Expected a dict, got {type(info).__name__}")
+            except FileNotFoundError:
+                return  # migrated by another process
+            except Exception as e:
+                log(
+                    f"Cannot migrate {legacy_path!r} ({type(e).__name__}: {e})",
+                    level="error",
+                )
+                return
+            for key, problems in info.items():
+                try:
+                    site, contest_name = key
+                    problems = [_problem_from_dict(p) for p in problems]
+                except (TypeError, ValueError) as e:
+                    log(f"Skipping malformed contest {key!r} ({e})", level="warning")
+                    n_skipped += 1
+                    continue
+                if (site, contest_name) not in self:
+                    self.put(site, contest_name, problems)
+                    n_contests += 1
+            os.replace(legacy_path, legacy_path + ".migrated")
+        log(
+            f"Migrated {n_contests} contest(s) from {legacy_path!r} to {self.path!r}",
+            level="success" if n_skipped == 0 else "warning",
+        )
+
+    def __contains__(self, key: ContestKey) -> bool:
+        site, contest_name = key
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM contests WHERE site = ? AND contest = ?",
+                (site or "", contest_name),
+            ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM contests").fetchone()[0]
+
+    def _get_max_size(self) -> Optional[int]:
+        # Must be called with the lock held.
+        row = self._conn.execute(
+            "SELECT value FROM settings WHERE name = 'max_size'"
+        ).fetchone()
+        if row is None:
+            return DEFAULT_MAX_SIZE
+        return int(row[0]) if row[0] != "" else None
+
+    @property
+    def max_size(self) -> Optional[int]:
+        """The maximum size of the cache in bytes, or ``None`` if it is unlimited."""
+        with self._lock:
+            return self._get_max_size()
+
+    @max_size.setter
+    def max_size(self, max_size: Optional[int]) -> None:
+        with self._transaction():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO settings (name, value) VALUES ('max_size', ?)",
+                (str(max_size) if max_size is not None else "",),
+            )
+        self.evict()
+
+    def _record(self, kind: str, hit: bool) -> None:
+        # Must be called in a transaction.
+        self._conn.execute(
+            "INSERT INTO stats (kind, hits, misses) VALUES (?, ?, ?)"
+            " ON CONFLICT (kind) DO UPDATE SET hits = hits + excluded.hits,"
+            " misses = misses + excluded.misses",
+            (kind, int(hit), int(not hit)),
+        )
+
+    def stats(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Return the numbers of hits and misses for each kind of entry, i.e.,
+        ``"contests"``, ``"signatures"``, and ``"outputs"``.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, hits, misses FROM stats ORDER BY kind"
+            ).fetchall()
+        return {kind: (hits, misses) for kind, hits, misses in rows}
+
+    def sizes(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Return the number of entries and their total size in bytes for each kind of
+        entry.
+        """
+        with self._lock:
+            return {
+                table: self._conn.execute(
+                    f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {table}"
+                ).fetchone()
+                for table in EVICTABLE_TABLES
+            }
+
+    def size(self) -> int:
+        """Return the total size of entries in the cache, in bytes."""
+        return sum(size for _, size in self.sizes().values())
+
+    def _evict(self, max_size: int) -> int:
+        # Must be called in a transaction.
+        excess = -max_size
+        for table in EVICTABLE_TABLES:
+            query = f"SELECT COALESCE(SUM(size), 0) FROM {table}"
+            excess += self._conn.execute(query).fetchone()[0]
+        n_evicted = 0
+        while excess > 0:
+            candidates = []
+            for table in EVICTABLE_TABLES:
+                condition = "WHERE pinned = 0" if table == "contests" else ""
+                row = self._conn.execute(
+                    f"SELECT accessed, rowid, size FROM {table} {condition}"
+                    f" ORDER BY accessed LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    accessed, rowid, size = row
+                    candidates.append((accessed, table, rowid, size))
+            if len(candidates) == 0:
+                break  # everything left is pinned
+            _, table, rowid, size = min(candidates)
+            self._conn.execute(f"DELETE FROM {table} WHERE rowid = ?", (rowid,))
+            excess -= size
+            n_evicted += 1
+        if n_evicted > 0:
+            self._remove_orphan_statements()
+        return n_evicted
+
+    def _remove_orphan_statements(self) -> None:
+        # Must be called in a transaction.
+        self._conn.execute(
+            "DELETE FROM statements WHERE digest NOT IN (SELECT digest FROM problems)"
+        )
+
+    def _evict_to_max_size(self) -> None:
+        # Must be called in a transaction.
+        max_size = self._get_max_size()
+        if max_size is not None:
+            self._evict(max_size)
+
+    def evict(self, max_size: Optional[int] = None) -> int:
+        """
+        Evict the least recently used entries until the cache fits within the size.
+        Pinned contests are never evicted.
+
+        :param max_size: The size in bytes to fit in. Defaults to :attr:`max_size`.
+        :return: The number of evicted entries.
+        """
+        with self._transaction():
+            if max_size is None:
+                max_size = self._get_max_size()
+                if max_size is None:
+                    return 0
+            return self._evict(max_size)
+
+    def pin(self, site: Optional[str], contest_name: str, pinned: bool = True) -> bool:
+        """
+        Pin a contest, so that it is never evicted, or unpin it.
+
+        :return: Whether the contest is in the cache.
+        """
+        with self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE contests SET pinned = ? WHERE site = ? AND contest = ?",
+                (int(pinned), site or "", contest_name),
+            )
+        return cursor.rowcount > 0
+
+    def contests(self) -> List[ContestKey]:
+        """Return the keys of all cached contests."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT site, contest FROM contests ORDER BY site, contest"
+            ).fetchall()
+        return [(site or None, contest_name) for site, contest_name in rows]
+
+    def contest_info(self) -> List[CachedContest]:
+        """Return information about all cached contests, most recently used first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT site, contest, (SELECT COUNT(*) FROM problems"
+                " WHERE problems.site = contests.site"
+                " AND problems.contest = contests.contest),"
+                " size, updated, accessed, pinned FROM contests ORDER BY accessed DESC"
+            ).fetchall()
+        return [
+            CachedContest(
+                site or None, contest_name, n_problems, size, updated, accessed, pinned
+            )
+            for site, contest_name, n_problems, size, updated, accessed, pinned in rows
+        ]
+
+    def _load_statement(self, digest: str) -> str:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT statement FROM statements WHERE digest = ?", (digest,)
+            ).fetchone()
+        if row is None:
+            raise LookupError(f"Problem statement {digest!r} is no longer cached")
+        return _decompress(row[0])
+
+    def _to_problem(self, row: Tuple[str, str, str, bytes]) -> CachedProblem:
+        url, name, digest, data = row
+        contents = _decompress(data)
+        return CachedProblem.lazy(
+            url,
+            name,
+            contents["examples"],
+            contents["code"],
+            digest,
+            lambda: self._load_statement(digest),
+        )
+
+    def get(
+        self, site: Optional[str], contest_name: str, touch: bool = True
+    ) -> Optional[List[Problem]]:
+        """
+        Return the problems of a contest, in the same order as on the contest page, or
+        ``None`` if the contest is not cached. Statements of the problems are loaded
+        when they are accessed, which requires the cache to be open.
+
+        :param site: The site of the contest.
+        :param contest_name: Name of the contest.
+        :param touch: If ``True``, the access is counted towards statistics and the
+                      contest is marked as recently used.
+        """
+        key = (site or "", contest_name)
+        with self._transaction() if touch else self._lock:
+            cursor = self._conn.execute(
+                "SELECT 1 FROM contests WHERE site = ? AND contest = ?", key
+            )
+            hit = cursor.fetchone() is not None
+            if touch:
+                self._record("contests", hit)
+            if not hit:
+                return None
+            if touch:
+                self._conn.execute(
+                    "UPDATE contests SET accessed = ? WHERE site = ? AND contest = ?",
+                    (time.time(),) + key,
+                )
+            rows = self._conn.execute(
+                "SELECT url, name, digest, data FROM problems"
+                " WHERE site = ? AND contest = ? ORDER BY idx",
+                key,
+            ).fetchall()
+        return [self._to_problem(row) for row in rows]
+
+    def get_problem(self, slug: str, site: Optional[str] = None) -> Optional[Problem]:
+        """
+        Return a problem given its slug, or ``None`` if the problem is not cached. If
+        the problem is cached in multiple contests, the most recently updated one is
+        returned.
+        """
+        query = (
+            "SELECT p.url, p.name, p.digest, p.data FROM problems p"
+            " JOIN contests c ON p.site = c.site AND p.contest = c.contest"
+            " WHERE p.slug = ?"
+        )
+        params: Tuple[str, ...] = (slug,)
+        if site is not None:
+            query += " AND p.site = ?"
+            params += (site,)
+        with self._lock:
+            row = self._conn.execute(
+                query + " ORDER BY c.updated DESC LIMIT 1", params
+            ).fetchone()
+        return self._to_problem(row) if row is not None else None
+
+    def put(
+        self, site: Optional[str], contest_name: str, problems: List[Problem]
+    ) -> None:
+        """
+        Store the problems of a contest, replacing those that are cached. Whether the
+        contest is pinned is kept.
+        """
+        key = (site or "", contest_name)
+        digests = [problem_digest(p) for p in problems]
+        with self._transaction():
+            # Statements are immutable, so those that are stored are not written again.
+            statement_sizes: Dict[str, int] = {}
+            for digest in set(digests):
+                row = self._conn.execute(
+                    "SELECT length(statement) FROM statements WHERE digest = ?",
+                    (digest,),
+                ).fetchone()
+                if row is not None:
+                    statement_sizes[digest] = row[0]
+            rows = []
+            size = 0
+            for idx, (digest, p) in enumerate(zip(digests, problems)):
+                if digest not in statement_sizes:
+                    statement = _compress(p.statement)
+                    self._conn.execute(
+                        "INSERT INTO statements (digest, statement) VALUES (?, ?)",
+                        (digest, statement),
+                    )
+                    statement_sizes[digest] = len(statement)
+                data = _compress({"examples": p.examples, "code": p.code})
+                rows.append(
+                    key + (idx, _problem_slug(p.url), p.url, p.name, digest, data)
+                )
+                size += len(p.url) + len(p.name) + len(data) + statement_sizes[digest]
+
+            now = time.time()
+            self._conn.execute(
+                "INSERT INTO contests (site, contest, updated, accessed, size) VALUES"
+                " (?, ?, ?, ?, ?) ON CONFLICT (site, contest) DO UPDATE SET"
+                " updated = excluded.updated, accessed = excluded.accessed,"
+                " size = excluded.size",
+                key + (now, now, size),
+            )
+            self._conn.execute(
+                "DELETE FROM problems WHERE site = ? AND contest = ?", key
+            )
+            self._conn.executemany(
+                "INSERT INTO problems (site, contest, idx, slug, url, name, digest,"
+                " data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._remove_orphan_statements()
+            self._evict_to_max_size()
+
+    def get_signature(
+        self, problem: Problem, site: Optional[str]
+    ) -> Optional[Signature]:
+        """
+        Return the parsed signature of the problem, or ``None`` if it is not cached
+        or is parsed by a different version of the parser.
+
+        Signatures are keyed by the contents of the problem, so they are reused
+        across languages, runs, and contests with the same problem, and are parsed
+        again if the problem is crawled or extracted again with different contents.
+        """
+        key = (problem_digest(problem), site or "", PARSER_VERSION)
+        with self._transaction():
+            row = self._conn.execute(
+                "SELECT signature FROM signatures"
+                " WHERE digest = ? AND site = ? AND parser_version = ?",
+                key,
+            ).fetchone()
+            self._record("signatures", row is not None)
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE signatures SET accessed = ?"
+                " WHERE digest = ? AND site = ? AND parser_version = ?",
+                (time.time(),) + key,
+            )
+        try:
+            return pickle.loads(zlib.decompress(row[0]))
+        except Exception:
+            return None
+
+    def put_signature(
+        self, problem: Problem, site: Optional[str], signature: Signature
+    ) -> None:
+        """Store the parsed signature of the problem."""
+        data = zlib.compress(pickle.dumps(signature))
+        with self._transaction():
+            # Signatures from other versions of the parser would never be used again.
+            self._conn.execute(
+                "DELETE FROM signatures WHERE parser_version != ?", (PARSER_VERSION,)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO signatures (digest, site, parser_version,"
+                " signature, accessed, size) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    problem_digest(problem),
+                    site or "",
+                    PARSER_VERSION,
+                    data,
+                    time.time(),
+                    len(data),
+                ),
+            )
+            self._evict_to_max_size()
+
+    def get_output(self, digest: str) -> Optional[str]:
+        """
+        Return generated code given the digest of its inputs (see
+        :meth:`lchelper.codegen.CodeGen.output_digest`), or ``None`` if it is not
+        cached.
+        """
+        with self._transaction():
+            row = self._conn.execute(
+                "SELECT code FROM outputs WHERE digest = ?", (digest,)
+            ).fetchone()
+            self._record("outputs", row is not None)
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE outputs SET accessed = ? WHERE digest = ?",
+                (time.time(), digest),
+            )
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put_output(self, digest: str, code: str) -> None:
+        """Store generated code given the digest of its inputs."""
+        data = zlib.compress(code.encode("utf-8"))
+        with self._transaction():
+            self._conn.execute(
+                "INSERT OR REPLACE INTO outputs (digest, code, accessed, size) VALUES"
+                " (?, ?, ?, ?)",
+                (digest, data, time.time(), len(data)),
+            )
+            self._evict_to_max_size()
+
+    def remove(self, site: Optional[str], contest_name: str) -> None:
+        """Remove a contest from the cache."""
+        with self._transaction():
+            self._conn.execute(
+                "DELETE FROM contests WHERE site = ? AND contest = ?",
+                (site or "", contest_name),
+            )
+            self._remove_orphan_statements()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,66 @@
+import dataclasses
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from lchelper.common import Problem
+
+__all__ = [
+    "Checkpoint",
+    "get_checkpoint",
+]
+
+CHECKPOINT_FOLDER = "checkpoints/"
+
+
+class Checkpoint:
+    """
+    Problems of a contest that are crawled so far. The checkpoint is written to disk
+    as soon as each problem is crawled, so that a failed crawl can be resumed without
+    crawling the same problems again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._problems: Dict[str, Problem] = {}  # keyed by problem URL
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._problems = {
+                    url: Problem(**problem) for url, problem in json.load(f).items()
+                }
+
+    def __len__(self) -> int:
+        return len(self._problems)
+
+    def get(self, problem_url: str) -> Optional[Problem]:
+        return self._problems.get(problem_url)
+
+    def save(self, problem: Problem) -> None:
+        """Add a problem to the checkpoint, and write the checkpoint to disk."""
+        with self._lock:
+            self._problems[problem.url] = problem
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Write to a temporary file first, so an interrupted write does not
+            # corrupt the checkpoint.
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {url: dataclasses.asdict(p) for url, p in self._problems.items()},
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(temp_path, self.path)
+
+    def remove(self) -> None:
+        """Delete the checkpoint, which is no longer needed once the crawl finishes."""
+        with self._lock:
+            self._problems = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def get_checkpoint(site: str, contest_name: str) -> Checkpoint:
+    """Return the checkpoint for crawling a contest."""
+    return Checkpoint(os.path.join(CHECKPOINT_FOLDER, site, f"{contest_name}.json"))
@@ -1,9 +1,10 @@
-from .base import CodeGen
+from .base import CodeGen, create_projects
 from .cpp import CppCodeGen
 from .python import PythonCodeGen
 
 __all__ = [
     "create_codegen",
+    "create_projects",
     "LANGUAGES",
 ]
 
@@ -1,20 +1,28 @@
 import abc
+import hashlib
+import json
 import os
 import shutil
 import traceback
 from datetime import datetime
-from typing import Dict, Iterable, List, Tuple, TypeVar, Union
+from typing import Collection, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
 
+from lchelper.cache import ProblemCache, problem_digest
 from lchelper.common import *
 from lchelper.logging import log
-from lchelper.parser import parse_problem
+from lchelper.parser import PARSER_VERSION, parse_problem
 
 __all__ = [
     "Code",
     "Signature",
     "CodeGen",
+    "create_projects",
 ]
 
+# Version of the code generators. Bump this whenever a change to code generation changes
+# its output, so that code cached by previous versions is generated again.
+CODEGEN_VERSION = 1
+
 T = TypeVar("T")
 Signature = Union[ProblemSignature, InteractiveProblemSignature]
 Code = List[str]
@@ -199,8 +207,95 @@ class CodeGen(abc.ABC):
             statement.extend(comments)
         return statement
 
+    def generate_problem_code(self, problem: Problem, signature: Signature) -> str:
+        """
+        Generate the contents of the code file for a single problem.
+
+        :param problem: The problem description.
+        :param signature: The parsed signature of the problem.
+        :return: Contents of the code file.
+        """
+        template = self.template_code.strip().split("\n")
+        user_template = self.user_template_code.strip().split("\n")
+        template = self.replace_section(template, {"USER TEMPLATE": user_template})
+
+        solution_code, test_code = self.generate_code(problem, signature)
+        problem_code = self.replace_section(
+            template,
+            {
+                "SOLUTION CLASS": solution_code,
+                "TEST": test_code,
+            },
+        )
+        if problem.statement != "":
+            statement = self.format_statement(problem)
+            problem_code = self.replace_section(
+                problem_code, {"STATEMENT": statement}, ignore_errors=True
+            )
+        return "\n".join(problem_code) + "\n"
+
+    def output_digest(self, problem: Problem, site: Optional[str]) -> str:
+        """
+        Return a digest of everything that the generated code of a problem depends on:
+        the problem, the code generator and its templates, and the versions of the
+        parser and the code generators.
+
+        :param problem: The problem description.
+        :param site: The LeetCode site where the problem is crawled.
+        :return: The digest, as a hexadecimal string.
+        """
+        klass = self.__class__
+        contents = json.dumps(
+            [
+                problem_digest(problem),
+                site or "",
+                f"{klass.__module__}.{klass.__qualname__}",
+                self.template_code,
+                self.user_template_code,
+                PARSER_VERSION,
+                CODEGEN_VERSION,
+            ]
+        )
+        return hashlib.sha256(contents.encode("utf-8")).hexdigest()
+
+    def write_problem(
+        self, project_path: str, idx: int, problem: Problem, code: str
+    ) -> None:
+        """
+        Write generated code for a single problem under the project folder.
+
+        :param project_path: Path to the project folder.
+        :param idx: Zero-based index of the problem.
+        :param problem: The problem description.
+        :param code: Contents of the code file.
+        """
+        code_path = os.path.join(project_path, self.get_problem_file_name(idx, problem))
+        self.write_and_backup(code_path, code)
+
+    def finish_project(
+        self, project_path: str, problems: List[Problem], signatures: List[Signature]
+    ) -> None:
+        """
+        Write supporting files for the project, after code for all problems are
+        generated.
+
+        :param project_path: Path to the project folder.
+        :param problems: List of problem descriptions to generate code for.
+        :param signatures: Parsed signatures of problems.
+        """
+        for tmpl_name, tmpl_code in self.extra_files.items():
+            with open(os.path.join(project_path, tmpl_name), "w") as f:
+                f.write(tmpl_code.strip() + "\n")
+
+        self.generate_additional_files(project_path, problems, signatures)
+
     def create_project(
-        self, project_path: str, problems: List[Problem], site: str, debug: bool = False
+        self,
+        project_path: str,
+        problems: List[Problem],
+        site: str,
+        debug: bool = False,
+        cache: Optional[ProblemCache] = None,
     ) -> None:
         """
         Create the folder for the project and generate code and supporting files.
@@ -212,48 +307,86 @@ class CodeGen(abc.ABC):
         :param debug: If ``True``, exceptions will not be caught. This is probably only
                       useful when the ``--debug`` flag is set, in which case the Python
                       debugger is hooked to handle exceptions.
+        :param cache: If specified, parsed signatures and generated code are taken
+                      from and stored into the cache.
         """
+        create_projects(
+            [(self, project_path)], problems, site, debug=debug, cache=cache
+        )
+
+
+def create_projects(
+    projects: List[Tuple[CodeGen, str]],
+    problems: Iterable[Problem],
+    site: str,
+    debug: bool = False,
+    only: Optional[Collection[int]] = None,
+    cache: Optional[ProblemCache] = None,
+) -> List[Problem]:
+    """
+    Create projects in multiple languages for the same list of problems. Each problem is
+    parsed only once, and code is written as soon as the problem is available, so
+    ``problems`` could be an iterator over problems that are still being crawled.
+
+    :param projects: A list of (code generator, path to project folder) tuples.
+    :param problems: List of problem descriptions to generate code for.
+    :param site: The LeetCode site where problems are crawled.
+    :param debug: If ``True``, exceptions will not be caught.
+    :param only: If specified, code is only written for problems at these (zero-based)
+                 indices, and files of other problems are left untouched. All problems
+                 are still used for the supporting files of the project.
+    :param cache: If specified, parsed signatures and generated code are taken from
+                  and stored into the cache, so that code is only generated again when
+                  the problem or the code generator changes (see
+                  :meth:`CodeGen.output_digest`).
+    :return: The list of problems that code is generated for.
+    """
+    for _, project_path in projects:
         if not os.path.exists(project_path):
             os.makedirs(project_path)
-        template = self.template_code.strip().split("\n")
-        user_template = self.user_template_code.strip().split("\n")
-        template = self.replace_section(template, {"USER TEMPLATE": user_template})
 
-        signatures = []
-        for idx, problem in enumerate(problems):
+    problem_list = []
+    signatures = []
+    for idx, problem in enumerate(problems):
+        problem_list.append(problem)
+        problem_signature = None
+        if cache is not None:
+            problem_signature = cache.get_signature(problem, site)
+        if problem_signature is None:
             try:
                 problem_signature = parse_problem(problem, site)
-                signatures.append(problem_signature)
-                solution_code, test_code = self.generate_code(
-                    problem, problem_signature
-                )
-                problem_code = self.replace_section(
-                    template,
-                    {
-                        "SOLUTION CLASS": solution_code,
-                        "TEST": test_code,
-                    },
-                )
-                if problem.statement != "":
-                    statement = self.format_statement(problem)
-                    problem_code = self.replace_section(
-                        problem_code, {"STATEMENT": statement}, ignore_errors=True
-                    )
-                code_path = os.path.join(
-                    project_path, self.get_problem_file_name(idx, problem)
-                )
-                self.write_and_backup(code_path, "\n".join(problem_code) + "\n")
+            except Exception:
+                if debug:
+                    raise
+                traceback.print_exc()
+                log(f"Exception occurred while parsing {problem.name!r}", level="error")
+                continue
+            if cache is not None:
+                cache.put_signature(problem, site, problem_signature)
+        signatures.append(problem_signature)
+        if only is not None and idx not in only:
+            continue
+        for codegen, project_path in projects:
+            try:
+                if cache is None:
+                    code = codegen.generate_problem_code(problem, problem_signature)
+                else:
+                    digest = codegen.output_digest(problem, site)
+                    code = cache.get_output(digest)
+                    if code is None:
+                        code = codegen.generate_problem_code(problem, problem_signature)
+                        cache.put_output(digest, code)
+                codegen.write_problem(project_path, idx, problem, code)
             except Exception:
                 if debug:
                     raise
                 traceback.print_exc()
                 log(
-                    f"Exception occurred while processing {problem.name!r}",
+                    f"Exception occurred while processing {problem.name!r} in"
+                    f" {codegen.language}",
                     level="error",
                 )
 
-        for tmpl_name, tmpl_code in self.extra_files.items():
-            with open(os.path.join(project_path, tmpl_name), "w") as f:
-                f.write(tmpl_code.strip() + "\n")
-
-        self.generate_additional_files(project_path, problems, signatures)
+    for codegen, project_path in projects:
+        codegen.finish_project(project_path, problem_list, signatures)
+    return problem_list
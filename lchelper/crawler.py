@@ -1,24 +1,65 @@
+import asyncio
+import atexit
+import contextlib
 import http.cookiejar
 import os
-from typing import List
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
-from selenium import webdriver
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as Expected
 from selenium.webdriver.support.wait import WebDriverWait
 
+from lchelper.browser import (
+    BrowserPool,
+    PooledBrowser,
+    get_profile_path,
+    login_browser,
+)
+from lchelper.checkpoint import Checkpoint, get_checkpoint
 from lchelper.common import Problem, User
+from lchelper.crawlers import Crawler, create_crawler
+from lchelper.crawlers.base import ProblemPath, SessionExpiredError
+from lchelper.crawlers.selenium import check_login
 from lchelper.logging import log
 
 __all__ = [
     "get_users",
     "get_cookie_path",
     "update_cookie",
+    "check_session",
+    "get_crawler",
+    "RateLimit",
+    "RATE_LIMITS",
+    "RateLimiter",
+    "get_rate_limiter",
+    "wait_for_problem_list",
+    "get_problems_iter",
     "get_problems",
+    "crawl_contests",
 ]
 
+T = TypeVar("T")
+
 COOKIE_FOLDER = "cookies/"
+SESSION_COOKIE = "LEETCODE_SESSION"
 
 
 def get_users() -> List[User]:
@@ -40,41 +81,28 @@ def get_cookie_path(username: str, site: str) -> str:
     return os.path.join(COOKIE_FOLDER, f"{username}@{site}.dat")
 
 
-def check_login(browser, site: str, timeout: int = 10) -> bool:
-    try:
-        if site == "leetcode":
-            WebDriverWait(browser, timeout).until(
-                Expected.presence_of_element_located(
-                    (
-                        By.CSS_SELECTOR,
-                        "#navbar_user_avatar",
-                    )
-                )
-            )
-        else:  # site == "leetcode-cn"
-            WebDriverWait(browser, timeout).until(
-                Expected.presence_of_element_located(
-                    (
-                        By.CSS_SELECTOR,
-                        'nav div[data-cypress="NavbarMenuIconItem"] > span',
-                    )
-                )
-            )
-        return True
-    except TimeoutException:
-        return False
-
-
 def update_cookie(username: str, site: str) -> None:
-    """Update the cookie for the LeetCode user."""
+    """
+    Update the cookie for the LeetCode user. The browser used for logging in keeps its
+    profile, so that later crawls with Selenium start signed in.
+    """
     print(
         "A browser window will open shortly. Do not interact with the window until"
         " further instructions."
     )
-    browser = webdriver.Chrome()
-    browser.set_window_position(0, 0)
-    browser.set_window_size(800, 600)
-    browser.switch_to.window(browser.window_handles[0])
+    cookie_path = get_cookie_path(username, site)
+    with login_browser(get_profile_path(cookie_path)) as browser:
+        browser.set_window_position(0, 0)
+        browser.set_window_size(800, 600)
+        browser.switch_to.window(browser.window_handles[0])
+        jar = _login_and_get_cookies(browser, username, site)
+
+    jar.save(cookie_path, ignore_discard=True, ignore_expires=True)
+
+
+def _login_and_get_cookies(
+    browser: PooledBrowser, username: str, site: str
+) -> http.cookiejar.LWPCookieJar:
     url = f"https://{site}.com/accounts/login/"
     browser.get(url)
     browser.implicitly_wait(10)
@@ -123,89 +151,651 @@ def update_cookie(username: str, site: str) -> None:
                 rest={},
             )
         )
-    browser.quit()
+    return jar
 
-    cookie_path = get_cookie_path(username, site)
-    jar.save(cookie_path, ignore_discard=True, ignore_expires=True)
 
+def check_session(
+    site: str, cookie_path: str, url: Optional[str] = None, timeout: float = 3.0
+) -> bool:
+    """
+    Quickly check whether the cookies of a user are still valid, without launching a
+    browser. The expiry date of the session cookie is checked first, and then the
+    cookies are verified with a lightweight authenticated API request.
 
-def get_problems(contest_url: str, site: str, cookie_path: str) -> List[Problem]:
+    :param site: LeetCode site name.
+    :param cookie_path: Path to the cookie to check.
+    :param url: URL to any page on the site. Defaults to the homepage of the site.
+    :param timeout: Timeout for the API request, in seconds.
+    :return: Whether the cookies are valid. If validity cannot be determined (e.g.,
+        due to network errors), ``True`` is returned.
     """
-    Obtain the list of problems in a contest, given its URL.
+    cookie_jar = http.cookiejar.LWPCookieJar(cookie_path)
+    cookie_jar.load(ignore_discard=True, ignore_expires=True)
+    session_cookie = next((c for c in cookie_jar if c.name == SESSION_COOKIE), None)
+    if session_cookie is None:
+        log(f"No session cookie found in {cookie_path!r}", level="warning")
+        return False
+    # Cookies without expiry dates are saved with an expiry of 0.
+    if session_cookie.expires and session_cookie.expires <= time.time():
+        expiry = time.localtime(session_cookie.expires)
+        log(
+            f"Session cookie in {cookie_path!r} expired at"
+            f" {time.strftime('%Y-%m-%d %H:%M:%S', expiry)}",
+            level="warning",
+        )
+        return False
 
-    :param contest_url: URL to the contest page.
+    crawler = get_crawler("http", site, cookie_path)
+    try:
+        return crawler.is_signed_in(url or f"https://{site}.com/", timeout=timeout)
+    except Exception as e:
+        log(
+            f"Failed to verify cookies ({type(e).__name__}: {e}), assuming they are"
+            f" valid",
+            level="warning",
+        )
+        return True
+
+
+_crawlers: Dict[Tuple[Any, ...], Crawler] = {}
+_crawlers_lock = threading.Lock()
+
+
+def get_crawler(
+    backend: str,
+    site: str,
+    cookie_path: Optional[str],
+    pool: Optional[BrowserPool] = None,
+    **kwargs,
+) -> Crawler:
+    """
+    Return the crawler shared within the current process for the backend and user, so
+    that sessions are kept alive across crawls.
+
+    :param backend: The crawling backend. See :attr:`CRAWLERS` for available options.
     :param site: LeetCode site name.
     :param cookie_path: Path to the cookie to use for signing in.
-    :return: A list of problem descriptions.
+    :param pool: The pool to take browsers from, only used by the Selenium backend.
+    :param kwargs: Additional arguments for constructing the crawler. Crawlers created
+                   with different arguments are not shared.
     """
-    if not os.path.exists(cookie_path):
-        raise ValueError(
-            f"No cookies file found at path '{cookie_path}'. Please login first"
+    if backend == "selenium" and pool is not None:
+        kwargs["pool"] = pool
+    # Arguments set to `None` take their default values.
+    kwargs = {k: v for k, v in kwargs.items() if v is not None}
+    key = (backend, site, cookie_path, *sorted(kwargs.items()))
+    with _crawlers_lock:
+        if key not in _crawlers:
+            crawler = create_crawler(backend, site, cookie_path, **kwargs)
+            atexit.register(crawler.close)
+            _crawlers[key] = crawler
+        return _crawlers[key]
+
+
+@dataclass
+class RateLimit:
+    """Limits on the requests sent to a LeetCode site."""
+
+    rate: float  # maximum number of requests per second
+    burst: int = 4  # maximum number of requests sent at once, e.g., after being idle
+    max_concurrency: int = 8  # maximum number of requests in flight
+    min_rate: float = 0.2  # the rate is never lowered below this
+    slow_factor: float = 3.0
+    # ^ responses that take longer than this many times the typical latency are slow
+    min_slowdown: float = 0.5
+    # ^ ... and also this many seconds longer, so that jitter in fast responses is not
+    #   mistaken for congestion
+
+
+# Default limits for each site. Modify these to change the limits used by
+# :func:`get_rate_limiter`.
+RATE_LIMITS: Dict[str, RateLimit] = {
+    "leetcode": RateLimit(rate=5.0),
+    "leetcode-cn": RateLimit(rate=2.0),
+}
+
+
+class RateLimiter:
+    """
+    Adaptive limiter for requests sent to a site. Requests are admitted by a token
+    bucket, which bounds the rate of requests, and an AIMD (additive-increase,
+    multiplicative-decrease) window, which bounds the number of requests in flight.
+
+    Each request that completes cleanly grows the window by about one request per
+    round trip, and raises the rate back towards the limit. When a request fails
+    (e.g., with an error page, or is redirected to the login page) or is slow, both the
+    window and the rate are halved. Only one decrease happens per round trip, i.e.,
+    congestion signals from requests started before the last decrease are ignored.
+    """
+
+    def __init__(self, site: str, limit: RateLimit):
+        if not limit.rate > 0:
+            raise ValueError(f"Rate must be positive, got {limit.rate}")
+        self.site = site
+        self.limit = limit
+        self.rate = limit.rate
+        self.window = float(min(limit.burst, limit.max_concurrency))
+        self.latency: Optional[float] = None  # moving average of response times
+        self._slow_start = True  # grow the window exponentially until congested
+        self._tokens = float(limit.burst)
+        self._last_refill = time.time()
+        self._last_decrease = 0.0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._last_refill
+        self._tokens = min(float(self.limit.burst), self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def _try_acquire(self) -> Tuple[Optional[float], Optional[float]]:
+        """
+        Admit a request if possible. Must be called while holding the condition.
+
+        :return: A tuple of the time when the request is admitted (or ``None`` if it is
+            not admitted), and the number of seconds to wait before trying again (or
+            ``None`` to wait for a request to finish).
+        """
+        now = time.time()
+        self._refill(now)
+        if self._in_flight >= int(self.window):
+            return None, None
+        if self._tokens < 1.0:
+            return None, (1.0 - self._tokens) / self.rate
+        self._tokens -= 1.0
+        self._in_flight += 1
+        return now, None
+
+    def acquire(self) -> float:
+        """
+        Wait until a request could be sent.
+
+        :return: The time when the request is admitted, to be passed to
+            :meth:`release`.
+        """
+        with self._cond:
+            while True:
+                start_time, timeout = self._try_acquire()
+                if start_time is not None:
+                    return start_time
+                self._cond.wait(timeout)
+
+    async def acquire_async(self) -> float:
+        """Asynchronous version of :meth:`acquire`, for requests sent by coroutines."""
+        while True:
+            with self._cond:
+                start_time, timeout = self._try_acquire()
+            if start_time is not None:
+                return start_time
+            # Coroutines are not notified when requests finish, so check periodically.
+            await asyncio.sleep(timeout if timeout is not None else 0.05)
+
+    def release(self, start_time: float, ok: bool, timed: bool = True) -> None:
+        """
+        Report that a request has finished.
+
+        :param start_time: The time returned by :meth:`acquire` for the request.
+        :param ok: Whether the request succeeded.
+        :param timed: Whether to track the response time of the request, which is used
+                      to detect slow responses. Requests that take much longer or
+                      shorter than typical ones (e.g., for problem lists) should not be
+                      timed.
+        """
+        now = time.time()
+        elapsed = now - start_time
+        with self._cond:
+            self._in_flight -= 1
+            slow = False
+            if ok and timed:
+                if self.latency is None:
+                    self.latency = elapsed
+                else:
+                    slow = (
+                        elapsed > self.latency * self.limit.slow_factor
+                        and elapsed - self.latency > self.limit.min_slowdown
+                    )
+                    self.latency = 0.8 * self.latency + 0.2 * elapsed
+            if ok and not slow:
+                if self._slow_start:
+                    self.window += 1.0
+                else:
+                    self.window += 1.0 / self.window
+                self.window = min(self.window, float(self.limit.max_concurrency))
+                self.rate = min(self.rate + self.limit.rate / 10, self.limit.rate)
+            elif start_time >= self._last_decrease:
+                self._refill(now)  # tokens so far are generated at the old rate
+                self.window = max(self.window / 2, 1.0)
+                self.rate = max(self.rate / 2, self.limit.min_rate)
+                self._slow_start = False
+                self._last_decrease = now
+                reason = f"slow response ({elapsed:.2f}s)" if ok else "failed request"
+                log(
+                    f"Slowing down requests to {self.site} due to {reason}: at most"
+                    f" {int(self.window)} concurrent, {self.rate:.2f} per second",
+                    level="warning",
+                )
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def request(self, timed: bool = True) -> Iterator[None]:
+        """Context manager that wraps sending a request. See :meth:`release`."""
+        start_time = self.acquire()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.release(start_time, ok, timed)
+
+    @contextlib.asynccontextmanager
+    async def request_async(self, timed: bool = True) -> AsyncIterator[None]:
+        """Asynchronous version of :meth:`request`."""
+        start_time = await self.acquire_async()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.release(start_time, ok, timed)
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(site: str) -> RateLimiter:
+    """
+    Return the rate limiter shared within the current process for the site, using the
+    limits in :attr:`RATE_LIMITS`.
+    """
+    with _crawlers_lock:
+        if site not in _rate_limiters:
+            _rate_limiters[site] = RateLimiter(site, RATE_LIMITS[site])
+        return _rate_limiters[site]
+
+
+def wait_for_problem_list(
+    crawler: Crawler, contest_url: str, interval: float = 0.5, timeout: float = 300
+) -> List[ProblemPath]:
+    """
+    Repeatedly try to obtain the list of problems in a contest, until problems are
+    available. This is useful when the contest is just about to start.
+
+    :param crawler: The crawler to use.
+    :param contest_url: URL to the contest page.
+    :param interval: Number of seconds to wait between attempts.
+    :param timeout: Number of seconds to wait in total before giving up.
+    :return: The list of problems.
+    """
+    deadline = time.time() + timeout
+    n_attempts = 0
+    while True:
+        n_attempts += 1
+        try:
+            problem_paths = crawler.get_problem_list(contest_url)
+            if len(problem_paths) == 0:
+                raise ValueError(f"No problems found in contest {contest_url!r}")
+        except Exception as e:
+            if time.time() + interval > deadline:
+                raise
+            if n_attempts == 1:
+                log(
+                    f"Problem list is not available yet ({type(e).__name__}: {e}),"
+                    f" retrying..."
+                )
+            time.sleep(interval)
+        else:
+            log(f"Problem list is available after {n_attempts} attempt(s)")
+            return problem_paths
+
+
+def _gather_problems(
+    crawler: Crawler,
+    problem_paths: List[ProblemPath],
+    workers: int,
+    crawl: Callable[[ProblemPath], Awaitable[Problem]],
+) -> Iterator[Problem]:
+    """
+    Crawl problems with a single coroutine running in the event loop of the crawler,
+    which gathers the problems with at most ``workers`` of them crawled at once.
+    Problems are yielded in order, as soon as they are crawled.
+    """
+    results: "queue.Queue[Tuple[int, Optional[Problem], Optional[Exception]]]" = (
+        queue.Queue()
+    )
+    tasks: List["asyncio.Task[None]"] = []
+
+    async def crawl_all() -> None:
+        tasks.append(asyncio.current_task())
+        semaphore = asyncio.Semaphore(workers)
+
+        async def crawl_one(idx: int, problem_path: ProblemPath) -> None:
+            async with semaphore:
+                try:
+                    results.put((idx, await crawl(problem_path), None))
+                except Exception as e:
+                    results.put((idx, None, e))
+
+        await asyncio.gather(
+            *(crawl_one(idx, path) for idx, path in enumerate(problem_paths))
         )
 
-    options = webdriver.ChromeOptions()
-    options.add_argument("headless")
-    browser = webdriver.Chrome(options=options)
-    browser.set_window_position(0, 0)
-    browser.set_window_size(
-        3840, 600
-    )  # a wide enough window so code does not get wrapped
-    browser.implicitly_wait(10)
+    async def cancel_all() -> None:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
-    log("Loading LeetCode contest page...")
-    browser.get(
-        contest_url
-    )  # visit the page first to update the domain, and then set cookies
-    cookie_jar = http.cookiejar.LWPCookieJar(cookie_path)
-    cookie_jar.load(ignore_discard=True, ignore_expires=True)
-    for c in cookie_jar:
-        browser.add_cookie({"name": c.name, "value": c.value, "path": c.path})
-    browser.get(contest_url)  # visit again to refresh page with cookies added
-
-    if not check_login(browser, site, timeout=10):
-        browser.quit()
-        print(f"Cookie '{cookie_path}' might have expired. Please try logging in again")
-        exit(1)
-
-    elem = browser.find_element(By.CSS_SELECTOR, "ul.contest-question-list")
-    links = elem.find_elements(By.TAG_NAME, "a")
-    problem_paths = [(link.get_attribute("href"), link.text) for link in links]
+    future = crawler.submit(crawl_all())
+    try:
+        finished: Dict[int, Tuple[Optional[Problem], Optional[Exception]]] = {}
+        for idx in range(len(problem_paths)):
+            while idx not in finished:
+                result_idx, problem, error = results.get()
+                finished[result_idx] = (problem, error)
+            problem, error = finished.pop(idx)
+            if error is not None:
+                raise error
+            assert problem is not None
+            yield problem
+    except BaseException:
+        # Stop crawling the other problems if one failed, or if the iterator is closed,
+        # and wait until they are stopped so that none outlive the event loop.
+        crawler.submit(cancel_all()).result()
+        future.cancel()
+        raise
+    future.result()
+
+
+def _iter_problems(
+    crawler: Crawler,
+    contest_url: str,
+    workers: Optional[int],
+    skip: int = 0,
+    problem_paths: Optional[List[ProblemPath]] = None,
+    retries: int = 0,
+    backoff: float = 1.0,
+    checkpoint: Optional[Checkpoint] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> Iterator[Problem]:
+    def fetch(method: Callable[..., T], *args, timed: bool = True) -> T:
+        if limiter is None:
+            return method(*args)
+        with limiter.request(timed):
+            return method(*args)
+
+    start_time = time.time()
+    if problem_paths is None:
+        # Contest pages load differently from problem pages, so their response times
+        # are not used for detecting slow responses.
+        problem_paths = fetch(crawler.get_problem_list, contest_url, timed=False)
     log(f"Found problems: {[name for _, name in problem_paths]!r}")
+    if workers is None:
+        workers = crawler.default_workers(len(problem_paths) - skip)
+
+    lock = threading.Lock()
+    n_parsed = skip
 
-    parsed_problems = []
-    for idx, (problem_url, problem_name) in enumerate(problem_paths):
-        browser.get(problem_url)
+    def retry_delay(
+        problem_path: ProblemPath, attempt: int, error: Exception
+    ) -> Optional[float]:
+        """Return the number of seconds to wait before retrying, or `None` to fail."""
+        # Retrying does not help if the session has expired.
+        if attempt >= retries or isinstance(error, SessionExpiredError):
+            return None
+        delay = backoff * 2**attempt
+        log(
+            f"Failed to crawl problem {problem_path[1]!r}"
+            f" ({type(error).__name__}: {error}), retrying in {delay:.1f}s...",
+            level="warning",
+        )
+        return delay
+
+    def crawl_with_retries(problem_path: ProblemPath) -> Problem:
+        attempt = 0
+        while True:
+            try:
+                return fetch(crawler.get_problem, *problem_path)
+            except Exception as e:
+                delay = retry_delay(problem_path, attempt, e)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+
+    async def crawl_with_retries_async(problem_path: ProblemPath) -> Problem:
+        attempt = 0
+        while True:
+            try:
+                if limiter is None:
+                    return await crawler.get_problem_async(*problem_path)
+                async with limiter.request_async():
+                    return await crawler.get_problem_async(*problem_path)
+            except Exception as e:
+                delay = retry_delay(problem_path, attempt, e)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    def finish(problem: Problem, from_checkpoint: bool) -> Problem:
+        nonlocal n_parsed
+        if from_checkpoint:
+            message = "Loaded problem from checkpoint"
+        else:
+            if checkpoint is not None:
+                checkpoint.save(problem)
+            message = "Parsed problem"
+        with lock:
+            n_parsed += 1
+            log(f"{message} ({n_parsed}/{len(problem_paths)}): {problem.name}")
+        return problem
+
+    def crawl(problem_path: ProblemPath) -> Problem:
+        problem = checkpoint.get(problem_path[0]) if checkpoint is not None else None
+        if problem is not None:
+            return finish(problem, from_checkpoint=True)
+        return finish(crawl_with_retries(problem_path), from_checkpoint=False)
+
+    async def crawl_async(problem_path: ProblemPath) -> Problem:
+        problem = checkpoint.get(problem_path[0]) if checkpoint is not None else None
+        if problem is not None:
+            return finish(problem, from_checkpoint=True)
+        problem = await crawl_with_retries_async(problem_path)
+        return finish(problem, from_checkpoint=False)
+
+    if crawler.supports_async:
+        yield from _gather_problems(crawler, problem_paths[skip:], workers, crawl_async)
+    elif workers == 1:
+        for path in problem_paths[skip:]:
+            yield crawl(path)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # `map` submits all tasks at once, but yields results in order.
+            yield from executor.map(crawl, problem_paths[skip:])
+    log(
+        f"All problems successfully crawled in {time.time() - start_time:.2f}s",
+        level="success",
+    )
+
+
+def get_problems_iter(
+    contest_url: str,
+    site: str,
+    cookie_path: Optional[str],
+    workers: Optional[int] = None,
+    pool: Optional[BrowserPool] = None,
+    backend: Union[str, Crawler] = "selenium",
+    problem_paths: Optional[List[ProblemPath]] = None,
+    retries: int = 2,
+    backoff: float = 1.0,
+    checkpoint: Optional[Checkpoint] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> Iterator[Problem]:
+    """
+    Obtain problems in a contest, given its URL. Problems are yielded as soon as they
+    are crawled, so that they could be processed while later problems are still
+    loading.
+
+    See :func:`get_problems` for descriptions of the other arguments.
+
+    :param problem_paths: The list of problems in the contest, if already known
+                          (e.g., from :func:`wait_for_problem_list`). If not
+                          specified, the list is obtained from the contest page.
+    :param retries: Number of times to retry crawling a problem if it fails.
+    :param backoff: Number of seconds to wait before the first retry. The delay is
+                    doubled for each subsequent retry.
+    :param checkpoint: If specified, problems that are already in the checkpoint are
+                       not crawled again, and each crawled problem is saved to the
+                       checkpoint.
+    :param limiter: If specified, requests for the problem list and each problem
+                    are sent through the rate limiter (see :func:`get_rate_limiter`).
+    :return: An iterator over problem descriptions, in the same order as on the contest
+        page.
+    """
+    if workers is not None and workers < 1:
+        raise ValueError(f"Number of workers must be positive, got {workers}")
+
+    if isinstance(backend, Crawler):
+        crawler = backend
+    else:
+        crawler = get_crawler(backend, site, cookie_path, pool=pool)
+    kwargs = dict(
+        problem_paths=problem_paths,
+        retries=retries,
+        backoff=backoff,
+        checkpoint=checkpoint,
+        limiter=limiter,
+    )
+    n_yielded = 0
+    try:
+        for problem in _iter_problems(crawler, contest_url, workers, **kwargs):
+            yield problem
+            n_yielded += 1
+        return
+    except Exception as e:
+        if not crawler.fall_back_to_selenium or isinstance(e, SessionExpiredError):
+            raise
+        log(
+            f"Crawling with backend {crawler.name!r} failed"
+            f" ({type(e).__name__}: {e}), falling back to Selenium",
+            level="warning",
+        )
+    crawler = get_crawler(
+        "selenium", site, cookie_path, pool=pool, snapshot_dir=crawler.snapshot_dir
+    )
+    # Problems that are already yielded are not crawled again.
+    yield from _iter_problems(crawler, contest_url, workers, skip=n_yielded, **kwargs)
+
+
+def get_problems(
+    contest_url: str,
+    site: str,
+    cookie_path: Optional[str],
+    workers: Optional[int] = None,
+    pool: Optional[BrowserPool] = None,
+    backend: Union[str, Crawler] = "selenium",
+) -> List[Problem]:
+    """
+    Obtain the list of problems in a contest, given its URL.
+
+    :param contest_url: URL to the contest page.
+    :param site: LeetCode site name.
+    :param cookie_path: Path to the cookie to use for signing in.
+    :param workers: Number of problem pages to crawl concurrently. For the Selenium
+                    backend, each worker runs its own headless Chrome instance. If not
+                    specified, the crawler decides (see
+                    :meth:`Crawler.default_workers`): problems are crawled one after
+                    another, except with CDP, which loads all problems at once.
+    :param pool: The pool to take browsers from. If not specified, the pool shared
+                 within the current process is used.
+    :param backend: The crawling backend to use. See :attr:`CRAWLERS` for available
+                    options. A crawler instance could also be provided. If a backend
+                    other than Selenium fails, the crawl is retried with Selenium
+                    (unless the crawler is set to not fall back).
+    :return: A list of problem descriptions, in the same order as on the contest page.
+    """
+    return list(
+        get_problems_iter(contest_url, site, cookie_path, workers, pool, backend)
+    )
+
+
+def crawl_contests(
+    contest_urls: Iterable[str],
+    site: str,
+    cookie_path: Optional[str],
+    workers: Optional[int] = None,
+    pool: Optional[BrowserPool] = None,
+    backend: Union[str, Crawler] = "selenium",
+    retries: int = 2,
+    use_checkpoints: bool = False,
+    limiter: Optional[RateLimiter] = None,
+) -> Iterator[Tuple[str, List[Problem]]]:
+    """
+    Obtain problems in multiple contests, one contest after another. All contests are
+    crawled through the same session, so browsers are launched and signed in only
+    once. Contests that fail to crawl are logged and skipped.
+
+    See :func:`get_problems` for descriptions of the other arguments.
+
+    :param contest_urls: URLs to the contest pages.
+    :param retries: Number of times to retry crawling a problem if it fails.
+    :param use_checkpoints: If ``True``, problems are saved to the checkpoint of each
+                            contest as they are crawled, so that contests that fail
+                            could be resumed later. The checkpoint of a contest is
+                            removed after the contest is yielded.
+    :param limiter: If specified, all requests are sent through the rate limiter.
+    :return: An iterator over (URL, problems) tuples for each contest that is
+        successfully crawled, yielded as soon as the contest is crawled.
+    """
+    contest_urls = list(contest_urls)
+    if isinstance(backend, Crawler):
+        crawler = backend
+    else:
+        crawler = get_crawler(backend, site, cookie_path, pool=pool)
+
+    start_time = time.time()
+    n_contests = n_problems = 0
+    failed_urls = []
+    for idx, contest_url in enumerate(contest_urls):
+        log(f"Crawling contest ({idx + 1}/{len(contest_urls)}): {contest_url}")
+        checkpoint = None
+        if use_checkpoints:
+            checkpoint = get_checkpoint(site, contest_url.rstrip("/").split("/")[-1])
         try:
-            # Page during contest; editor located below statement.
-            statement_css_selector = "div.question-content"
-            code_css_selector = "pre.CodeMirror-line"
-            statement = browser.find_element(
-                By.CSS_SELECTOR, statement_css_selector
-            ).text
-        except (TimeoutException, NoSuchElementException):
-            # Page after contest; statement and editor in vertically split panes.
-            statement_css_selector = (
-                "div[data-key='description-content'] div.content__1Y2H"
+            problems = list(
+                get_problems_iter(
+                    contest_url,
+                    site,
+                    cookie_path,
+                    workers,
+                    pool,
+                    backend=crawler,
+                    retries=retries,
+                    checkpoint=checkpoint,
+                    limiter=limiter,
+                )
             )
-            code_css_selector = "div.monaco-scrollable-element div.view-line"
-            statement = browser.find_element(
-                By.CSS_SELECTOR, statement_css_selector
-            ).text
-        examples = [
-            elem.text
-            for elem in browser.find_elements(By.CSS_SELECTOR, "pre:not([class])")
-            if elem.text
-        ]
-        # TODO: Should make sure C++ is selected!
-        code = [
-            elem.text
-            for elem in browser.find_elements(By.CSS_SELECTOR, code_css_selector)
-        ]
-        problem = Problem(problem_url, problem_name, statement, examples, code)
-        parsed_problems.append(problem)
-        log(f"Parsed problem ({idx + 1}/{len(problem_paths)}): {problem_name}")
-
-    browser.quit()
-    log("All problems successfully crawled", level="success")
-
-    return parsed_problems
+        except SessionExpiredError:
+            raise  # other contests would fail as well
+        except Exception as e:
+            log(
+                f"Failed to crawl contest {contest_url!r} ({type(e).__name__}: {e})",
+                level="warning",
+            )
+            failed_urls.append(contest_url)
+            continue
+        n_contests += 1
+        n_problems += len(problems)
+        elapsed = max(time.time() - start_time, 1e-3)
+        log(
+            f"Crawled {n_problems} problems from {n_contests} contest(s) in"
+            f" {elapsed:.1f}s ({n_problems / elapsed * 60:.1f} problems/min)"
+        )
+        yield contest_url, problems
+        if checkpoint is not None:
+            checkpoint.remove()
+
+    if len(failed_urls) > 0:
+        log(
+            f"Failed to crawl {len(failed_urls)} contest(s): {failed_urls!r}",
+            level="warning",
+        )
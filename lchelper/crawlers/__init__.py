@@ -0,0 +1,37 @@
+from typing import Optional
+
+from .base import Crawler, SessionExpiredError
+from .cdp import CDPCrawler
+from .hedged import HedgedCrawler
+from .http import HTTPCrawler
+from .replay import FIXTURE_FOLDER, ReplayCrawler
+from .selenium import SeleniumCrawler
+from .sharded import ShardedCrawler
+from .snapshot import SNAPSHOT_FOLDER, ExtractionFailure, reextract_problems
+
+__all__ = [
+    "Crawler",
+    "SessionExpiredError",
+    "HedgedCrawler",
+    "ShardedCrawler",
+    "create_crawler",
+    "CRAWLERS",
+    "FIXTURE_FOLDER",
+    "SNAPSHOT_FOLDER",
+    "ExtractionFailure",
+    "reextract_problems",
+]
+
+
+def create_crawler(
+    backend: str, site: str, cookie_path: Optional[str], **kwargs
+) -> Crawler:
+    return CRAWLERS[backend](site, cookie_path, **kwargs)
+
+
+CRAWLERS = {
+    "selenium": SeleniumCrawler,
+    "http": HTTPCrawler,
+    "replay": ReplayCrawler,
+    "cdp": CDPCrawler,
+}
@@ -0,0 +1,131 @@
+import abc
+import os
+from concurrent.futures import Future
+from typing import Awaitable, List, Optional, Tuple, TypeVar
+
+from lchelper.common import Problem
+from lchelper.crawlers.snapshot import save_snapshot
+
+__all__ = [
+    "ProblemPath",
+    "SessionExpiredError",
+    "Crawler",
+]
+
+ProblemPath = Tuple[str, str]  # (URL, name) of a problem
+
+T = TypeVar("T")
+
+
+class SessionExpiredError(RuntimeError):
+    """Raised when a crawler is not signed in, e.g., because its cookies expired."""
+
+
+class Crawler(abc.ABC):
+    """
+    A crawling session on a LeetCode site, signed in using the cookies of a user.
+    Methods of the crawler may be called concurrently from multiple threads.
+    """
+
+    # Whether the crawl should be retried with Selenium if this crawler fails.
+    fall_back_to_selenium = True
+    # Whether the crawler implements `get_problem_async` and `submit`, in which case
+    # problems are crawled concurrently by a single coroutine instead of by threads.
+    supports_async = False
+
+    def __init__(
+        self, site: str, cookie_path: Optional[str], snapshot_dir: Optional[str] = None
+    ):
+        """
+        :param site: LeetCode site name.
+        :param cookie_path: Path to the cookie to use for signing in. Could be
+                            ``None`` for crawlers that do not require signing in.
+        :param snapshot_dir: If specified, the source of each crawled problem page is
+                             saved under this directory, so that problems can be
+                             extracted again offline (see :func:`reextract_problems`).
+        """
+        if cookie_path is not None and not os.path.exists(cookie_path):
+            raise ValueError(
+                f"No cookies file found at path '{cookie_path}'. Please login first"
+            )
+        self.site = site
+        self.cookie_path = cookie_path
+        self.snapshot_dir = snapshot_dir
+
+    @property
+    @abc.abstractmethod
+    def name(self) -> str:
+        """Name of the crawling backend."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_problem_list(self, contest_url: str) -> List[ProblemPath]:
+        """
+        Obtain the list of problems in a contest.
+
+        :param contest_url: URL to the contest page.
+        :return: A list of (URL, name) tuples for each problem, in the same order as on
+            the contest page.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_problem(self, problem_url: str, problem_name: str) -> Problem:
+        """
+        Obtain the description of a problem.
+
+        :param problem_url: URL to the problem page.
+        :param problem_name: Name of the problem, as shown on the contest page.
+        :return: The problem description.
+        """
+        raise NotImplementedError
+
+    async def get_problem_async(self, problem_url: str, problem_name: str) -> Problem:
+        """
+        Obtain the description of a problem asynchronously. Only available if
+        :attr:`supports_async` is ``True``. See :meth:`get_problem`.
+        """
+        raise NotImplementedError
+
+    def submit(self, coroutine: Awaitable[T]) -> "Future[T]":
+        """
+        Run a coroutine in the event loop of the crawler. Only available if
+        :attr:`supports_async` is ``True``.
+
+        :return: A future for the result of the coroutine.
+        """
+        raise NotImplementedError
+
+    def default_workers(self, n_problems: int) -> int:
+        """
+        Return the number of problem pages to crawl concurrently, if not specified.
+
+        :param n_problems: Number of problems to crawl.
+        """
+        return 1
+
+    def warm_up(self, contest_url: str, workers: int = 1) -> bool:
+        """
+        Prepare the crawler so that a later crawl of the contest starts as fast as
+        possible, e.g., by establishing connections or launching browsers.
+
+        :param contest_url: URL to the contest page.
+        :param workers: Number of problem pages that will be crawled concurrently.
+        :return: Whether the cookies are valid. If the crawler cannot tell, ``True`` is
+            returned.
+        """
+        return True
+
+    def _save_snapshot(self, problem_url: str, page: str) -> None:
+        if self.snapshot_dir is not None:
+            save_snapshot(problem_url, page, self.snapshot_dir)
+
+    def close(self) -> None:
+        """Release resources held by the crawler."""
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
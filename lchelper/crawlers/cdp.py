@@ -0,0 +1,382 @@
+import asyncio
+import contextlib
+import http.cookiejar
+import itertools
+import json
+import shutil
+import subprocess
+import tempfile
+import threading
+import urllib.request
+from concurrent.futures import Future
+from typing import Any, Awaitable, Dict, List, Optional, Tuple, TypeVar
+
+from lchelper.browser import BLOCKED_URL_PATTERNS, launch_chrome
+from lchelper.common import Problem
+from lchelper.crawlers.base import Crawler, ProblemPath
+from lchelper.crawlers.extract import EXAMPLE_SELECTOR, PAGE_LAYOUTS
+from lchelper.crawlers.selenium import EXTRACT_SCRIPT
+from lchelper.logging import log
+
+__all__ = [
+    "CDPError",
+    "CDPCrawler",
+]
+
+T = TypeVar("T")
+
+# Resolve with the index of the first selector that matches an element in the page, as
+# soon as such an element appears, or -1 if none appears within the timeout. Elements
+# are detected using a `MutationObserver` instead of polling.
+WAIT_FUNCTION = """
+(selectors, timeout) => new Promise(resolve => {
+  const find = () => selectors.findIndex(s => document.querySelector(s) !== null);
+  const idx = find();
+  if (idx >= 0) return resolve(idx);
+  const observer = new MutationObserver(() => {
+    const idx = find();
+    if (idx >= 0) {
+      observer.disconnect();
+      clearTimeout(timer);
+      resolve(idx);
+    }
+  });
+  observer.observe(document, {childList: true, subtree: true});
+  const timer = setTimeout(() => {
+    observer.disconnect();
+    resolve(-1);
+  }, timeout);
+})
+"""
+
+CONTEST_LIST_SELECTOR = "ul.contest-question-list a"
+
+
+class CDPError(RuntimeError):
+    """An error reported by Chrome through the DevTools protocol."""
+
+
+def _import_websockets():
+    try:
+        import websockets
+    except ImportError:
+        raise ImportError(
+            "The CDP backend requires the `websockets` package. Please install it by"
+            " running `pip install websockets`"
+        )
+    return websockets
+
+
+class _Connection:
+    """
+    A connection to the browser through the DevTools protocol. Commands for all pages
+    are multiplexed over the same WebSocket, using flattened sessions.
+    """
+
+    def __init__(self, websocket):
+        self._websocket = websocket
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._listeners: Dict[Tuple[Optional[str], str], List[asyncio.Future]] = {}
+        self._reader = asyncio.ensure_future(self._read_messages())
+
+    @classmethod
+    async def connect(cls, url: str) -> "_Connection":
+        websockets = _import_websockets()
+        return cls(await websockets.connect(url, max_size=None))
+
+    async def _read_messages(self) -> None:
+        try:
+            async for message in self._websocket:
+                message = json.loads(message)
+                if "id" in message:
+                    future = self._pending.pop(message["id"], None)
+                    if future is None or future.done():
+                        continue
+                    if "error" in message:
+                        future.set_exception(CDPError(message["error"]["message"]))
+                    else:
+                        future.set_result(message.get("result", {}))
+                else:
+                    key = (message.get("sessionId"), message["method"])
+                    for future in self._listeners.pop(key, []):
+                        if not future.done():
+                            future.set_result(message.get("params", {}))
+        finally:
+            error = ConnectionError("Connection to the browser is closed")
+            for future in itertools.chain(
+                self._pending.values(), *self._listeners.values()
+            ):
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+            self._listeners.clear()
+
+    async def send(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Send a command, and wait for its result."""
+        message: Dict[str, Any] = {
+            "id": next(self._ids),
+            "method": method,
+            "params": params or {},
+        }
+        if session_id is not None:
+            message["sessionId"] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message["id"]] = future
+        await self._websocket.send(json.dumps(message))
+        return await future
+
+    def wait_for_event(
+        self, method: str, session_id: Optional[str] = None
+    ) -> asyncio.Future:
+        """
+        Return a future that resolves with the parameters of the next event. The future
+        should be created before sending the command that triggers the event. The
+        listener is removed if the future is cancelled, e.g., by a timeout.
+        """
+        key = (session_id, method)
+        future = asyncio.get_running_loop().create_future()
+        self._listeners.setdefault(key, []).append(future)
+
+        def remove_listener(future: asyncio.Future) -> None:
+            listeners = self._listeners.get(key, [])
+            if future in listeners:
+                listeners.remove(future)
+                if len(listeners) == 0:
+                    del self._listeners[key]
+
+        future.add_done_callback(remove_listener)
+        return future
+
+    async def close(self) -> None:
+        await self._websocket.close()
+        await self._reader
+
+
+class CDPCrawler(Crawler):
+    """
+    Crawl problems from a headless Chrome process driven directly through the DevTools
+    protocol, without WebDriver. Pages are crawled concurrently in separate tabs of the
+    same browser, driven by a single coroutine in an asyncio event loop running in a
+    background thread, so the number of workers is the number of concurrent tabs. Since
+    tabs are cheap, all problems are crawled at once unless the number of workers is
+    specified. Waits are event-driven instead of polling.
+
+    Requires the ``websockets`` package.
+    """
+
+    supports_async = True
+
+    def __init__(
+        self,
+        site: str,
+        cookie_path: str,
+        timeout: float = 10.0,
+        block_resources: bool = True,
+        snapshot_dir: Optional[str] = None,
+    ):
+        """
+        :param site: LeetCode site name.
+        :param cookie_path: Path to the cookie to use for signing in.
+        :param timeout: Number of seconds to wait for each page to load.
+        :param block_resources: Whether to block resources that are not needed for
+                                reading problems (see :class:`BrowserPool`).
+        :param snapshot_dir: See :class:`Crawler`.
+        """
+        super().__init__(site, cookie_path, snapshot_dir)
+        _import_websockets()  # fail early if the dependency is missing
+        self.timeout = timeout
+        self.block_resources = block_resources
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._user_data_dir: Optional[str] = None
+        self._connection: Optional[_Connection] = None
+
+    @property
+    def name(self) -> str:
+        return "cdp"
+
+    def default_workers(self, n_problems: int) -> int:
+        return max(n_problems, 1)
+
+    def submit(self, coroutine: Awaitable[T]) -> "Future[T]":
+        with self._lock:
+            if self._loop is None:
+                self._start()
+        assert self._loop is not None
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def _run(self, coroutine: Awaitable[T]) -> T:
+        """Run a coroutine in the event loop of the crawler, and wait for its result."""
+        return self.submit(coroutine).result()
+
+    def _start(self) -> None:
+        self._user_data_dir = tempfile.mkdtemp(prefix="lchelper-cdp-")
+        self._process, port = launch_chrome(self._user_data_dir)
+        log(f"Launched Chrome (pid {self._process.pid}) for the CDP backend")
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/json/version") as f:
+            browser_url = json.load(f)["webSocketDebuggerUrl"]
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        future = asyncio.run_coroutine_threadsafe(
+            self._connect(browser_url), self._loop
+        )
+        future.result()
+
+    async def _connect(self, browser_url: str) -> None:
+        self._connection = await _Connection.connect(browser_url)
+        cookie_jar = http.cookiejar.LWPCookieJar(self.cookie_path)
+        cookie_jar.load(ignore_discard=True, ignore_expires=True)
+        cookies = []
+        for c in cookie_jar:
+            cookie: Dict[str, Any] = {"name": c.name, "value": c.value, "path": c.path}
+            if c.domain:
+                cookie["domain"] = c.domain
+            else:
+                cookie["url"] = f"https://{self.site}.com/"
+            cookies.append(cookie)
+        await self._connection.send("Storage.setCookies", {"cookies": cookies})
+
+    async def _open_page(self, url: str) -> Tuple[str, str]:
+        """
+        Open the URL in a new tab, and return the target and session IDs. The tab is
+        closed if the page fails to load.
+        """
+        assert self._connection is not None
+        conn = self._connection
+        target_id = (await conn.send("Target.createTarget", {"url": "about:blank"}))[
+            "targetId"
+        ]
+        try:
+            session_id = (
+                await conn.send(
+                    "Target.attachToTarget", {"targetId": target_id, "flatten": True}
+                )
+            )["sessionId"]
+            if self.block_resources:
+                await conn.send("Network.enable", session_id=session_id)
+                await conn.send(
+                    "Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS}, session_id
+                )
+            await conn.send("Page.enable", session_id=session_id)
+            loaded = conn.wait_for_event("Page.loadEventFired", session_id)
+            await conn.send("Page.navigate", {"url": url}, session_id)
+            await asyncio.wait_for(loaded, self.timeout)
+        except BaseException:
+            # Callers only close tabs that are opened successfully.
+            with contextlib.suppress(Exception):
+                await self._close_page(target_id)
+            raise
+        return target_id, session_id
+
+    async def _close_page(self, target_id: str) -> None:
+        assert self._connection is not None
+        await self._connection.send("Target.closeTarget", {"targetId": target_id})
+
+    async def _evaluate(self, session_id: str, expression: str) -> Any:
+        assert self._connection is not None
+        result = await self._connection.send(
+            "Runtime.evaluate",
+            {"expression": expression, "awaitPromise": True, "returnByValue": True},
+            session_id,
+        )
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            message = details.get("exception", {}).get("description", details["text"])
+            raise CDPError(f"Script failed: {message}")
+        return result["result"].get("value")
+
+    async def _wait_for(self, session_id: str, selectors: List[str]) -> int:
+        timeout_ms = int(self.timeout * 1000)
+        return await self._evaluate(
+            session_id, f"({WAIT_FUNCTION})({json.dumps(selectors)}, {timeout_ms})"
+        )
+
+    async def _get_problem_list(self, contest_url: str) -> List[ProblemPath]:
+        target_id, session_id = await self._open_page(contest_url)
+        try:
+            if await self._wait_for(session_id, [CONTEST_LIST_SELECTOR]) < 0:
+                raise ValueError(
+                    f"No problems found in contest {contest_url!r}. Cookie"
+                    f" '{self.cookie_path}' might have expired"
+                )
+            links = await self._evaluate(
+                session_id,
+                f"Array.from(document.querySelectorAll({CONTEST_LIST_SELECTOR!r}))"
+                f".map(a => [a.href, a.innerText])",
+            )
+        finally:
+            await self._close_page(target_id)
+        return [(href, text) for href, text in links]
+
+    async def get_problem_async(self, problem_url: str, problem_name: str) -> Problem:
+        target_id, session_id = await self._open_page(problem_url)
+        try:
+            selectors = [layout.statement_selector for layout in PAGE_LAYOUTS]
+            idx = await self._wait_for(session_id, selectors)
+            if idx < 0:
+                raise ValueError(
+                    f"Page {problem_url!r} does not match any known layout"
+                )
+            layout = PAGE_LAYOUTS[idx]
+            # TODO: Should make sure C++ is selected!
+            # The editor might be rendered after the statement.
+            await self._wait_for(session_id, [layout.code_selector])
+            args = [layout.statement_selector, layout.code_selector, EXAMPLE_SELECTOR]
+            result = await self._evaluate(
+                session_id,
+                f"(function() {{ {EXTRACT_SCRIPT} }}).apply(null, {json.dumps(args)})",
+            )
+            if self.snapshot_dir is not None:
+                page = await self._evaluate(
+                    session_id, "document.documentElement.outerHTML"
+                )
+                self._save_snapshot(problem_url, page)
+        finally:
+            await self._close_page(target_id)
+        return Problem(
+            problem_url,
+            problem_name,
+            result["statement"],
+            result["examples"],
+            result["code"],
+        )
+
+    def get_problem_list(self, contest_url: str) -> List[ProblemPath]:
+        log("Loading LeetCode contest page...")
+        return self._run(self._get_problem_list(contest_url))
+
+    def get_problem(self, problem_url: str, problem_name: str) -> Problem:
+        return self._run(self.get_problem_async(problem_url, problem_name))
+
+    def warm_up(self, contest_url: str, workers: int = 1) -> bool:
+        self._run(asyncio.sleep(0))  # launch the browser
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            if self._loop is None:
+                return
+            if self._connection is not None:
+                asyncio.run_coroutine_threadsafe(
+                    self._connection.close(), self._loop
+                ).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            assert self._thread is not None
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+            if self._process is not None:
+                self._process.terminate()
+                self._process.wait()
+            if self._user_data_dir is not None:
+                shutil.rmtree(self._user_data_dir, ignore_errors=True)
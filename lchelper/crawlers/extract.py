@@ -0,0 +1,306 @@
+import html
+import re
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from lchelper.common import Problem
+
+__all__ = [
+    "PageLayout",
+    "PAGE_LAYOUTS",
+    "html_to_text",
+    "find_examples",
+    "parse_html",
+    "normalize_code_line",
+    "extract_problem",
+]
+
+
+class PageLayout(NamedTuple):
+    """CSS selectors for elements in a problem page of a certain layout."""
+
+    name: str
+    statement_selector: str
+    code_selector: str
+
+
+PAGE_LAYOUTS = [
+    # Page during contest; editor located below statement.
+    PageLayout("contest", "div.question-content", "pre.CodeMirror-line"),
+    # Page after contest; statement and editor in vertically split panes.
+    PageLayout(
+        "split-pane",
+        "div[data-key='description-content'] div.content__1Y2H",
+        "div.monaco-scrollable-element div.view-line",
+    ),
+]
+EXAMPLE_SELECTOR = "pre:not([class])"
+
+BLOCK_TAGS = {
+    "address", "blockquote", "br", "dd", "div", "dl", "dt", "h1", "h2", "h3", "h4",
+    "h5", "h6", "hr", "li", "ol", "p", "pre", "table", "tr", "ul",
+}  # fmt: skip
+
+
+class _TextExtractor(HTMLParser):
+    """
+    Convert HTML into text, roughly following how browsers render ``innerText``:
+    whitespace is collapsed except within ``<pre>``, and block elements start on new
+    lines.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.pieces: List[str] = []
+        self.pre_depth = 0
+        # Text within each unclassed `<pre>` element, i.e., the examples.
+        self.examples: List[str] = []
+        self._example: Optional[List[str]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.pieces.append("\n")
+        if tag == "pre":
+            self.pre_depth += 1
+            if self.pre_depth == 1 and not any(k == "class" for k, _ in attrs):
+                self._example = []
+
+    def handle_endtag(self, tag):
+        if tag in BLOCK_TAGS:
+            self.pieces.append("\n")
+        if tag == "pre" and self.pre_depth > 0:
+            self.pre_depth -= 1
+            if self.pre_depth == 0 and self._example is not None:
+                self.examples.append("".join(self._example).strip())
+                self._example = None
+
+    def handle_data(self, data):
+        if self._example is not None:
+            self._example.append(data)
+        if self.pre_depth == 0:
+            data = re.sub(r"\s+", " ", data)
+        self.pieces.append(data)
+
+    def get_text(self) -> str:
+        lines = [line.strip() for line in "".join(self.pieces).split("\n")]
+        text = "\n".join(lines)
+        return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def html_to_text(html: str) -> str:
+    """Convert an HTML fragment into plain text."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.get_text()
+
+
+def find_examples(html: str) -> List[str]:
+    """
+    Find the text of all ``<pre>`` elements without a class attribute in an HTML
+    fragment, which are the example test cases in a problem statement. Empty elements
+    are skipped.
+    """
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return [example for example in parser.examples if example]
+
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr",
+}  # fmt: skip
+
+
+class Element:
+    """A node in the HTML document tree built by :func:`parse_html`."""
+
+    def __init__(
+        self, tag: str, attrs: Dict[str, str], parent: Optional["Element"] = None
+    ):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children: List[Union["Element", str]] = []
+
+    @property
+    def classes(self) -> List[str]:
+        return self.attrs.get("class", "").split()
+
+    def iter(self) -> Iterator["Element"]:
+        """Iterate over all descendant elements, in document order."""
+        for child in self.children:
+            if isinstance(child, Element):
+                yield child
+                yield from child.iter()
+
+    def inner_html(self) -> str:
+        pieces = []
+        for child in self.children:
+            if isinstance(child, str):
+                pieces.append(html.escape(child, quote=False))
+            else:
+                attrs = "".join(
+                    f' {k}="{html.escape(v)}"' for k, v in child.attrs.items()
+                )
+                pieces.append(f"<{child.tag}{attrs}>")
+                if child.tag not in VOID_TAGS:
+                    pieces.append(child.inner_html())
+                    pieces.append(f"</{child.tag}>")
+        return "".join(pieces)
+
+    def text_content(self) -> str:
+        """Concatenation of all text within the element, with whitespace kept."""
+        return "".join(
+            child if isinstance(child, str) else child.text_content()
+            for child in self.children
+        )
+
+    def select(self, selector: str) -> List["Element"]:
+        """
+        Find all descendant elements that match the CSS selector, in document order.
+        Only a subset of CSS is supported: type, class, and attribute selectors
+        (including ``:not([attr])``), combined with descendant combinators.
+        """
+        compounds = [_parse_compound(s) for s in selector.split()]
+        return [elem for elem in self.iter() if _match(elem, compounds)]
+
+    def select_one(self, selector: str) -> Optional["Element"]:
+        return next(iter(self.select(selector)), None)
+
+
+# A compound selector: (tag, classes, attributes, negated attributes), where each
+# attribute is a (name, value) tuple with an optional value.
+_Compound = Tuple[Optional[str], List[str], List[Tuple[str, Optional[str]]], List[str]]
+
+_TOKEN_REGEX = re.compile(
+    r"(?P<not>:not\(\[(?P<not_attr>[\w-]+)\]\))"
+    r"|\[(?P<attr>[\w-]+)(?:=(?P<quote>['\"]?)(?P<value>.*?)(?P=quote))?\]"
+    r"|\.(?P<cls>[\w-]+)"
+    r"|(?P<tag>[\w-]+)"
+)
+
+
+def _parse_compound(selector: str) -> _Compound:
+    tag = None
+    classes, attrs, negated_attrs = [], [], []
+    pos = 0
+    while pos < len(selector):
+        match = _TOKEN_REGEX.match(selector, pos)
+        if match is None:
+            raise ValueError(f"Unsupported selector {selector!r}")
+        if match.group("not"):
+            negated_attrs.append(match.group("not_attr"))
+        elif match.group("attr"):
+            attrs.append((match.group("attr"), match.group("value")))
+        elif match.group("cls"):
+            classes.append(match.group("cls"))
+        else:
+            tag = match.group("tag")
+        pos = match.end()
+    return tag, classes, attrs, negated_attrs
+
+
+def _match_compound(elem: Element, compound: _Compound) -> bool:
+    tag, classes, attrs, negated_attrs = compound
+    if tag is not None and elem.tag != tag:
+        return False
+    if not all(cls in elem.classes for cls in classes):
+        return False
+    for name, value in attrs:
+        if name not in elem.attrs or (value is not None and elem.attrs[name] != value):
+            return False
+    return not any(name in elem.attrs for name in negated_attrs)
+
+
+def _match(elem: Element, compounds: List[_Compound]) -> bool:
+    if not _match_compound(elem, compounds[-1]):
+        return False
+    # Match the remaining selectors against ancestors, from the innermost.
+    idx = len(compounds) - 2
+    ancestor = elem.parent
+    while idx >= 0 and ancestor is not None:
+        if _match_compound(ancestor, compounds[idx]):
+            idx -= 1
+        ancestor = ancestor.parent
+    return idx < 0
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.root = Element("#document", {})
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        elem = Element(tag, {k: v or "" for k, v in attrs}, parent=self.stack[-1])
+        self.stack[-1].children.append(elem)
+        if tag not in VOID_TAGS:
+            self.stack.append(elem)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        # Close all unclosed elements within the matching element. Stray end tags are
+        # ignored.
+        for idx in range(len(self.stack) - 1, 0, -1):
+            if self.stack[idx].tag == tag:
+                del self.stack[idx:]
+                break
+
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+
+def parse_html(page: str) -> Element:
+    """Parse an HTML document into a tree of elements."""
+    builder = _TreeBuilder()
+    builder.feed(page)
+    builder.close()
+    return builder.root
+
+
+def normalize_code_line(line: str) -> str:
+    """
+    Normalize a line of template code, so that code obtained from pages and from APIs
+    compare equal.
+    """
+    # Editors indent code using non-breaking spaces.
+    return line.replace("\u00a0", " ").rstrip()
+
+
+def extract_problem(page: str, problem_url: str, problem_name: str) -> Problem:
+    """
+    Extract the problem description from the HTML source of a problem page, following
+    the same rules as the in-browser extraction of :class:`SeleniumCrawler`.
+
+    :param page: HTML source of the problem page.
+    :param problem_url: URL to the problem page.
+    :param problem_name: Name of the problem.
+    :return: The problem description.
+    """
+    root = parse_html(page)
+    for layout in PAGE_LAYOUTS:
+        statement = root.select_one(layout.statement_selector)
+        if statement is not None:
+            break
+    else:
+        raise ValueError(f"Page of problem {problem_name!r} matches no known layout")
+    examples = [
+        elem.text_content().replace("\u00a0", " ").strip()
+        for elem in root.select(EXAMPLE_SELECTOR)
+    ]
+    return Problem(
+        problem_url,
+        problem_name,
+        html_to_text(statement.inner_html()),
+        [example for example in examples if example],
+        [
+            normalize_code_line(elem.text_content())
+            for elem in root.select(layout.code_selector)
+        ],
+    )
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+import requests
+import requests.adapters
+from requests.structures import CaseInsensitiveDict
+
+__all__ = [
+    "FixtureStore",
+    "RecordingAdapter",
+    "ReplayAdapter",
+]
+
+
+class FixtureStore:
+    """
+    A directory of recorded HTTP responses, one JSON file per request. Requests are
+    identified by their method, URL, and body.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _fixture_path(self, request: requests.PreparedRequest) -> str:
+        body = request.body or b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        key = hashlib.sha1(
+            request.method.encode("utf-8")
+            + b" "
+            + request.url.encode("utf-8")
+            + b"\n"
+            + body
+        ).hexdigest()
+        return os.path.join(self.path, f"{key}.json")
+
+    def save(self, request: requests.PreparedRequest, response: requests.Response):
+        os.makedirs(self.path, exist_ok=True)
+        fixture = {
+            "method": request.method,
+            "url": request.url,
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type"),
+            "text": response.text,
+        }
+        with open(self._fixture_path(request), "w", encoding="utf-8") as f:
+            json.dump(fixture, f, ensure_ascii=False, indent=2)
+
+    def load(self, request: requests.PreparedRequest) -> Optional[Dict[str, Any]]:
+        path = self._fixture_path(request)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+
+class RecordingAdapter(requests.adapters.HTTPAdapter):
+    """A transport adapter that saves every response to a fixture store."""
+
+    def __init__(self, store: FixtureStore, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        self.store.save(request, response)
+        return response
+
+
+class ReplayAdapter(requests.adapters.BaseAdapter):
+    """
+    A transport adapter that serves responses from a fixture store, without touching
+    the network. Requests without fixtures fail with :exc:`ConnectionError`.
+    """
+
+    def __init__(self, store: FixtureStore):
+        super().__init__()
+        self.store = store
+
+    def send(self, request, **kwargs):
+        fixture = self.store.load(request)
+        if fixture is None:
+            raise requests.exceptions.ConnectionError(
+                f"No fixture recorded for {request.method} {request.url}",
+                request=request,
+            )
+        response = requests.Response()
+        response.status_code = fixture["status"]
+        response.headers = CaseInsensitiveDict()
+        if fixture["content_type"] is not None:
+            response.headers["Content-Type"] = fixture["content_type"]
+        response._content = fixture["text"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
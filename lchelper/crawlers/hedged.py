@@ -0,0 +1,211 @@
+import dataclasses
+import os
+import queue
+import threading
+from concurrent.futures import Future, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
+
+from lchelper.common import Problem
+from lchelper.crawlers.base import Crawler, ProblemPath
+from lchelper.logging import log
+from lchelper.parser import parse_problem
+
+__all__ = [
+    "HedgedCrawler",
+]
+
+T = TypeVar("T")
+
+
+def _validate_problem_list(problem_paths: List[ProblemPath]) -> None:
+    if len(problem_paths) == 0:
+        raise ValueError("No problems found")
+
+
+class _DaemonExecutor:
+    """
+    A minimal thread pool running on daemon threads. Unlike ``ThreadPoolExecutor``,
+    whose threads are joined when the interpreter exits, requests that are still
+    running do not keep the process alive.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self._queue: "queue.Queue[Optional[Tuple[Future, Callable[[], Any]]]]" = (
+            queue.Queue()
+        )
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn = item
+            if not future.set_running_or_notify_cancel():
+                continue  # cancelled before it started
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, fn: Callable[[], T]) -> "Future[T]":
+        future: "Future[T]" = Future()
+        with self._lock:
+            self._queue.put((future, fn))
+            if len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._work, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return future
+
+    def shutdown(self) -> None:
+        """Stop the threads once they finish their current task, without waiting."""
+        with self._lock:
+            for _ in self._threads:
+                self._queue.put(None)
+            self._threads = []
+
+
+class HedgedCrawler(Crawler):
+    """
+    Crawl the same contest from both leetcode.com and leetcode-cn.com, which publish the
+    same problems. Each page is requested from both sites concurrently, and the first
+    copy that arrives and parses cleanly is used, so that a site being slow (e.g., at
+    the start of a contest) does not hold up the crawl.
+
+    Once a copy is used, the request to the other site is cancelled if it has not
+    started yet. Requests that are already running cannot be interrupted, but their
+    results are discarded without waiting for them. Requests run on daemon threads, so
+    requests still running when the process exits (e.g., on a site that is much slower)
+    are abandoned instead of delaying the exit.
+    """
+
+    def __init__(
+        self,
+        crawlers: List[Crawler],
+        validate: Optional[Callable[[Problem], Any]] = parse_problem,
+    ):
+        """
+        :param crawlers: Crawlers for each site. The first crawler is the primary one,
+                         whose settings (e.g., whether to fall back to Selenium) are
+                         used for the hedged crawler.
+        :param validate: Function that raises an exception if the copy of a problem
+                         is not usable. Defaults to checking that the problem parses.
+        """
+        if len(set(crawler.site for crawler in crawlers)) < len(crawlers):
+            raise ValueError("Crawlers must be for different sites")
+        primary = crawlers[0]
+        super().__init__(primary.site, primary.cookie_path, primary.snapshot_dir)
+        self.crawlers = crawlers
+        self.validate = validate
+        self.fall_back_to_selenium = primary.fall_back_to_selenium
+        self._executor = _DaemonExecutor()
+        self.n_wins: Dict[str, int] = {crawler.site: 0 for crawler in crawlers}
+
+    @property
+    def name(self) -> str:
+        return f"{self.crawlers[0].name} (hedged)"
+
+    @staticmethod
+    def _mirror_url(url: str, crawler: Crawler) -> str:
+        """Return the URL to the same page on the site of the crawler."""
+        url_parse = urlparse(url)
+        netloc = f"{crawler.site}.com"
+        if url_parse.netloc in ("leetcode.com", "leetcode-cn.com"):
+            url_parse = url_parse._replace(netloc=netloc)
+        return url_parse.geturl()
+
+    def _race(
+        self,
+        what: str,
+        tasks: Dict[Crawler, Callable[[], T]],
+        validate: Optional[Callable[[T], Any]],
+    ) -> T:
+        """
+        Run the tasks concurrently, and return the result of the first one that
+        succeeds and passes validation. If no result passes validation, the first
+        result obtained is returned. If all tasks fail, the error of the primary
+        crawler is raised.
+        """
+        futures: Dict[Future, Crawler] = {
+            self._executor.submit(task): crawler for crawler, task in tasks.items()
+        }
+        errors: Dict[Crawler, Exception] = {}
+        invalid_results: List[T] = []
+        try:
+            for future in as_completed(futures):
+                crawler = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    log(
+                        f"Failed to obtain {what} from {crawler.site}"
+                        f" ({type(e).__name__}: {e})",
+                        level="warning",
+                    )
+                    errors[crawler] = e
+                    continue
+                try:
+                    if validate is not None:
+                        validate(result)
+                except Exception:
+                    invalid_results.append(result)
+                    continue
+                self.n_wins[crawler.site] += 1
+                return result
+        finally:
+            for future in futures:
+                future.cancel()
+        if len(invalid_results) > 0:
+            return invalid_results[0]
+        raise next(errors[crawler] for crawler in self.crawlers if crawler in errors)
+
+    def get_problem_list(self, contest_url: str) -> List[ProblemPath]:
+        problem_paths = self._race(
+            "the problem list",
+            {
+                crawler: (
+                    lambda c=crawler: c.get_problem_list(
+                        self._mirror_url(contest_url, c)
+                    )
+                )
+                for crawler in self.crawlers
+            },
+            _validate_problem_list,
+        )
+        # Problems are identified by their URLs on the primary site.
+        primary = self.crawlers[0]
+        return [(self._mirror_url(url, primary), name) for url, name in problem_paths]
+
+    def get_problem(self, problem_url: str, problem_name: str) -> Problem:
+        problem = self._race(
+            f"problem {problem_name!r}",
+            {
+                crawler: (
+                    lambda c=crawler: c.get_problem(
+                        self._mirror_url(problem_url, c), problem_name
+                    )
+                )
+                for crawler in self.crawlers
+            },
+            self.validate,
+        )
+        # Keep the URL as requested, so the problem could be looked up by the URL.
+        return dataclasses.replace(problem, url=problem_url, name=problem_name)
+
+    def default_workers(self, n_problems: int) -> int:
+        return self.crawlers[0].default_workers(n_problems)
+
+    def warm_up(self, contest_url: str, workers: int = 1) -> bool:
+        results = [
+            crawler.warm_up(self._mirror_url(contest_url, crawler), workers)
+            for crawler in self.crawlers
+        ]
+        return results[0]
+
+    def close(self) -> None:
+        # Requests that are running are abandoned.
+        self._executor.shutdown()
@@ -0,0 +1,215 @@
+import http.cookiejar
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+import requests.adapters
+
+from lchelper.common import Problem
+from lchelper.crawlers.base import Crawler, ProblemPath
+from lchelper.crawlers.extract import (
+    find_examples,
+    html_to_text,
+    normalize_code_line,
+)
+from lchelper.crawlers.fixtures import FixtureStore, RecordingAdapter
+from lchelper.crawlers.snapshot import render_snapshot
+from lchelper.logging import log
+
+__all__ = [
+    "HTTPCrawler",
+]
+
+QUESTION_QUERY = """
+query questionData($titleSlug: String!) {
+  question(titleSlug: $titleSlug) {
+    content
+    translatedContent
+    codeSnippets {
+      langSlug
+      code
+    }
+  }
+}
+"""
+
+USER_STATUS_QUERY = """
+query globalData {
+  userStatus {
+    isSignedIn
+    username
+  }
+}
+"""
+
+
+def _split_url(url: str) -> List[str]:
+    return [s for s in urlparse(url).path.split("/") if s]
+
+
+class HTTPCrawler(Crawler):
+    """
+    Crawl problems using plain HTTP requests against the LeetCode APIs, without
+    launching a browser. Requests are sent from the same keep-alive session, signed in
+    using the stored cookies.
+    """
+
+    def __init__(
+        self,
+        site: str,
+        cookie_path: Optional[str],
+        timeout: float = 10.0,
+        pool_size: int = 10,
+        record_dir: Optional[str] = None,
+        snapshot_dir: Optional[str] = None,
+    ):
+        """
+        :param site: LeetCode site name.
+        :param cookie_path: Path to the cookie to use for signing in.
+        :param timeout: Timeout for each request, in seconds.
+        :param pool_size: Maximum number of connections kept alive.
+        :param record_dir: If specified, all responses are saved as fixtures under
+                           this directory, which can be replayed using
+                           :class:`ReplayCrawler`.
+        :param snapshot_dir: If specified, problem pages are saved under this
+                             directory. Pages are rendered from API responses in the
+                             contest layout.
+        """
+        super().__init__(site, cookie_path, snapshot_dir)
+        self.timeout = timeout
+        self.record_dir = record_dir
+        self.session = requests.Session()
+        adapter = self._create_adapter(pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if cookie_path is not None:
+            cookie_jar = http.cookiejar.LWPCookieJar(cookie_path)
+            cookie_jar.load(ignore_discard=True, ignore_expires=True)
+            self.session.cookies.update(cookie_jar)
+        csrf_token = self.session.cookies.get("csrftoken")
+        if csrf_token is not None:
+            self.session.headers["x-csrftoken"] = csrf_token
+
+    def _create_adapter(self, pool_size: int) -> requests.adapters.BaseAdapter:
+        if self.record_dir is not None:
+            return RecordingAdapter(
+                FixtureStore(self.record_dir),
+                pool_connections=pool_size,
+                pool_maxsize=pool_size,
+            )
+        return requests.adapters.HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+
+    @property
+    def name(self) -> str:
+        return "http"
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _get_json(self, url: str, **kwargs) -> Dict[str, Any]:
+        kwargs.setdefault("timeout", self.timeout)
+        if "json" in kwargs:
+            response = self.session.post(url, **kwargs)
+        else:
+            response = self.session.get(url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def get_contest_info(self, contest_url: str) -> Dict[str, Any]:
+        """
+        Obtain information of the contest, including its start time and (if the contest
+        has started) problems.
+
+        :param contest_url: URL to the contest page.
+        :return: The contest info, in the raw JSON format returned by the API.
+        """
+        url = urlparse(contest_url)
+        contest_name = _split_url(contest_url)[-1]
+        return self._get_json(
+            f"{url.scheme}://{url.netloc}/contest/api/info/{contest_name}/"
+        )
+
+    def get_start_time(self, contest_url: str) -> float:
+        """Return the start time of the contest, as a UNIX timestamp."""
+        return float(self.get_contest_info(contest_url)["contest"]["start_time"])
+
+    def is_signed_in(self, url: str, timeout: Optional[float] = None) -> bool:
+        """
+        Check whether the session is signed in, using a lightweight API request.
+
+        :param url: URL to any page on the site.
+        :param timeout: Timeout for the request, in seconds. Defaults to the timeout
+                        of the crawler.
+        :return: Whether the session is signed in.
+        """
+        url_parse = urlparse(url)
+        data = self._get_json(
+            f"{url_parse.scheme}://{url_parse.netloc}/graphql",
+            json={"operationName": "globalData", "query": USER_STATUS_QUERY},
+            timeout=timeout or self.timeout,
+        )
+        user_status = data["data"]["userStatus"]
+        return user_status is not None and bool(user_status["isSignedIn"])
+
+    def warm_up(self, contest_url: str, workers: int = 1) -> bool:
+        self.get_contest_info(contest_url)  # establish the keep-alive connection
+        return self.is_signed_in(contest_url)
+
+    def get_problem_list(self, contest_url: str) -> List[ProblemPath]:
+        url = urlparse(contest_url)
+        base_url = f"{url.scheme}://{url.netloc}"
+        contest_name = _split_url(contest_url)[-1]
+        log("Loading LeetCode contest info...")
+        info = self.get_contest_info(contest_url)
+        questions = info.get("questions")
+        if not questions:
+            raise ValueError(f"No problems found for contest {contest_name!r}")
+        return [
+            (
+                f"{base_url}/contest/{contest_name}/problems/{q['title_slug']}/",
+                q["title"],
+            )
+            for q in questions
+        ]
+
+    def get_problem(self, problem_url: str, problem_name: str) -> Problem:
+        url = urlparse(problem_url)
+        title_slug = _split_url(problem_url)[-1]
+        data = self._get_json(
+            f"{url.scheme}://{url.netloc}/graphql",
+            json={
+                "operationName": "questionData",
+                "variables": {"titleSlug": title_slug},
+                "query": QUESTION_QUERY,
+            },
+            headers={"Referer": problem_url},
+        )
+        question = data["data"]["question"]
+        if question is None:
+            raise ValueError(f"Problem {problem_name!r} is not accessible")
+        content = question["content"]
+        if self.site == "leetcode-cn" and question.get("translatedContent"):
+            content = question["translatedContent"]
+        if not content:
+            raise ValueError(f"Statement of problem {problem_name!r} is empty")
+        code = next(
+            (
+                snippet["code"]
+                for snippet in question["codeSnippets"] or []
+                if snippet["langSlug"] == "cpp"
+            ),
+            None,
+        )
+        if code is None:
+            raise ValueError(f"No C++ template found for problem {problem_name!r}")
+        code_lines = [normalize_code_line(line) for line in code.split("\n")]
+        self._save_snapshot(problem_url, render_snapshot(content, code_lines))
+        return Problem(
+            problem_url,
+            problem_name,
+            html_to_text(content),
+            find_examples(content),
+            code_lines,
+        )
@@ -0,0 +1,40 @@
+from typing import Optional
+
+import requests.adapters
+
+from lchelper.crawlers.fixtures import FixtureStore, ReplayAdapter
+from lchelper.crawlers.http import HTTPCrawler
+
+__all__ = [
+    "FIXTURE_FOLDER",
+    "ReplayCrawler",
+]
+
+FIXTURE_FOLDER = "fixtures/"
+
+
+class ReplayCrawler(HTTPCrawler):
+    """
+    Crawl problems from pages recorded by :class:`HTTPCrawler` (see its ``record_dir``
+    argument), without touching the network. This allows crawling, parsing, and code
+    generation to be tested and benchmarked offline. Cookies are not required.
+    """
+
+    fall_back_to_selenium = False
+
+    def __init__(
+        self,
+        site: str,
+        cookie_path: Optional[str] = None,
+        fixture_dir: str = FIXTURE_FOLDER,
+        snapshot_dir: Optional[str] = None,
+    ):
+        self.fixture_dir = fixture_dir
+        super().__init__(site, cookie_path, snapshot_dir=snapshot_dir)
+
+    @property
+    def name(self) -> str:
+        return "replay"
+
+    def _create_adapter(self, pool_size: int) -> requests.adapters.BaseAdapter:
+        return ReplayAdapter(FixtureStore(self.fixture_dir))
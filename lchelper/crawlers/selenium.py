@@ -0,0 +1,247 @@
+import http.cookiejar
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as Expected
+from selenium.webdriver.support.wait import WebDriverWait
+
+from lchelper.browser import (
+    BrowserPool,
+    PooledBrowser,
+    get_browser_pool,
+    get_profile_path,
+    has_profile,
+)
+from lchelper.common import Problem
+from lchelper.crawlers.base import Crawler, ProblemPath, SessionExpiredError
+from lchelper.crawlers.extract import EXAMPLE_SELECTOR, PAGE_LAYOUTS, PageLayout
+from lchelper.logging import log
+
+__all__ = [
+    "check_login",
+    "SeleniumCrawler",
+]
+
+
+def check_login(browser, site: str, timeout: int = 10) -> bool:
+    try:
+        if site == "leetcode":
+            WebDriverWait(browser, timeout).until(
+                Expected.presence_of_element_located(
+                    (
+                        By.CSS_SELECTOR,
+                        "#navbar_user_avatar",
+                    )
+                )
+            )
+        else:  # site == "leetcode-cn"
+            WebDriverWait(browser, timeout).until(
+                Expected.presence_of_element_located(
+                    (
+                        By.CSS_SELECTOR,
+                        'nav div[data-cypress="NavbarMenuIconItem"] > span',
+                    )
+                )
+            )
+        return True
+    except TimeoutException:
+        return False
+
+
+# Return the index of the first selector that matches an element in the page, or -1 if
+# none of them match.
+PROBE_SCRIPT = """
+return arguments[0].findIndex(s => document.querySelector(s) !== null);
+"""
+
+# Extract the statement, examples, and code lines of a problem in a single call, instead
+# of a WebDriver round trip for each element. Arguments are the selectors for the
+# statement and code lines in the page layout, and the selector for examples.
+EXTRACT_SCRIPT = """
+const text = elem => elem.innerText.replace(/\\u00a0/g, " ");
+const statement = document.querySelector(arguments[0]);
+return {
+  statement: statement === null ? null : text(statement).trim(),
+  examples: Array.from(document.querySelectorAll(arguments[2]))
+    .map(elem => text(elem).trim())
+    .filter(example => example.length > 0),
+  code: Array.from(document.querySelectorAll(arguments[1]))
+    .map(elem => text(elem).replace(/\\s+$/, "")),
+};
+"""
+
+# Layouts that worked last time, keyed by (site, page kind). Pages of the same kind
+# almost always share the same layout, so the cached layout is checked first.
+_layout_cache: Dict[Tuple[str, str], PageLayout] = {}
+
+
+def _page_kind(url: str) -> str:
+    return "contest" if "/contest/" in urlparse(url).path else "problem"
+
+
+class SeleniumCrawler(Crawler):
+    """Crawl problems by rendering pages in headless Chrome."""
+
+    fall_back_to_selenium = False
+
+    def __init__(
+        self,
+        site: str,
+        cookie_path: str,
+        pool: Optional[BrowserPool] = None,
+        snapshot_dir: Optional[str] = None,
+        use_profile: bool = True,
+    ):
+        """
+        :param site: LeetCode site name.
+        :param cookie_path: Path to the cookie to use for signing in.
+        :param pool: The pool to take browsers from. If not specified, the pool shared
+                     within the current process is used.
+        :param snapshot_dir: See :class:`Crawler`.
+        :param use_profile: If ``True`` and the account has a Chrome profile saved at
+                            login, browsers run on copies of the profile, so they start
+                            signed in instead of loading cookies into each browser.
+                            Browsers are taken from a pool with the same options as
+                            ``pool``.
+        """
+        super().__init__(site, cookie_path, snapshot_dir)
+        pool = pool or get_browser_pool()
+        self.signed_in_profile = False
+        if use_profile and cookie_path is not None and pool.profile is None:
+            profile = get_profile_path(cookie_path)
+            if has_profile(profile):
+                pool = get_browser_pool(
+                    headless=pool.headless,
+                    persistent=pool.persistent,
+                    block_resources=pool.block_resources,
+                    profile=profile,
+                )
+                self.signed_in_profile = True
+        self.pool = pool
+
+    @property
+    def name(self) -> str:
+        return "selenium"
+
+    def _has_cookies(self, browser: PooledBrowser) -> bool:
+        if self.signed_in_profile:
+            return True
+        return browser.cookie_paths.get(self.site) == self.cookie_path
+
+    def _add_cookies(self, browser: PooledBrowser, url: str) -> None:
+        """Visit the page first to update the domain, and then set cookies."""
+        browser.get(url)
+        if self.site in browser.cookie_paths:
+            # Remove cookies of the other account on the same site.
+            browser.delete_all_cookies()
+        cookie_jar = http.cookiejar.LWPCookieJar(self.cookie_path)
+        cookie_jar.load(ignore_discard=True, ignore_expires=True)
+        for c in cookie_jar:
+            browser.add_cookie({"name": c.name, "value": c.value, "path": c.path})
+        browser.cookie_paths[self.site] = self.cookie_path
+
+    def warm_up(self, contest_url: str, workers: int = 1) -> bool:
+        # Hold `workers` browsers at the same time, so that the pool launches as many
+        # browsers as a crawl would use. Cookies are loaded into all of them.
+        browsers = [self.pool.acquire() for _ in range(workers)]
+        try:
+            for browser in browsers:
+                if not self._has_cookies(browser):
+                    self._add_cookies(browser, contest_url)
+            browser = browsers[0]
+            browser.get(contest_url)
+            if not check_login(browser, self.site, timeout=10):
+                browser.cookie_paths.pop(self.site, None)
+                return False
+            return True
+        finally:
+            for browser in browsers:
+                self.pool.release(browser)
+
+    def get_problem_list(self, contest_url: str) -> List[ProblemPath]:
+        with self.pool.browser() as browser:
+            log("Loading LeetCode contest page...")
+            if not self._has_cookies(browser):
+                self._add_cookies(browser, contest_url)
+            browser.get(contest_url)  # visit again to refresh page with cookies added
+
+            if not check_login(browser, self.site, timeout=10):
+                browser.cookie_paths.pop(self.site, None)
+                raise SessionExpiredError(
+                    f"Cookie '{self.cookie_path}' might have expired. Please try"
+                    f" logging in again"
+                )
+
+            elem = WebDriverWait(browser, 10).until(
+                Expected.presence_of_element_located(
+                    (By.CSS_SELECTOR, "ul.contest-question-list")
+                )
+            )
+            links = elem.find_elements(By.TAG_NAME, "a")
+            return [(link.get_attribute("href"), link.text) for link in links]
+
+    def _probe_layout(self, browser: PooledBrowser, problem_url: str) -> PageLayout:
+        """
+        Wait until the problem page is loaded, and find out which layout it uses. All
+        known layouts are checked at once in the page, so there are no timeouts if the
+        page does not use the first layout.
+        """
+        key = (self.site, _page_kind(problem_url))
+        cached = _layout_cache.get(key)
+        layouts = PAGE_LAYOUTS
+        if cached is not None:
+            layouts = [cached] + [layout for layout in layouts if layout != cached]
+        selectors = [layout.statement_selector for layout in layouts]
+
+        def find_layout(driver) -> Union[PageLayout, bool]:
+            idx = driver.execute_script(PROBE_SCRIPT, selectors)
+            return layouts[idx] if idx >= 0 else False
+
+        try:
+            layout = WebDriverWait(browser, 10, poll_frequency=0.1).until(find_layout)
+        except TimeoutException:
+            raise NoSuchElementException(
+                f"Page {problem_url!r} does not match any known layout"
+            )
+        if layout != cached:
+            log(f"Detected page layout {layout.name!r} for {key!r}")
+            _layout_cache[key] = layout
+        return layout
+
+    def get_problem(self, problem_url: str, problem_name: str) -> Problem:
+        with self.pool.browser() as browser:
+            if not self._has_cookies(browser):
+                self._add_cookies(browser, problem_url)
+            browser.get(problem_url)
+            layout = self._probe_layout(browser, problem_url)
+            result: Dict[str, Any] = {}
+
+            def extract(driver) -> Optional[Dict[str, Any]]:
+                nonlocal result
+                result = driver.execute_script(
+                    EXTRACT_SCRIPT,
+                    layout.statement_selector,
+                    layout.code_selector,
+                    EXAMPLE_SELECTOR,
+                )
+                return result if len(result["code"]) > 0 else None
+
+            # TODO: Should make sure C++ is selected!
+            try:
+                # The editor might be rendered after the statement.
+                WebDriverWait(browser, 10, poll_frequency=0.1).until(extract)
+            except TimeoutException:
+                pass  # keep the last result, which has no code
+            if self.snapshot_dir is not None:
+                self._save_snapshot(problem_url, browser.page_source)
+        if result["statement"] is None:
+            raise NoSuchElementException(f"Statement not found in page {problem_url!r}")
+        return Problem(
+            problem_url,
+            problem_name,
+            result["statement"],
+            result["examples"],
+            result["code"],
+        )
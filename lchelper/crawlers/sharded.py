@@ -0,0 +1,188 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+
+from lchelper.common import Problem
+from lchelper.crawlers.base import Crawler, ProblemPath, SessionExpiredError
+from lchelper.crawlers.http import HTTPCrawler
+from lchelper.logging import log
+
+__all__ = [
+    "ShardedCrawler",
+]
+
+# HTTP status codes that LeetCode responds with when requests are throttled.
+THROTTLED_STATUS_CODES = {429, 503}
+
+
+class _Account:
+    def __init__(self, crawler: Crawler):
+        self.crawler = crawler
+        self.in_flight = 0  # number of requests being processed
+        self.expired = False
+        self.throttled_until = 0.0
+
+    def __repr__(self):
+        return repr(self.crawler.cookie_path)
+
+
+class ShardedCrawler(Crawler):
+    """
+    Distribute problems across crawlers signed in with different accounts on the same
+    site, so that throughput scales with the number of accounts. Each problem goes to
+    the account with the fewest requests in flight, taking turns among accounts that
+    are equally busy.
+
+    If an account is throttled, it rests for ``cooldown`` seconds. If the cookies of an
+    account expire, the account is no longer used. In either case, the problem is
+    retried immediately using the other accounts. Throttling is detected from the
+    status codes of HTTP responses, so accounts should use the HTTP backend.
+    """
+
+    def __init__(self, crawlers: List[Crawler], cooldown: float = 60.0):
+        """
+        :param crawlers: Crawlers for each account. All crawlers must be for the same
+                         site, and use the same backend.
+        :param cooldown: Number of seconds that a throttled account rests for.
+        """
+        if len(crawlers) == 0:
+            raise ValueError("At least one crawler is required")
+        if len(set(crawler.site for crawler in crawlers)) > 1:
+            raise ValueError("All crawlers must be for the same site")
+        super().__init__(crawlers[0].site, None, crawlers[0].snapshot_dir)
+        self.cooldown = cooldown
+        self.fall_back_to_selenium = crawlers[0].fall_back_to_selenium
+        self._accounts = [_Account(crawler) for crawler in crawlers]
+        self._lock = threading.Lock()
+        self._turn = 0  # index of the account to prefer among equally busy ones
+        # Used for checking whether cookies have expired, keyed by cookie path.
+        self._probes: Dict[str, HTTPCrawler] = {}
+
+    @property
+    def name(self) -> str:
+        return f"{self._accounts[0].crawler.name} ({len(self._accounts)} accounts)"
+
+    def _acquire(self) -> Optional[_Account]:
+        """
+        Take the available account with the fewest requests in flight, in round-robin
+        order among ties. If all accounts are throttled, wait until one of them
+        recovers.
+
+        :return: The account, or ``None`` if the cookies of all accounts have expired.
+        """
+        while True:
+            with self._lock:
+                candidates = [a for a in self._accounts if not a.expired]
+                if len(candidates) == 0:
+                    return None
+                now = time.time()
+                n_accounts = len(self._accounts)
+                available = [
+                    (idx, a)
+                    for idx, a in enumerate(self._accounts)
+                    if not a.expired and a.throttled_until <= now
+                ]
+                if len(available) > 0:
+                    idx, account = min(
+                        available,
+                        key=lambda x: (
+                            x[1].in_flight,
+                            (x[0] - self._turn) % n_accounts,
+                        ),
+                    )
+                    self._turn = idx + 1
+                    account.in_flight += 1
+                    return account
+                delay = min(a.throttled_until for a in candidates) - now
+            log(f"All accounts are throttled, waiting {delay:.0f}s...", level="warning")
+            time.sleep(delay)
+
+    def _is_signed_in(self, account: _Account, url: str) -> bool:
+        cookie_path = account.crawler.cookie_path
+        if cookie_path is None:
+            return True
+        with self._lock:
+            if cookie_path not in self._probes:
+                self._probes[cookie_path] = HTTPCrawler(self.site, cookie_path)
+            probe = self._probes[cookie_path]
+        try:
+            return probe.is_signed_in(url, timeout=3.0)
+        except Exception:
+            return True  # cannot tell
+
+    def _handle_failure(self, account: _Account, url: str, error: Exception) -> bool:
+        """
+        Find out whether the failure of a request to the URL is caused by the account,
+        and stop using the account if so.
+
+        :return: Whether the failure is caused by the account.
+        """
+        if (
+            isinstance(error, requests.HTTPError)
+            and error.response is not None
+            and error.response.status_code in THROTTLED_STATUS_CODES
+        ):
+            log(
+                f"Account {account!r} is throttled, resting for {self.cooldown:.0f}s",
+                level="warning",
+            )
+            with self._lock:
+                account.throttled_until = time.time() + self.cooldown
+            return True
+        if isinstance(error, SessionExpiredError) or not self._is_signed_in(
+            account, url
+        ):
+            log(
+                f"Cookies of account {account!r} have expired, moving its work to"
+                f" other accounts",
+                level="warning",
+            )
+            with self._lock:
+                account.expired = True
+            return True
+        return False
+
+    def _run(self, method: str, url: str, *args):
+        # Give up if accounts keep failing, e.g., all of them are throttled repeatedly.
+        for _ in range(3 * len(self._accounts)):
+            account = self._acquire()
+            if account is None:
+                raise SessionExpiredError(
+                    "Cookies of all accounts might have expired. Please try logging in"
+                    " again"
+                )
+            try:
+                return getattr(account.crawler, method)(url, *args)
+            except Exception as e:
+                if not self._handle_failure(account, url, e):
+                    raise
+                error = e
+            finally:
+                with self._lock:
+                    account.in_flight -= 1
+        raise error
+
+    def get_problem_list(self, contest_url: str) -> List[ProblemPath]:
+        return self._run("get_problem_list", contest_url)
+
+    def get_problem(self, problem_url: str, problem_name: str) -> Problem:
+        return self._run("get_problem", problem_url, problem_name)
+
+    def default_workers(self, n_problems: int) -> int:
+        # Each account crawls as many pages at once as it would by itself.
+        n_workers = self._accounts[0].crawler.default_workers(n_problems)
+        return min(n_workers * len(self._accounts), max(n_problems, 1))
+
+    def warm_up(self, contest_url: str, workers: int = 1) -> bool:
+        n_workers = -(-workers // len(self._accounts))  # workers for each account
+        for account in self._accounts:
+            if not account.crawler.warm_up(contest_url, n_workers):
+                log(f"Cookies of account {account!r} have expired", level="warning")
+                account.expired = True
+        return not all(account.expired for account in self._accounts)
+
+    def close(self) -> None:
+        for probe in self._probes.values():
+            probe.close()
@@ -0,0 +1,116 @@
+import html
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+from lchelper.common import Problem
+from lchelper.crawlers.extract import PAGE_LAYOUTS, extract_problem
+
+__all__ = [
+    "SNAPSHOT_FOLDER",
+    "get_snapshot_path",
+    "save_snapshot",
+    "load_snapshot",
+    "render_snapshot",
+    "ExtractionFailure",
+    "reextract_problems",
+]
+
+SNAPSHOT_FOLDER = "snapshots/"
+
+
+def get_snapshot_path(problem_url: str, snapshot_dir: str = SNAPSHOT_FOLDER) -> str:
+    """
+    Return the path to the snapshot of a problem page. Snapshots are stored following
+    the structure of URLs, e.g., the snapshot of
+    ``https://leetcode.com/contest/weekly-contest-1/problems/two-sum/`` is stored at
+    ``leetcode.com/contest/weekly-contest-1/problems/two-sum.html``.
+    """
+    url = urlparse(problem_url)
+    segments = [s for s in url.path.split("/") if s]
+    return os.path.join(snapshot_dir, url.netloc.replace(":", "_"), *segments) + ".html"
+
+
+def save_snapshot(
+    problem_url: str, page: str, snapshot_dir: str = SNAPSHOT_FOLDER
+) -> None:
+    path = get_snapshot_path(problem_url, snapshot_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(page)
+
+
+def load_snapshot(
+    problem_url: str, snapshot_dir: str = SNAPSHOT_FOLDER
+) -> Optional[str]:
+    path = get_snapshot_path(problem_url, snapshot_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def render_snapshot(statement_html: str, code: List[str]) -> str:
+    """
+    Render a problem page in the contest layout, for crawlers that obtain problems
+    through APIs instead of pages. The page can be re-extracted in the same way as
+    pages captured from browsers.
+
+    :param statement_html: HTML of the problem statement.
+    :param code: Lines of the template code.
+    """
+    layout = PAGE_LAYOUTS[0]
+    statement_class = layout.statement_selector.split(".")[1]
+    code_class = layout.code_selector.split(".")[1]
+    code_lines = "".join(
+        f'<pre class="{code_class}">{html.escape(line, quote=False)}</pre>\n'
+        for line in code
+    )
+    return (
+        f"<!DOCTYPE html>\n<html><body>\n"
+        f'<div class="{statement_class}">{statement_html}</div>\n'
+        f"{code_lines}</body></html>\n"
+    )
+
+
+class ExtractionFailure(NamedTuple):
+    """Marker for a problem whose snapshot could not be extracted."""
+
+    error: str
+
+
+def _reextract(args: Tuple[Problem, str]) -> Union[Problem, ExtractionFailure, None]:
+    problem, snapshot_dir = args
+    page = load_snapshot(problem.url, snapshot_dir)
+    if page is None:
+        return None
+    try:
+        return extract_problem(page, problem.url, problem.name)
+    except Exception as e:
+        # A page in an unknown layout should not stop other problems from being
+        # extracted.
+        return ExtractionFailure(f"{e.__class__.__name__}: {e}")
+
+
+def reextract_problems(
+    problems: List[Problem],
+    snapshot_dir: str = SNAPSHOT_FOLDER,
+    workers: Optional[int] = None,
+) -> List[Union[Problem, ExtractionFailure, None]]:
+    """
+    Extract problem descriptions again from the stored snapshots of problem pages,
+    without accessing the network. Snapshots are parsed in parallel processes.
+
+    :param problems: The problems to extract again.
+    :param snapshot_dir: The directory where snapshots are stored.
+    :param workers: Number of processes to use. Defaults to the number of CPU cores.
+    :return: The extracted problems, in the same order. Problems without snapshots
+        are returned as ``None``, and problems whose snapshots could not be extracted
+        are returned as :class:`ExtractionFailure`.
+    """
+    tasks = [(problem, snapshot_dir) for problem in problems]
+    if workers == 1:
+        return [_reextract(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_reextract, tasks, chunksize=16))
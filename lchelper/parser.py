@@ -5,9 +5,14 @@ from lchelper.common import *
 from lchelper.logging import log
 
 __all__ = [
+    "PARSER_VERSION",
     "parse_problem",
 ]
 
+# Version of the parser. Bump this whenever a change to the parser changes its output,
+# so that signatures cached by previous versions are parsed again.
+PARSER_VERSION = 1
+
 
 def parse_vardef(s: str) -> Tuple[str, str]:
     """
@@ -1,11 +1,17 @@
+import re
 import sys
-from typing import Optional
+from typing import List, Optional
 
 __all__ = [
     "remove_affix",
+    "expand_contest_range",
+    "parse_size",
+    "format_size",
     "register_excepthook",
 ]
 
+SIZE_UNITS = ["B", "KB", "MB", "GB", "TB"]
+
 
 def remove_affix(
     s: str, prefix: Optional[str] = None, suffix: Optional[str] = None
@@ -17,6 +23,60 @@ def remove_affix(
     return s
 
 
+def expand_contest_range(name: str) -> List[str]:
+    """
+    Expand a range of contests into contest names. Both ends of the range are
+    inclusive. Names that are not ranges are returned as is.
+
+    >>> expand_contest_range("weekly-contest-150..152")
+    ['weekly-contest-150', 'weekly-contest-151', 'weekly-contest-152']
+    >>> expand_contest_range("biweekly-contest-1..biweekly-contest-2")
+    ['biweekly-contest-1', 'biweekly-contest-2']
+    """
+    match = re.fullmatch(r"(.*?)(\d+)\.\.(?:\1)?(\d+)", name)
+    if match is None:
+        return [name]
+    prefix, start, end = match.group(1), int(match.group(2)), int(match.group(3))
+    if start > end:
+        raise ValueError(f"Invalid contest range {name!r}")
+    return [f"{prefix}{idx}" for idx in range(start, end + 1)]
+
+
+def parse_size(size: str) -> int:
+    """
+    Parse a human-readable size into the number of bytes. Units are powers of 1024.
+
+    >>> parse_size("512")
+    512
+    >>> parse_size("1.5MB")
+    1572864
+    >>> parse_size("2g")
+    2147483648
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d*)?)\s*([kmgt]?)b?\s*", size, re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"Invalid size {size!r}")
+    exponent = "bkmgt".index(match.group(2).lower() or "b")
+    return int(float(match.group(1)) * 1024**exponent)
+
+
+def format_size(size: int) -> str:
+    """
+    Format the number of bytes into a human-readable size.
+
+    >>> format_size(512)
+    '512 B'
+    >>> format_size(1572864)
+    '1.5 MB'
+    """
+    exponent = 0
+    while size >= 1024 ** (exponent + 1) and exponent + 1 < len(SIZE_UNITS):
+        exponent += 1
+    if exponent == 0:
+        return f"{size} B"
+    return f"{size / 1024 ** exponent:.1f} {SIZE_UNITS[exponent]}"
+
+
 def register_excepthook():
     def excepthook(type, value, traceback):
         if type is KeyboardInterrupt:
@@ -1,16 +1,39 @@
 import argparse
+import atexit
 import dataclasses
 import os
-import pickle
 import sys
-from typing import Any, Dict, List, NoReturn, Optional
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, NoReturn, Optional, Tuple
 from urllib.parse import urlparse
 
 import lchelper
 import lchelper.utils
 
 PROGRAM = "python main.py"
-CACHE_FILE = "contest_problems.pkl"
+
+
+def positive_int(value: str) -> int:
+    """Argument type for integers that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+def non_negative_float(value: str) -> float:
+    """Argument type for numbers that must not be negative."""
+    try:
+        number = float(value)
+    except ValueError:
+        number = -1.0
+    if not number >= 0:  # also rejects NaN
+        raise argparse.ArgumentTypeError(f"must be a non-negative number, got {value}")
+    return number
 
 
 def parse_args():
@@ -37,10 +60,9 @@ def parse_args():
         help="The LeetCode site for the account",
     )
 
-    parser_get = subparsers.add_parser(
-        "get", help="Download contest problems and generate testing code"
-    )
-    parser_get.add_argument(
+    # Arguments shared by commands that crawl problems.
+    parser_session = argparse.ArgumentParser(add_help=False)
+    parser_session.add_argument(
         "-u",
         "--username",
         dest="username",
@@ -50,7 +72,97 @@ def parse_args():
             " accounts"
         ),
     )
-    parser_get.add_argument(
+    parser_session.add_argument(
+        "-j",
+        "--workers",
+        dest="workers",
+        type=int,
+        default=None,
+        help=(
+            "Number of problem pages to crawl concurrently, using a browser for each"
+            " page with Selenium, or a tab for each page with CDP. Defaults to 1, or"
+            " to all problems at once with CDP"
+        ),
+    )
+    parser_session.add_argument(
+        "--retries",
+        dest="retries",
+        type=int,
+        default=2,
+        help="Number of times to retry crawling a problem if it fails",
+    )
+    parser_session.add_argument(
+        "--rate-limit",
+        dest="rate_limit",
+        type=non_negative_float,
+        default=None,
+        help=(
+            "Maximum number of pages to load per second. Requests are slowed down"
+            " automatically if LeetCode responds slowly or with errors. Defaults to"
+            f" {lchelper.RATE_LIMITS['leetcode'].rate:g} for leetcode.com and"
+            f" {lchelper.RATE_LIMITS['leetcode-cn'].rate:g} for leetcode-cn.com. Set"
+            " to 0 to disable rate limiting"
+        ),
+    )
+    parser_session.add_argument(
+        "-b",
+        "--backend",
+        dest="backend",
+        choices=list(lchelper.CRAWLERS.keys()),
+        default="selenium",
+        help=(
+            "The backend for crawling problems, supported backends are: [%(choices)s]."
+            " Other backends fall back to Selenium on failure"
+        ),
+    )
+    parser_session.add_argument(
+        "--record",
+        dest="record",
+        metavar="DIR",
+        default=None,
+        help=(
+            "Save pages crawled by the HTTP backend as fixtures under this directory,"
+            " which can be replayed with `-b replay`"
+        ),
+    )
+    parser_session.add_argument(
+        "--fixtures",
+        dest="fixtures",
+        metavar="DIR",
+        default=lchelper.FIXTURE_FOLDER,
+        help="The directory of fixtures to serve pages from, used by `-b replay`",
+    )
+    parser_session.add_argument(
+        "--no-snapshots",
+        action="store_true",
+        default=False,
+        help=(
+            "Do not save the source of problem pages, which is used by `reextract` to"
+            " extract problems again offline"
+        ),
+    )
+    parser_session.add_argument(
+        "--load-all-resources",
+        action="store_true",
+        default=False,
+        help=(
+            "Load images, fonts, stylesheets, and analytics scripts in the headless"
+            " browser, which are blocked by default to speed up crawling"
+        ),
+    )
+    parser_session.add_argument(
+        "--keep-browser",
+        action="store_true",
+        default=False,
+        help=(
+            "Keep the headless browser running after the program exits, so that later"
+            " runs can reuse it. Run `stop-browsers` to shut it down"
+        ),
+    )
+
+    # Arguments shared by commands that crawl problems and generate code.
+    parser_crawl = argparse.ArgumentParser(add_help=False, parents=[parser_session])
+    parser_crawl.add_argument(
         "-l",
         "--lang",
         metavar="LANG",
@@ -63,20 +175,14 @@ def parse_args():
             " [%(choices)s]"
         ),
     )
-    parser_get.add_argument(
-        "--no-cache",
-        action="store_true",
-        default=False,
-        help="Do not use cached problem descriptions when generating code",
-    )
-    parser_get.add_argument(
+    parser_crawl.add_argument(
         "-o",
         "--output",
         dest="output",
         default="./",
         help="The path to store generated projects",
     )
-    parser_get.add_argument(
+    parser_crawl.add_argument(
         "-p",
         "--prefix",
         dest="prefix",
@@ -84,17 +190,559 @@ def parse_args():
         help="Prefix for project folders, if not specified, the contest name (e.g. "
         '"weekly-contest-162") if used',
     )
-    parser_get.add_argument(
+    parser_crawl.add_argument(
         "url",
         help='URL to the contest page, or the contest name (e.g. "weekly-contest-162")',
     )
 
+    parser_crawl.add_argument(
+        "--hedge",
+        action="store_true",
+        default=False,
+        help=(
+            "Crawl the contest from both leetcode.com and leetcode-cn.com, using"
+            " whichever copy of each problem arrives first. Requires logging in on both"
+            " sites"
+        ),
+    )
+
+    # Arguments for commands that support crawling with multiple accounts.
+    parser_accounts = argparse.ArgumentParser(add_help=False)
+    parser_accounts.add_argument(
+        "--all-accounts",
+        action="store_true",
+        default=False,
+        help=(
+            "Distribute problems across all logged in accounts on the site, each with"
+            " its own session. Accounts that are throttled or have expired cookies are"
+            " skipped. Requires the HTTP backend"
+        ),
+    )
+
+    parser_get = subparsers.add_parser(
+        "get",
+        parents=[parser_crawl, parser_accounts],
+        help="Download contest problems and generate testing code",
+    )
+    parser_get.add_argument(
+        "--no-cache",
+        action="store_true",
+        default=False,
+        help="Do not use cached problem descriptions when generating code",
+    )
+    parser_get.add_argument(
+        "--only",
+        dest="only",
+        default=None,
+        help=(
+            "Only download and regenerate code for these problems, given as a"
+            ' comma-separated list of letters (e.g. "C,D"), problem slugs, or URLs.'
+            " Other problems are taken from the cache, and their files are left"
+            " untouched. Specifying a problem URL as the contest URL has the same"
+            " effect"
+        ),
+    )
+
+    parser_schedule = subparsers.add_parser(
+        "schedule",
+        parents=[parser_crawl],
+        help=(
+            "Wait for a contest to start, and download problems and generate testing"
+            " code as soon as it starts"
+        ),
+    )
+    parser_schedule.add_argument(
+        "--start-time",
+        dest="start_time",
+        type=datetime.fromisoformat,
+        default=None,
+        help=(
+            'Local start time of the contest (e.g. "2020-04-05 10:30"). If not'
+            " specified, the start time is obtained from LeetCode"
+        ),
+    )
+    parser_schedule.add_argument(
+        "--poll-interval",
+        dest="poll_interval",
+        type=float,
+        default=0.5,
+        help="Seconds to wait between attempts to load problems when contest starts",
+    )
+
+    parser_batch = subparsers.add_parser(
+        "batch",
+        parents=[parser_session, parser_accounts],
+        help=(
+            "Download problems of multiple contests into the cache, without generating"
+            " code"
+        ),
+    )
+    parser_batch.add_argument(
+        "--no-cache",
+        action="store_true",
+        default=False,
+        help="Download contests again even if they are cached",
+    )
+    parser_batch.add_argument(
+        "contests",
+        nargs="+",
+        metavar="contest",
+        help=(
+            "URLs to contest pages, contest names, or ranges of contests (e.g."
+            ' "weekly-contest-150..183")'
+        ),
+    )
+
+    parser_reextract = subparsers.add_parser(
+        "reextract",
+        help=(
+            "Extract cached problems again from saved page sources, e.g., after fixing"
+            " a bug in extraction, without accessing LeetCode"
+        ),
+    )
+    parser_reextract.add_argument(
+        "-j",
+        "--workers",
+        dest="workers",
+        type=positive_int,
+        default=None,
+        help="Number of processes to extract problems with, defaults to all cores",
+    )
+    parser_reextract.add_argument(
+        "contests",
+        nargs="*",
+        metavar="contest",
+        help=(
+            "URLs to contest pages, contest names, or ranges of contests to extract"
+            " again. If not specified, all cached contests are extracted again"
+        ),
+    )
+
+    parser_cache = subparsers.add_parser(
+        "cache",
+        help=(
+            "Show statistics of the problem cache, and pin or evict contests. Without"
+            " options, cache hit rates and the sizes of cached contests are shown"
+        ),
+    )
+    parser_cache_action = parser_cache.add_mutually_exclusive_group()
+    parser_cache_action.add_argument(
+        "--pin",
+        action="store_true",
+        default=False,
+        help="Pin the contests, so that they are never evicted from the cache",
+    )
+    parser_cache_action.add_argument(
+        "--unpin",
+        action="store_true",
+        default=False,
+        help="Unpin the contests, so that they can be evicted from the cache",
+    )
+    parser_cache_action.add_argument(
+        "--evict",
+        action="store_true",
+        default=False,
+        help=(
+            "Remove the contests from the cache. If no contests are specified, evict"
+            " the least recently used entries until the cache fits within its size"
+            " limit"
+        ),
+    )
+    parser_cache_action.add_argument(
+        "--max-size",
+        dest="max_size",
+        default=None,
+        help=(
+            'Set the size limit of the cache (e.g. "500MB"), or "unlimited".'
+            " Entries are evicted when the limit is exceeded"
+        ),
+    )
+    parser_cache.add_argument(
+        "contests",
+        nargs="*",
+        metavar="contest",
+        help="URLs to contest pages, contest names, or ranges of contests",
+    )
+
+    subparsers.add_parser(
+        "stop-browsers", help="Shut down browsers kept alive by `get --keep-browser`"
+    )
+
     args = parser.parse_args()
+    if getattr(args, "record", None) is not None and args.backend != "http":
+        parser.error("recording pages (--record) requires the HTTP backend (-b http)")
+    if args.command == "cache":
+        if (args.pin or args.unpin) and len(args.contests) == 0:
+            parser.error("contests to pin or unpin must be specified")
+        if args.max_size is not None and args.max_size != "unlimited":
+            try:
+                lchelper.utils.parse_size(args.max_size)
+            except ValueError as e:
+                parser.error(str(e))
     if not args.command:
         parser.print_help(sys.stderr)
     return args
 
 
+def parse_contest(url: str) -> Tuple[str, Optional[str]]:
+    """
+    Return the contest name and site (if specified) given the URL or name, or exit
+    with an error message if the URL is to a problem outside contests.
+    """
+    url_parse = urlparse(url)
+    if url_parse.netloc != "":  # URL instead of name
+        segments = [s for s in url_parse.path.split("/") if s]
+        if "contest" in segments[:-1]:
+            # URL to a page in the contest, e.g. a problem
+            contest_name = segments[segments.index("contest") + 1]
+        elif "problems" in segments[:-1]:
+            # URL to a problem outside contests, which does not tell the contest
+            print(
+                f"{url!r} is not the URL to a contest. Please use the URL to the"
+                f" problem on the contest page (e.g."
+                f' "https://leetcode.com/contest/weekly-contest-162/problems/two-sum/"),'
+                f" or specify the contest and select problems with `--only`."
+            )
+            exit(1)
+        else:
+            contest_name = segments[-1]  # use the final URL segment as contest name
+        site: Optional[str] = lchelper.utils.remove_affix(
+            url_parse.netloc, "www.", ".com"
+        )
+    else:
+        contest_name = url
+        site = None
+    return contest_name, site
+
+
+def parse_problem_specs(args) -> List[str]:
+    """
+    Return the problems specified by `--only` and the contest URL, as letters or
+    problem slugs.
+    """
+    specs = []
+    for spec in [args.url] + (args.only.split(",") if args.only else []):
+        spec = spec.strip()
+        segments = [s for s in urlparse(spec).path.split("/") if s]
+        if "problems" in segments[:-1]:  # URL to a problem
+            specs.append(segments[segments.index("problems") + 1])
+        elif spec != args.url and spec != "":
+            specs.append(spec)
+    return specs
+
+
+def get_problem_slug(problem: lchelper.Problem) -> str:
+    return problem.url.rstrip("/").split("/")[-1]
+
+
+def select_problems(problems: List[lchelper.Problem], specs: List[str]) -> List[int]:
+    """
+    Return the indices of problems given their letters or slugs, or exit with an error
+    message if a problem is not found.
+    """
+    slugs = [get_problem_slug(problem) for problem in problems]
+    indices = []
+    for spec in specs:
+        if len(spec) == 1 and spec.isalpha():
+            idx = ord(spec.upper()) - ord("A")
+        else:
+            idx = slugs.index(spec) if spec in slugs else len(problems)
+        if idx >= len(problems):
+            available = [
+                f"{chr(ord('A') + i)} ({slug})" for i, slug in enumerate(slugs)
+            ]
+            print(
+                f"Problem {spec!r} is not found in the contest. Available problems"
+                f" are: {', '.join(available)}."
+            )
+            exit(1)
+        indices.append(idx)
+    return sorted(set(indices))
+
+
+def parse_contest_keys(specs: List[str]) -> List[Tuple[Optional[str], str]]:
+    """
+    Return the keys of contests in the cache, i.e. (site, name), given a list of
+    contest URLs, names, or ranges.
+    """
+    keys: List[Tuple[Optional[str], str]] = []
+    for spec in specs:
+        contest_name, site = parse_contest(spec)
+        try:
+            names = lchelper.utils.expand_contest_range(contest_name)
+        except ValueError as e:
+            print(e)
+            exit(1)
+        keys.extend((site, name) for name in names)
+    return list(dict.fromkeys(keys))  # remove duplicates but keep the order
+
+
+def select_cached_contests(
+    cache: lchelper.ProblemCache, specs: List[str]
+) -> List[Tuple[Optional[str], str]]:
+    """
+    Return the keys of cached contests that match a list of contest URLs, names, or
+    ranges. Contests specified by name match cached contests from any site.
+    """
+    selected = parse_contest_keys(specs)
+    return [
+        key
+        for key in cache.contests()
+        if any(
+            name == key[1] and (site is None or site == key[0])
+            for site, name in selected
+        )
+    ]
+
+
+def select_user(username: Optional[str], site: Optional[str]) -> lchelper.User:
+    """Select the user to crawl with, or exit with an error message if impossible."""
+    available_users = lchelper.get_users()
+    if len(available_users) == 0:
+        print(f"You're not logged in. Please run `{PROGRAM} login <username>` first.")
+        exit(1)
+
+    candidates = user_candidates = available_users
+    if username is not None:
+        candidates = user_candidates = [
+            user for user in candidates if user.username == username
+        ]
+    if site is not None:
+        candidates = [user for user in candidates if user.site == site]
+    # If there exist multiple candidates with different usernames, raise an
+    # error to avoid ambiguity.
+    if len(set(user.username for user in candidates)) > 1:
+        print(
+            f"You have logged in with multiple accounts:"
+            f" {', '.join(repr(s) for s in candidates)}.\n"
+            f"Please select the user using the `-u <username>` flag."
+        )
+        exit(1)
+    if len(candidates) == 0:
+        if username is not None:
+            if len(user_candidates) > 0:
+                print(
+                    f"The specified user {username!r} is not from the site"
+                    f" {site!r}.\n"
+                    f"Please log in with a user from {site!r} by running "
+                    f"`{PROGRAM} login -s {site} <username>`."
+                )
+            else:
+                print(
+                    f"The specified user {username!r} is not logged in.\n"
+                    f"Please log in by running `{PROGRAM} login {username}` first."
+                )
+        else:
+            print(
+                f"There are no users from the site {site!r}.\n"
+                f"Please log in with a user from {site!r} by running"
+                f" `{PROGRAM} login -s {site} <username>`."
+            )
+        exit(1)
+
+    return candidates[0]
+
+
+def get_browser_pool(args) -> lchelper.BrowserPool:
+    return lchelper.get_browser_pool(
+        persistent=args.keep_browser,
+        block_resources=False if args.load_all_resources else None,
+    )
+
+
+def get_crawler(
+    args, site: str, cookie_path: Optional[str], pool: lchelper.BrowserPool
+) -> lchelper.Crawler:
+    """Return the crawler for the backend specified in command line arguments."""
+    snapshot_dir = None if args.no_snapshots else lchelper.SNAPSHOT_FOLDER
+    if args.backend == "replay":
+        return lchelper.get_crawler(
+            "replay",
+            site,
+            cookie_path,
+            fixture_dir=args.fixtures,
+            snapshot_dir=snapshot_dir,
+        )
+    if args.record is not None:
+        return lchelper.get_crawler(
+            "http",
+            site,
+            cookie_path,
+            record_dir=args.record,
+            snapshot_dir=snapshot_dir,
+        )
+    if args.backend == "cdp":
+        return lchelper.get_crawler(
+            "cdp",
+            site,
+            cookie_path,
+            block_resources=not args.load_all_resources,
+            snapshot_dir=snapshot_dir,
+        )
+    return lchelper.get_crawler(
+        args.backend, site, cookie_path, pool=pool, snapshot_dir=snapshot_dir
+    )
+
+
+def open_cache() -> lchelper.ProblemCache:
+    """Open the problem cache, or exit with an error message if it is unsupported."""
+    try:
+        return lchelper.ProblemCache()
+    except lchelper.CacheVersionError as e:
+        print(e)
+        exit(1)
+
+
+def get_rate_limiter(args, site: str) -> Optional[lchelper.RateLimiter]:
+    """Return the rate limiter for the site, or `None` if rate limiting is disabled."""
+    if args.backend == "replay" or args.rate_limit == 0:
+        return None
+    if args.rate_limit is not None:
+        lchelper.RATE_LIMITS[site] = dataclasses.replace(
+            lchelper.RATE_LIMITS[site], rate=args.rate_limit
+        )
+    return lchelper.get_rate_limiter(site)
+
+
+def get_sharded_crawler(
+    args, site: str, cookie_paths: List[Optional[str]], pool: lchelper.BrowserPool
+) -> lchelper.Crawler:
+    """Return a crawler that distributes work across the accounts."""
+    crawlers = [get_crawler(args, site, path, pool) for path in cookie_paths]
+    if len(crawlers) == 1:
+        return crawlers[0]
+    return lchelper.ShardedCrawler(crawlers)
+
+
+def get_hedged_crawler(
+    args, site: str, crawler: lchelper.Crawler, pool: lchelper.BrowserPool
+) -> lchelper.Crawler:
+    """
+    Return a crawler that also crawls from the other site if `--hedge` is specified and
+    the user has logged in on the other site.
+    """
+    if not args.hedge or args.backend == "replay":
+        return crawler
+    other_site = "leetcode-cn" if site == "leetcode" else "leetcode"
+    users = [user for user in lchelper.get_users() if user.site == other_site]
+    # Prefer the account with the same username.
+    users.sort(key=lambda user: user.username != args.username)
+    if len(users) == 0:
+        lchelper.log(
+            f"No users from the site {other_site!r}, crawling from {site!r} only",
+            level="warning",
+        )
+        return crawler
+    cookie_path = lchelper.get_cookie_path(users[0].username, other_site)
+    if not lchelper.check_session(other_site, cookie_path):
+        lchelper.log(
+            f"Cookie '{cookie_path}' might have expired, crawling from {site!r} only",
+            level="warning",
+        )
+        return crawler
+    lchelper.log(f"Hedging with user: {users[0]}")
+    other_crawler = get_crawler(args, other_site, cookie_path, pool)
+    hedged_crawler = lchelper.HedgedCrawler([crawler, other_crawler])
+    atexit.register(hedged_crawler.close)
+    return hedged_crawler
+
+
+def select_session(args, site: Optional[str]) -> Tuple[str, List[Optional[str]]]:
+    """
+    Return the site to crawl from, and the cookies to sign in with. Cookies of all
+    valid accounts on the site are returned if `--all-accounts` is specified.
+    """
+    if args.backend == "replay":
+        # Replayed pages do not require signing in.
+        return site or "leetcode", [None]
+    if not getattr(args, "all_accounts", False):
+        user = select_user(args.username, site)
+        lchelper.log(f"User: {user}")
+        cookie_path = lchelper.get_cookie_path(user.username, user.site)
+        check_session(user.site, cookie_path)
+        return user.site, [cookie_path]
+
+    if args.backend != "http" and args.record is None:
+        # Throttled accounts are only detected from the status codes of HTTP responses.
+        print("Crawling with all accounts requires the HTTP backend (`-b http`).")
+        exit(1)
+    users = [user for user in lchelper.get_users() if site is None or user.site == site]
+    if len(users) == 0:
+        print(f"You're not logged in. Please run `{PROGRAM} login <username>` first.")
+        exit(1)
+    sites = set(user.site for user in users)
+    if len(sites) > 1:
+        print(
+            "You have logged in with accounts from multiple sites.\n"
+            "Please select the site by specifying the URL to the contest page."
+        )
+        exit(1)
+    site = sites.pop()
+    cookie_paths: List[Optional[str]] = []
+    for user in users:
+        cookie_path = lchelper.get_cookie_path(user.username, user.site)
+        if lchelper.check_session(user.site, cookie_path):
+            cookie_paths.append(cookie_path)
+            lchelper.log(f"User: {user}")
+        else:
+            lchelper.log(f"Cookies of user {user} have expired", level="warning")
+    if len(cookie_paths) == 0:
+        print("Cookies of all accounts might have expired. Please try logging in again")
+        exit(1)
+    return site, cookie_paths
+
+
+def check_session(site: str, cookie_path: str) -> None:
+    """Exit with an error message if the cookies have expired."""
+    if not lchelper.check_session(site, cookie_path):
+        print(f"Cookie '{cookie_path}' might have expired. Please try logging in again")
+        exit(1)
+
+
+def get_project_paths(args, contest_name: str) -> Dict[str, str]:
+    return {
+        lang: os.path.join(args.output, f"{(args.prefix or contest_name)}_{lang}")
+        for lang in args.lang
+    }
+
+
+def merge_problems(
+    problems: List[lchelper.Problem],
+    indices: List[int],
+    new_problems: Iterable[lchelper.Problem],
+) -> Iterator[lchelper.Problem]:
+    """Replace problems at the indices with new ones, which are taken in order."""
+    new_problems = iter(new_problems)
+    for idx, problem in enumerate(problems):
+        yield next(new_problems) if idx in indices else problem
+
+
+def generate_projects(
+    args,
+    contest_name: str,
+    site: Optional[str],
+    problems: Iterable[lchelper.Problem],
+    cache: lchelper.ProblemCache,
+    only: Optional[List[int]] = None,
+) -> List[lchelper.Problem]:
+    # Code is generated for each problem as soon as it is crawled.
+    project_paths = get_project_paths(args, contest_name)
+    problems = lchelper.create_projects(
+        [(lchelper.create_codegen(lang), path) for lang, path in project_paths.items()],
+        problems,
+        site,
+        debug=args.debug,
+        only=only,
+        cache=cache,
+    )
+    for lang, project_path in project_paths.items():
+        lchelper.log(
+            f"Project in language {lang!r} stored at: {project_path}",
+            level="success",
+        )
+    return problems
+
+
 def main():
     args = parse_args()
     if args.debug:
@@ -105,102 +753,328 @@ def main():
         lchelper.update_cookie(args.username, args.site)
         print(f"Cookies for user '{args.username}' saved.")
 
+    elif args.command == "stop-browsers":
+        count = lchelper.stop_persistent_browsers()
+        print(f"Stopped {count} browser(s).")
+
     elif args.command == "get":
-        if os.path.exists(CACHE_FILE):
-            with open(CACHE_FILE, "rb") as f:
-                info = pickle.load(f)
-        else:
-            info = {}
-
-        url_parse = urlparse(args.url)
-        if url_parse.netloc != "":  # URL instead of name
-            contest_name = args.url.rstrip("/").split("/")[
-                -1
-            ]  # use the final URL segment as contest nme
-            site: Optional[str] = lchelper.utils.remove_affix(
-                url_parse.netloc, "www.", ".com"
+        cache = open_cache()
+        contest_name, site = parse_contest(args.url)
+        specs = parse_problem_specs(args)
+
+        cached_problems: Optional[List[lchelper.Problem]] = None
+        # Problems other than those to download are always taken from the cache.
+        if not args.no_cache or len(specs) > 0:
+            cached_problems = cache.get(site, contest_name)
+        only: Optional[List[int]] = None
+        if len(specs) > 0:
+            if cached_problems is None:
+                lchelper.log(
+                    "Contest is not in the cache, downloading all problems",
+                    level="warning",
+                )
+            else:
+                only = select_problems(cached_problems, specs)
+
+        checkpoint: Optional[lchelper.Checkpoint] = None
+        if cached_problems is None or only is not None:
+            crawl_site, cookie_paths = select_session(args, site)
+            url = f"https://{crawl_site}.com/contest/{contest_name}"
+            lchelper.log(f"URL: {url}")
+
+            pool = get_browser_pool(args)
+            crawler = get_hedged_crawler(
+                args,
+                crawl_site,
+                get_sharded_crawler(args, crawl_site, cookie_paths, pool),
+                pool,
             )
+            kwargs = dict(
+                workers=args.workers,
+                pool=pool,
+                backend=crawler,
+                retries=args.retries,
+                limiter=get_rate_limiter(args, crawl_site),
+            )
+            problems: Iterable[lchelper.Problem]
+            if only is None:
+                # Problems crawled in previous failed attempts are loaded from the
+                # checkpoint instead of crawled again.
+                checkpoint = lchelper.get_checkpoint(crawl_site, contest_name)
+                if args.no_cache:
+                    checkpoint.remove()  # download all problems again
+                elif len(checkpoint) > 0:
+                    lchelper.log(
+                        f"Resuming from checkpoint with {len(checkpoint)} problems"
+                    )
+                problems = lchelper.get_problems_iter(
+                    url, crawl_site, cookie_paths[0], checkpoint=checkpoint, **kwargs
+                )
+            else:
+                assert cached_problems is not None
+                # Cached problems might be crawled from the other site.
+                problem_paths = [
+                    (
+                        f"{url}/problems/{get_problem_slug(cached_problems[idx])}/",
+                        cached_problems[idx].name,
+                    )
+                    for idx in only
+                ]
+                crawled_problems = lchelper.get_problems_iter(
+                    url,
+                    crawl_site,
+                    cookie_paths[0],
+                    problem_paths=problem_paths,
+                    **kwargs,
+                )
+                problems = merge_problems(cached_problems, only, crawled_problems)
         else:
-            contest_name = args.url
-            site = None
+            assert cached_problems is not None
+            problems = cached_problems
+
+        problems = generate_projects(args, contest_name, site, problems, cache, only)
+        if cached_problems is None or only is not None:
+            cache.put(site, contest_name, problems)
+        if checkpoint is not None:
+            checkpoint.remove()
+
+    elif args.command == "batch":
+        keys = parse_contest_keys(args.contests)
+        sites = set(site for site, _ in keys if site is not None)
+        if len(sites) > 1:
+            print(
+                f"Contests are from multiple sites: {', '.join(sorted(sites))}.\n"
+                f"Please download contests from different sites separately."
+            )
+            exit(1)
+        site = next(iter(sites), None)
 
-        cached_problems: Optional[List[Dict[str, Any]]] = None
+        cache = open_cache()
         if not args.no_cache:
-            if (site, contest_name) in info:
-                cached_problems = info[site, contest_name]
+            n_contests = len(keys)
+            keys = [key for key in keys if key not in cache]
+            if len(keys) < n_contests:
+                lchelper.log(f"Skipping {n_contests - len(keys)} cached contest(s)")
+        if len(keys) == 0:
+            lchelper.log("All contests are cached", level="success")
+            return
+
+        crawl_site, cookie_paths = select_session(args, site)
+        urls = {
+            f"https://{crawl_site}.com/contest/{name}": (key_site, name)
+            for key_site, name in keys
+        }
+        if args.no_cache:
+            # Download all problems again instead of resuming from checkpoints.
+            for _, name in keys:
+                lchelper.get_checkpoint(crawl_site, name).remove()
+        pool = get_browser_pool(args)
+        n_saved = 0
+        for url, problems in lchelper.crawl_contests(
+            urls.keys(),
+            crawl_site,
+            cookie_paths[0],
+            workers=args.workers,
+            pool=pool,
+            backend=get_sharded_crawler(args, crawl_site, cookie_paths, pool),
+            retries=args.retries,
+            use_checkpoints=True,
+            limiter=get_rate_limiter(args, crawl_site),
+        ):
+            # Save after each contest, so that completed contests are kept even if the
+            # batch is interrupted.
+            cache.put(*urls[url], problems)
+            n_saved += 1
+        lchelper.log(
+            f"Problems of {n_saved} contest(s) are saved to {cache.path}",
+            level="success",
+        )
+
+    elif args.command == "reextract":
+        cache = open_cache()
+        keys = cache.contests()
+        if len(args.contests) > 0:
+            keys = select_cached_contests(cache, args.contests)
+        contests = {key: cache.get(*key, touch=False) or [] for key in keys}
+        problems = [
+            (key, idx, problem)
+            for key in keys
+            for idx, problem in enumerate(contests[key])
+        ]
+        start_time = time.time()
+        new_problems = lchelper.reextract_problems(
+            [problem for _, _, problem in problems], workers=args.workers
+        )
+        n_changed = n_missing = 0
+        changed_keys = set()
+        failures = []
+        for (key, idx, problem), new_problem in zip(problems, new_problems):
+            if new_problem is None:
+                n_missing += 1
+            elif isinstance(new_problem, lchelper.ExtractionFailure):
+                failures.append((key, problem, new_problem.error))
+            elif new_problem != problem:
+                n_changed += 1
+                contests[key][idx] = new_problem
+                changed_keys.add(key)
+        for key in changed_keys:
+            cache.put(*key, contests[key])
+        n_extracted = len(problems) - n_missing - len(failures)
+        lchelper.log(
+            f"Extracted {n_extracted} problem(s) from {len(keys)}"
+            f" contest(s) in {time.time() - start_time:.2f}s, {n_changed} changed",
+            level="success",
+        )
+        if len(failures) > 0:
+            lchelper.log(
+                f"{len(failures)} problem(s) are kept as is, since their page sources"
+                f" could not be extracted:",
+                level="error",
+            )
+            for (site, contest), problem, error in failures:
+                print(f"  {contest} ({site or 'unknown site'}) {problem.name}: {error}")
+        if n_missing > 0:
+            lchelper.log(
+                f"{n_missing} problem(s) are kept as is, since their page sources are"
+                f" not saved",
+                level="warning",
+            )
 
-        if cached_problems is None:
-            available_users = lchelper.get_users()
-            if len(available_users) == 0:
+    elif args.command == "cache":
+        cache = open_cache()
+        format_size = lchelper.utils.format_size
+        keys = select_cached_contests(cache, args.contests)
+        if len(args.contests) > 0 and len(keys) == 0:
+            print("None of the contests are in the cache.")
+            exit(1)
+
+        if args.pin or args.unpin:
+            for key in keys:
+                cache.pin(*key, pinned=args.pin)
+            action = "Pinned" if args.pin else "Unpinned"
+            lchelper.log(f"{action} {len(keys)} contest(s)", level="success")
+        elif args.evict:
+            if len(args.contests) > 0:
+                for key in keys:
+                    cache.remove(*key)
+                n_evicted = len(keys)
+            else:
+                n_evicted = cache.evict()
+            lchelper.log(f"Evicted {n_evicted} entries", level="success")
+        elif args.max_size is not None:
+            if args.max_size == "unlimited":
+                cache.max_size = None
+            else:
+                cache.max_size = lchelper.utils.parse_size(args.max_size)
+            lchelper.log(f"Cache size limit set to {args.max_size}", level="success")
+        else:
+            max_size = cache.max_size
+            limit = format_size(max_size) if max_size is not None else "unlimited"
+            print(f"Cache: {cache.path} ({format_size(cache.size())} / {limit})")
+            stats = cache.stats()
+            for kind, (count, size) in cache.sizes().items():
+                hits, misses = stats.get(kind, (0, 0))
+                hit_rate = f"{hits / (hits + misses):.1%}" if hits + misses > 0 else "-"
                 print(
-                    f"You're not logged in. Please run `{PROGRAM} login <username>`"
-                    f" first."
+                    f"  {kind}: {count} entries, {format_size(size)},"
+                    f" {hits} hits, {misses} misses, hit rate {hit_rate}"
                 )
-                exit(1)
-
-            candidates = user_candidates = available_users
-            if args.username is not None:
-                candidates = user_candidates = [
-                    user for user in candidates if user.username == args.username
-                ]
-            if site is not None:
-                candidates = [user for user in candidates if user.site == site]
-            # If there exist multiple candidates with different usernames, raise an
-            # error to avoid ambiguity.
-            if len(set(user.username for user in candidates)) > 1:
+            infos = cache.contest_info()
+            if len(args.contests) > 0:
+                infos = [info for info in infos if (info.site, info.contest) in keys]
+            for info in infos:
+                accessed = datetime.fromtimestamp(info.accessed)
                 print(
-                    f"You have logged in with multiple accounts:"
-                    f" {', '.join(repr(s) for s in candidates)}.\n"
-                    f"Please select the user using the `-u <username>` flag."
+                    f"{info.contest} ({info.site or 'unknown site'}):"
+                    f" {info.n_problems} problems, {format_size(info.size)}, last used"
+                    f" {accessed:%Y-%m-%d %H:%M}{', pinned' if info.pinned else ''}"
                 )
-                exit(1)
-            if len(candidates) == 0:
-                if args.username is not None:
-                    if len(user_candidates) > 0:
-                        print(
-                            f"The specified user {args.username!r} is not from the site"
-                            f" {site!r}.\n"
-                            f"Please log in with a user from {site!r} by running "
-                            f"`{PROGRAM} login -s {site} <username>`."
-                        )
-                    else:
-                        print(
-                            f"The specified user {args.username!r} is not logged in.\n"
-                            f"Please log in by running"
-                            f" `{PROGRAM} login {args.username}` first."
-                        )
-                else:
-                    print(
-                        f"There are no users from the site {site!r}.\n"
-                        f"Please log in with a user from {site!r} by running"
-                        f" `{PROGRAM} login -s {site} <username>`."
-                    )
-                exit(1)
 
-            user = candidates[0]
-            cookie_path = lchelper.get_cookie_path(user.username, user.site)
-            url = f"https://{user.site}.com/contest/{contest_name}"
-            lchelper.log(f"User: {user}, URL: {url}")
+    elif args.command == "schedule":
+        contest_name, site = parse_contest(args.url)
+        user = select_user(args.username, site)
+        cookie_path = lchelper.get_cookie_path(user.username, user.site)
+        url = f"https://{user.site}.com/contest/{contest_name}"
+        lchelper.log(f"User: {user}, URL: {url}")
+        check_session(user.site, cookie_path)
 
-            problems = lchelper.get_problems(url, user.site, cookie_path)
+        # The HTTP crawler is used to find out the start time, and to poll for the
+        # problem list when the contest starts, both of which are cheap requests.
+        http_crawler = lchelper.get_crawler("http", user.site, cookie_path)
+        if args.start_time is not None:
+            start_time = args.start_time.timestamp()
+        else:
+            start_time = http_crawler.get_start_time(url)
+        lchelper.log(
+            f"Contest starts at {datetime.fromtimestamp(start_time):%Y-%m-%d %H:%M:%S}"
+        )
 
-            info[site, contest_name] = [dataclasses.asdict(p) for p in problems]
-            with open(CACHE_FILE, "wb") as f:
-                pickle.dump(info, f)
+        for project_path in get_project_paths(args, contest_name).values():
+            os.makedirs(project_path, exist_ok=True)
+        pool = get_browser_pool(args)
+        primary_crawler = get_crawler(args, user.site, cookie_path, pool)
+        crawler = get_hedged_crawler(args, user.site, primary_crawler, pool)
+        if primary_crawler.name == "selenium":
+            # Selenium validates cookies in the browser while warming up.
+            ready = crawler.warm_up(url, args.workers or 1)
         else:
-            problems = [lchelper.Problem(**p) for p in cached_problems]
+            # Validate cookies in the browser, which also warms up Selenium in case the
+            # crawler falls back to it. This is the same crawler that is used for
+            # falling back in `get_problems_iter`.
+            selenium_crawler = lchelper.get_crawler(
+                "selenium",
+                user.site,
+                cookie_path,
+                pool=pool,
+                snapshot_dir=crawler.snapshot_dir,
+            )
+            ready = selenium_crawler.warm_up(url)
+            if ready:
+                crawler.warm_up(url, args.workers or 1)
+        if not ready:
+            print(
+                f"Cookie '{cookie_path}' might have expired. Please try logging in again"
+            )
+            exit(1)
+        lchelper.log("Crawler is ready", level="success")
 
-        for lang in args.lang:
-            codegen = lchelper.create_codegen(lang)
-            project_path = os.path.join(
-                args.output, f"{(args.prefix or contest_name)}_{lang}"
+        checkpoint = lchelper.get_checkpoint(user.site, contest_name)
+        delay = start_time - time.time()
+        if delay > 0:
+            lchelper.log(f"Waiting {delay:.0f} seconds for the contest to start...")
+            time.sleep(delay)
+        problem_paths: Optional[List[Tuple[str, str]]] = None
+        try:
+            problem_paths = lchelper.wait_for_problem_list(
+                http_crawler, url, interval=args.poll_interval
             )
-            codegen.create_project(project_path, problems, site, debug=args.debug)
+        except Exception as e:
             lchelper.log(
-                f"Project in language {lang!r} stored at: {project_path}",
-                level="success",
+                f"Failed to obtain the problem list ({type(e).__name__}: {e})",
+                level="warning",
             )
+        problems = lchelper.get_problems_iter(
+            url,
+            user.site,
+            cookie_path,
+            workers=args.workers,
+            pool=pool,
+            backend=crawler,
+            problem_paths=problem_paths,
+            retries=args.retries,
+            checkpoint=checkpoint,
+            limiter=get_rate_limiter(args, user.site),
+        )
+        cache = open_cache()
+        problems = generate_projects(args, contest_name, site, problems, cache)
+
+        cache.put(site, contest_name, problems)
+        checkpoint.remove()
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    except lchelper.SessionExpiredError as e:
+        print(e)
+        exit(1)
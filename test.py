@@ -1,7 +1,25 @@
+import asyncio
+import dataclasses
+import http.cookiejar
+import http.server
+import json
+import multiprocessing
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
 import unittest
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
+from unittest import mock
+
+import requests
 
 import lchelper.codegen
+import lchelper.crawlers
+import lchelper.crawlers.extract
+import main
 from lchelper.common import (
     Example,
     FunctionSignature,
@@ -10,6 +28,7 @@ from lchelper.common import (
     Problem,
     ProblemSignature,
 )
+from lchelper.crawler import SESSION_COOKIE
 
 
 class EndToEndTest(unittest.TestCase):
@@ -53,6 +72,1097 @@ class EndToEndTest(unittest.TestCase):
             self._test_problem_set(url, ignore_problems=ignore_problems)
 
 
+class FakeLeetCodeServer:
+    r"""
+    A local stand-in for the LeetCode APIs used by :class:`lchelper.HTTPCrawler`,
+    serving a single contest with two problems.
+    """
+
+    CONTEST = "weekly-contest-1"
+    START_TIME = 1586053800
+    SESSION = "signed-in"  # value of the session cookie that is signed in
+    QUESTIONS = {
+        "shift-2d-grid": {
+            "title": "Shift 2D Grid",
+            "content": (
+                "<p>Given a 2D <code>grid</code>, shift the grid <code>k</code>"
+                " times.</p>\n"
+                "<p><strong>Example 1:</strong></p>\n"
+                "<pre><strong>Input:</strong> grid = [[1,2,3],[4,5,6],[7,8,9]], k = 1\n"
+                "<strong>Output:</strong> [[9,1,2],[3,4,5],[6,7,8]]\n</pre>\n"
+                "<pre class='code'>not an example</pre>\n"
+                "<pre></pre>"
+            ),
+            "code": (
+                "class Solution {\n"
+                "public:\n"
+                "    vector<vector<int>> shiftGrid(vector<vector<int>>& grid, int k) {\n"
+                "        \n"
+                "    }\n"
+                "};"
+            ),
+        },
+        "greatest-sum-divisible-by-three": {
+            "title": "Greatest Sum Divisible by Three",
+            "content": (
+                "<p>Find the maximum sum divisible by three.</p>"
+                "<pre><strong>Input:</strong> nums = [3,6,5,1,8]\n"
+                "<strong>Output:</strong> 18\n"
+                "<strong>Explanation:</strong> Pick 3, 6, 1 and 8.</pre>"
+            ),
+            "code": (
+                "class Solution {\n"
+                "public:\n"
+                "    int maxSumDivThree(vector<int>& nums) {\n"
+                "        \n"
+                "    }\n"
+                "};"
+            ),
+        },
+    }
+
+    def __init__(self, hidden_requests: int = 0):
+        """
+        :param hidden_requests: Number of requests to contest info before problems are
+                                shown, to simulate a contest that is about to start.
+        """
+        questions = self.QUESTIONS
+        contest = self.CONTEST
+        start_time = self.START_TIME
+        session = self.SESSION
+        n_hidden = [hidden_requests]
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, obj, status: int = 200):
+                body = json.dumps(obj).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path != f"/contest/api/info/{contest}/":
+                    return self._send_json({"error": "not found"}, status=404)
+                visible = n_hidden[0] <= 0
+                n_hidden[0] -= 1
+                self._send_json(
+                    {
+                        "contest": {"title_slug": contest, "start_time": start_time},
+                        "questions": [
+                            {"title": q["title"], "title_slug": slug}
+                            for slug, q in questions.items()
+                            if visible
+                        ],
+                    }
+                )
+
+            def do_POST(self):
+                length = int(self.headers["Content-Length"])
+                request = json.loads(self.rfile.read(length))
+                if request.get("operationName") == "globalData":
+                    signed_in = f"{SESSION_COOKIE}={session}" in (
+                        self.headers["Cookie"] or ""
+                    )
+                    return self._send_json(
+                        {"data": {"userStatus": {"isSignedIn": signed_in}}}
+                    )
+                question = questions.get(request["variables"]["titleSlug"])
+                if self.path != "/graphql" or question is None:
+                    return self._send_json({"data": {"question": None}})
+                self._send_json(
+                    {
+                        "data": {
+                            "question": {
+                                "content": question["content"],
+                                "translatedContent": None,
+                                "codeSnippets": [
+                                    {"langSlug": "python3", "code": "class Solution:"},
+                                    {"langSlug": "cpp", "code": question["code"]},
+                                ],
+                            }
+                        }
+                    }
+                )
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def contest_url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/contest/{self.CONTEST}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class HTTPCrawlerTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cookie_path = os.path.join(self.temp_dir.name, "user@leetcode.dat")
+        with open(self.cookie_path, "w") as f:
+            f.write("#LWP-Cookies-2.0\n")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_problems(self):
+        with FakeLeetCodeServer() as server:
+            problems = lchelper.get_problems(
+                server.contest_url,
+                "leetcode",
+                self.cookie_path,
+                workers=2,
+                backend="http",
+            )
+        assert [p.name for p in problems] == [
+            "Shift 2D Grid",
+            "Greatest Sum Divisible by Three",
+        ]
+        assert problems[0].url == (f"{server.contest_url}/problems/shift-2d-grid/")
+        assert problems[0].statement.startswith(
+            "Given a 2D grid, shift the grid k times.\n\nExample 1:"
+        )
+        assert problems[0].examples == [
+            "Input: grid = [[1,2,3],[4,5,6],[7,8,9]], k = 1\n"
+            "Output: [[9,1,2],[3,4,5],[6,7,8]]"
+        ]
+        assert problems[1].code[2] == "    int maxSumDivThree(vector<int>& nums) {"
+        for problem in problems:
+            signature = lchelper.parse_problem(problem)
+            assert len(signature.examples) == 1
+
+    def test_wait_for_problem_list(self):
+        with FakeLeetCodeServer(hidden_requests=3) as server:
+            crawler = lchelper.crawlers.HTTPCrawler("leetcode", self.cookie_path)
+            assert crawler.get_start_time(server.contest_url) == server.START_TIME
+            problem_paths = lchelper.wait_for_problem_list(
+                crawler, server.contest_url, interval=0.01
+            )
+            assert len(problem_paths) == 2
+
+            server_2 = FakeLeetCodeServer(hidden_requests=100)
+            with server_2, self.assertRaises(ValueError):
+                lchelper.wait_for_problem_list(
+                    crawler, server_2.contest_url, interval=0.01, timeout=0.1
+                )
+
+    def test_stream_to_projects(self):
+        projects = [
+            (codegen_klass(), os.path.join(self.temp_dir.name, lang))
+            for lang, codegen_klass in lchelper.LANGUAGES.items()
+        ]
+        with FakeLeetCodeServer() as server:
+            problems = lchelper.get_problems_iter(
+                server.contest_url, "leetcode", self.cookie_path, backend="http"
+            )
+            problems = lchelper.create_projects(projects, problems, "leetcode")
+        assert len(problems) == 2
+        for codegen, project_path in projects:
+            for idx, problem in enumerate(problems):
+                file_name = codegen.get_problem_file_name(idx, problem)
+                assert os.path.exists(os.path.join(project_path, file_name))
+
+    def test_regenerate_subset(self):
+        codegen = lchelper.LANGUAGES["python"]()
+        project_path = os.path.join(self.temp_dir.name, "python")
+        with FakeLeetCodeServer() as server:
+            problems = lchelper.get_problems(
+                server.contest_url, "leetcode", self.cookie_path, backend="http"
+            )
+            lchelper.create_projects([(codegen, project_path)], problems, "leetcode")
+            paths = [
+                os.path.join(project_path, codegen.get_problem_file_name(idx, p))
+                for idx, p in enumerate(problems)
+            ]
+            for path in paths:
+                with open(path, "w") as f:
+                    f.write("solution")
+
+        # Only files of the specified problems are written.
+        lchelper.create_projects(
+            [(codegen, project_path)], problems, "leetcode", only=[1]
+        )
+        with open(paths[0]) as f:
+            assert f.read() == "solution"
+        with open(paths[1]) as f:
+            assert f.read() != "solution"
+
+
+class SessionTest(unittest.TestCase):
+    def _write_cookie(self, path: str, value: str, expires: int) -> None:
+        cookie_jar = http.cookiejar.LWPCookieJar()
+        cookie_jar.set_cookie(
+            http.cookiejar.Cookie(
+                version=0,
+                name=SESSION_COOKIE,
+                value=value,
+                port=None,
+                port_specified=False,
+                domain="127.0.0.1",
+                domain_specified=False,
+                domain_initial_dot=False,
+                path="/",
+                path_specified=True,
+                secure=False,
+                expires=expires,
+                discard=False,
+                comment=None,
+                comment_url=None,
+                rest={},
+            )
+        )
+        cookie_jar.save(path, ignore_discard=True, ignore_expires=True)
+
+    def test_check_session(self):
+        expires = int(time.time()) + 3600
+        with tempfile.TemporaryDirectory() as temp_dir:
+            valid_cookie_path = os.path.join(temp_dir, "valid@leetcode.dat")
+            self._write_cookie(valid_cookie_path, FakeLeetCodeServer.SESSION, expires)
+            # Cookies without expiry dates are saved with an expiry of 0.
+            no_expiry_cookie_path = os.path.join(temp_dir, "no-expiry@leetcode.dat")
+            self._write_cookie(no_expiry_cookie_path, FakeLeetCodeServer.SESSION, 0)
+            signed_out_cookie_path = os.path.join(temp_dir, "signed-out@leetcode.dat")
+            self._write_cookie(signed_out_cookie_path, "signed-out", expires)
+            expired_cookie_path = os.path.join(temp_dir, "expired@leetcode.dat")
+            self._write_cookie(
+                expired_cookie_path, FakeLeetCodeServer.SESSION, int(time.time()) - 1
+            )
+
+            with FakeLeetCodeServer() as server:
+                url = server.contest_url
+                assert lchelper.check_session("leetcode", valid_cookie_path, url)
+                assert lchelper.check_session("leetcode", no_expiry_cookie_path, url)
+                assert not lchelper.check_session(
+                    "leetcode", signed_out_cookie_path, url
+                )
+                assert not lchelper.check_session("leetcode", expired_cookie_path, url)
+
+            # Cookies are assumed to be valid if they cannot be verified.
+            assert lchelper.check_session("leetcode", valid_cookie_path, url)
+
+
+class FlakyCrawler(lchelper.Crawler):
+    """A crawler that fails a number of times on each problem before succeeding."""
+
+    fall_back_to_selenium = False
+
+    def __init__(self, n_problems: int, failures: Dict[str, int]):
+        super().__init__("leetcode", None)
+        self.problem_paths = [
+            (f"https://leetcode.com/problems/{idx}/", f"Problem {idx}")
+            for idx in range(n_problems)
+        ]
+        self.failures = failures
+        self.crawled: List[str] = []
+
+    @property
+    def name(self) -> str:
+        return "flaky"
+
+    def get_problem_list(self, contest_url: str) -> List[Tuple[str, str]]:
+        return self.problem_paths
+
+    def get_problem(self, problem_url: str, problem_name: str) -> Problem:
+        self.crawled.append(problem_name)
+        if self.failures.get(problem_name, 0) > 0:
+            self.failures[problem_name] -= 1
+            raise TimeoutError(f"Timed out loading {problem_name}")
+        return Problem(problem_url, problem_name, "statement", [], ["code"])
+
+
+class CheckpointTest(unittest.TestCase):
+    def test_retry(self):
+        crawler = FlakyCrawler(3, {"Problem 1": 2})
+        problems = lchelper.get_problems_iter(
+            "", "leetcode", None, backend=crawler, retries=2, backoff=0
+        )
+        assert [p.name for p in problems] == ["Problem 0", "Problem 1", "Problem 2"]
+        assert crawler.crawled == ["Problem 0"] + ["Problem 1"] * 3 + ["Problem 2"]
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            checkpoint_path = os.path.join(temp_dir, "contest.json")
+            crawler = FlakyCrawler(3, {"Problem 1": 100})
+            with self.assertRaises(TimeoutError):
+                list(
+                    lchelper.get_problems_iter(
+                        "",
+                        "leetcode",
+                        None,
+                        backend=crawler,
+                        retries=1,
+                        backoff=0,
+                        checkpoint=lchelper.Checkpoint(checkpoint_path),
+                    )
+                )
+            assert len(lchelper.Checkpoint(checkpoint_path)) == 1
+
+            # Only problems that are not in the checkpoint are crawled.
+            crawler = FlakyCrawler(3, {})
+            checkpoint = lchelper.Checkpoint(checkpoint_path)
+            problems = lchelper.get_problems_iter(
+                "", "leetcode", None, backend=crawler, checkpoint=checkpoint
+            )
+            assert [p.name for p in problems] == ["Problem 0", "Problem 1", "Problem 2"]
+            assert crawler.crawled == ["Problem 1", "Problem 2"]
+            assert len(lchelper.Checkpoint(checkpoint_path)) == 3
+
+            checkpoint.remove()
+            assert not os.path.exists(checkpoint_path)
+
+
+class AsyncCrawler(FlakyCrawler):
+    """A crawler that crawls problems with coroutines in its own event loop."""
+
+    supports_async = True
+
+    def __init__(self, n_problems: int, failures: Dict[str, int]):
+        super().__init__(n_problems, failures)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.running = 0
+        self.max_running = 0
+        self.threads = set()
+
+    async def get_problem_async(self, problem_url: str, problem_name: str) -> Problem:
+        self.threads.add(threading.get_ident())
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(0.05)
+            return self.get_problem(problem_url, problem_name)
+        finally:
+            self.running -= 1
+
+    def submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def close(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+class ThrottledCrawler(FlakyCrawler):
+    """A crawler whose account is always throttled."""
+
+    def get_problem(self, problem_url: str, problem_name: str) -> Problem:
+        self.crawled.append(problem_name)
+        response = requests.Response()
+        response.status_code = 429
+        raise requests.HTTPError("Too many requests", response=response)
+
+
+class ExpiredCrawler(FlakyCrawler):
+    """A crawler whose cookies have expired."""
+
+    def get_problem(self, problem_url: str, problem_name: str) -> Problem:
+        self.crawled.append(problem_name)
+        raise lchelper.SessionExpiredError("Cookies have expired")
+
+
+class AsyncCrawlerTest(unittest.TestCase):
+    def test_gather(self):
+        with AsyncCrawler(8, {"Problem 3": 1}) as crawler:
+            problems = lchelper.get_problems_iter(
+                "", "leetcode", None, 3, backend=crawler, backoff=0
+            )
+            assert [p.name for p in problems] == [f"Problem {idx}" for idx in range(8)]
+            # All problems are crawled by coroutines in one thread, at most three of
+            # them at once.
+            assert crawler.threads == {crawler.thread.ident}
+            assert crawler.max_running == 3
+
+    def test_failure(self):
+        with AsyncCrawler(4, {"Problem 1": 5}) as crawler:
+            problems = lchelper.get_problems_iter(
+                "", "leetcode", None, backend=crawler, retries=1, backoff=0
+            )
+            assert next(problems).name == "Problem 0"
+            with self.assertRaises(TimeoutError):
+                next(problems)
+
+
+class ShardedCrawlerTest(unittest.TestCase):
+    def test_throttled_account(self):
+        throttled = ThrottledCrawler(4, {})
+        healthy = FlakyCrawler(4, {})
+        crawler = lchelper.ShardedCrawler([throttled, healthy], cooldown=60)
+        problems = lchelper.get_problems_iter(
+            "", "leetcode", None, backend=crawler, workers=1, retries=0
+        )
+        assert [p.name for p in problems] == [f"Problem {idx}" for idx in range(4)]
+        # The throttled account rests after its first failure, and its work is moved
+        # to the other account.
+        assert len(throttled.crawled) == 1
+        assert len(healthy.crawled) == 4
+
+    def test_expired_account(self):
+        expired = ExpiredCrawler(4, {})
+        healthy = FlakyCrawler(4, {})
+        crawler = lchelper.ShardedCrawler([expired, healthy])
+        problems = lchelper.get_problems_iter(
+            "", "leetcode", None, backend=crawler, workers=1, retries=0
+        )
+        assert [p.name for p in problems] == [f"Problem {idx}" for idx in range(4)]
+        # The expired account is no longer used after its first failure.
+        assert len(expired.crawled) == 1
+        assert crawler._accounts[0].expired
+
+    def test_spread_across_accounts(self):
+        for workers in [1, None, 4]:
+            accounts = [FlakyCrawler(6, {}) for _ in range(3)]
+            crawler = lchelper.ShardedCrawler(accounts)
+            problems = lchelper.get_problems_iter(
+                "", "leetcode", None, backend=crawler, workers=workers
+            )
+            assert len(list(problems)) == 6
+            # Every account gets a share of the problems.
+            assert all(len(account.crawled) > 0 for account in accounts)
+            if workers == 1:
+                assert [len(account.crawled) for account in accounts] == [2, 2, 2]
+
+    def test_no_accounts_available(self):
+        crawler = lchelper.ShardedCrawler([FlakyCrawler(1, {}), FlakyCrawler(1, {})])
+        for account in crawler._accounts:
+            account.expired = True
+        with self.assertRaises(lchelper.SessionExpiredError):
+            crawler.get_problem("https://leetcode.com/problems/0/", "Problem 0")
+
+
+class DelayedCrawler(FlakyCrawler):
+    """A crawler that takes some time to respond."""
+
+    def __init__(self, site: str, delay: float, statement: str = "statement"):
+        super().__init__(2, {})
+        self.site = site
+        self.delay = delay
+        self.statement = statement
+        self.problem_paths = [
+            (f"https://{site}.com/contest/c/problems/{idx}/", name)
+            for idx, name in enumerate(["A", "B"])
+        ]
+
+    def get_problem_list(self, contest_url: str) -> List[Tuple[str, str]]:
+        time.sleep(self.delay)
+        return self.problem_paths
+
+    def get_problem(self, problem_url: str, problem_name: str) -> Problem:
+        assert problem_url.startswith(f"https://{self.site}.com/")
+        time.sleep(self.delay)
+        return Problem(problem_url, problem_name, self.statement, [], ["code"])
+
+
+class HedgedCrawlerTest(unittest.TestCase):
+    def _validate(self, problem: Problem) -> None:
+        if problem.statement == "garbage":
+            raise ValueError("Problem does not parse")
+
+    def test_faster_site(self):
+        primary = DelayedCrawler("leetcode", 1.0)
+        crawler = lchelper.HedgedCrawler(
+            [primary, DelayedCrawler("leetcode-cn", 0.0)], validate=self._validate
+        )
+        start_time = time.time()
+        problem_paths = crawler.get_problem_list("https://leetcode.com/contest/c/")
+        assert problem_paths == primary.problem_paths
+        problem = crawler.get_problem(*problem_paths[0])
+        assert time.time() - start_time < 1.0
+        assert problem.url == primary.problem_paths[0][0]
+        assert crawler.n_wins == {"leetcode": 0, "leetcode-cn": 2}
+        crawler.close()
+
+    def test_invalid_copy(self):
+        crawler = lchelper.HedgedCrawler(
+            [
+                DelayedCrawler("leetcode", 0.0, "garbage"),
+                DelayedCrawler("leetcode-cn", 0.2),
+            ],
+            validate=self._validate,
+        )
+        problem = crawler.get_problem("https://leetcode.com/contest/c/problems/0/", "A")
+        assert problem.statement == "statement"
+
+        # If no copy is valid, the first one is used.
+        crawler = lchelper.HedgedCrawler(
+            [
+                DelayedCrawler("leetcode", 0.0, "garbage"),
+                DelayedCrawler("leetcode-cn", 0.2, "garbage"),
+            ],
+            validate=self._validate,
+        )
+        problem = crawler.get_problem("https://leetcode.com/contest/c/problems/0/", "A")
+        assert problem.statement == "garbage"
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_aimd(self):
+        limit = lchelper.RateLimit(rate=1000.0, burst=4, max_concurrency=8)
+        limiter = lchelper.RateLimiter("leetcode", limit)
+        assert limiter.window == 4
+        with limiter.request(timed=False):
+            pass
+        assert limiter.latency is None
+        with limiter.request():
+            pass
+        assert limiter.window == 6  # slow start
+
+        # Failures of requests in flight halve the window only once.
+        start_times = [limiter.acquire() for _ in range(3)]
+        for start_time in start_times:
+            limiter.release(start_time, ok=False)
+        assert limiter.window == 3
+        assert limiter.rate == 500.0
+
+        with limiter.request():
+            pass
+        assert limiter.window == 3 + 1 / 3  # additive increase
+        assert limiter.rate == 600.0
+
+    def test_rate(self):
+        limiter = lchelper.RateLimiter(
+            "leetcode", lchelper.RateLimit(rate=20.0, burst=1, max_concurrency=1)
+        )
+        start_time = time.time()
+        for _ in range(5):
+            with limiter.request():
+                pass
+        assert time.time() - start_time >= 4 / 20 * 0.9
+        # A negative rate would make requests wait forever.
+        with self.assertRaises(ValueError):
+            lchelper.RateLimiter("leetcode", lchelper.RateLimit(rate=-1.0))
+
+    def test_limit_get_problems(self):
+        limiter = lchelper.RateLimiter(
+            "leetcode", lchelper.RateLimit(rate=1000.0, burst=4, max_concurrency=4)
+        )
+        crawler = FlakyCrawler(8, {"Problem 3": 1})
+        problems = lchelper.get_problems_iter(
+            "", "leetcode", None, 4, backend=crawler, backoff=0, limiter=limiter
+        )
+        assert len(list(problems)) == 8
+        assert limiter._in_flight == 0
+        assert limiter._slow_start is False
+
+
+class SnapshotTest(unittest.TestCase):
+    def test_extract_problem(self):
+        page = (
+            "<html><head><meta charset='utf-8'><link rel=stylesheet href=a.css></head>"
+            "<body><div data-key='description-content'><div class='content__1Y2H'>"
+            "<p>Return the <code>sum</code>.<br>Easy.</p>"
+            "<pre><strong>Input:</strong> a = 1, b = 2\n<b>Output:</b> 3</pre>"
+            "<pre>  </pre></div></div>"
+            "<div class='monaco-scrollable-element'>"
+            "<div class='view-line'><span>class&nbsp;Solution&nbsp;{</span></div>"
+            "<div class='view-line'><span>&nbsp;&nbsp;int&nbsp;add(int&nbsp;a,"
+            "&nbsp;int&nbsp;b);&nbsp;</span></div>"
+            "<div class='view-line'><span>};</span></div></div>"
+            "<pre class='CodeMirror-line'>not a code line</pre></body></html>"
+        )
+        url = "https://leetcode.com/problems/add/"
+        problem = lchelper.crawlers.extract.extract_problem(page, url, "Add")
+        assert problem.statement == (
+            "Return the sum.\nEasy.\n\nInput: a = 1, b = 2\nOutput: 3"
+        )
+        assert problem.examples == ["Input: a = 1, b = 2\nOutput: 3"]
+        assert problem.code == ["class Solution {", "  int add(int a, int b);", "};"]
+
+        with self.assertRaises(ValueError):
+            lchelper.crawlers.extract.extract_problem("<p>Not found</p>", url, "Add")
+
+    def test_reextract(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cookie_path = os.path.join(temp_dir, "user@leetcode.dat")
+            with open(cookie_path, "w") as f:
+                f.write("#LWP-Cookies-2.0\n")
+            snapshot_dir = os.path.join(temp_dir, "snapshots")
+
+            with FakeLeetCodeServer() as server:
+                crawler = lchelper.crawlers.HTTPCrawler(
+                    "leetcode", cookie_path, snapshot_dir=snapshot_dir
+                )
+                problems = lchelper.get_problems(
+                    server.contest_url, "leetcode", cookie_path, backend=crawler
+                )
+
+            missing_problem = Problem(
+                "https://leetcode.com/problems/a/", "A", "", [], []
+            )
+            broken_problem = Problem(
+                "https://leetcode.com/problems/b/", "B", "", [], []
+            )
+            lchelper.crawlers.snapshot.save_snapshot(
+                broken_problem.url,
+                "<html><body>changed layout</body></html>",
+                snapshot_dir,
+            )
+            new_problems = lchelper.reextract_problems(
+                problems + [missing_problem, broken_problem], snapshot_dir, workers=2
+            )
+            assert new_problems[-2] is None
+            assert isinstance(new_problems[-1], lchelper.ExtractionFailure)
+            assert "matches no known layout" in new_problems[-1].error
+            for problem, new_problem in zip(problems, new_problems):
+                assert new_problem.statement == problem.statement
+                assert new_problem.examples == problem.examples
+                assert new_problem == problem
+
+
+class ReplayTest(unittest.TestCase):
+    def test_record_and_replay(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cookie_path = os.path.join(temp_dir, "user@leetcode.dat")
+            with open(cookie_path, "w") as f:
+                f.write("#LWP-Cookies-2.0\n")
+            fixture_dir = os.path.join(temp_dir, "fixtures")
+
+            with FakeLeetCodeServer() as server:
+                crawler = lchelper.crawlers.HTTPCrawler(
+                    "leetcode", cookie_path, record_dir=fixture_dir
+                )
+                problems = lchelper.get_problems(
+                    server.contest_url, "leetcode", cookie_path, backend=crawler
+                )
+
+            # The server is shut down, and no cookies are required.
+            crawler = lchelper.crawlers.ReplayCrawler(
+                "leetcode", fixture_dir=fixture_dir
+            )
+            replayed_problems = lchelper.get_problems(
+                server.contest_url, "leetcode", None, backend=crawler
+            )
+            assert replayed_problems == problems
+
+            codegen = {
+                lang: codegen_klass()
+                for lang, codegen_klass in lchelper.LANGUAGES.items()
+            }
+            for problem in replayed_problems:
+                problem_signature = lchelper.parse_problem(problem)
+                for lang, gen in codegen.items():
+                    _, _ = gen.generate_code(problem, problem_signature)
+
+            missing_url = server.contest_url.replace(server.CONTEST, "weekly-contest-2")
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                lchelper.get_problems(missing_url, "leetcode", None, backend=crawler)
+
+            # Contests that fail to crawl are skipped in batches.
+            results = list(
+                lchelper.crawl_contests(
+                    [missing_url, server.contest_url], "leetcode", None, backend=crawler
+                )
+            )
+            assert results == [(server.contest_url, problems)]
+
+    def test_get_command(self):
+        class ForwardingAdapter(lchelper.crawlers.fixtures.RecordingAdapter):
+            """Record responses of the fake server as if they were from leetcode.com."""
+
+            def __init__(self, store, base_url: str):
+                super().__init__(store)
+                self.base_url = base_url
+
+            def send(self, request, **kwargs):
+                forwarded = request.copy()
+                forwarded.url = request.url.replace(
+                    "https://leetcode.com", self.base_url, 1
+                )
+                response = requests.adapters.HTTPAdapter.send(self, forwarded, **kwargs)
+                self.store.save(request, response)
+                return response
+
+        contest_url = f"https://leetcode.com/contest/{FakeLeetCodeServer.CONTEST}"
+        with tempfile.TemporaryDirectory() as temp_dir:
+            fixture_dir = os.path.join(temp_dir, "fx")
+            with FakeLeetCodeServer() as server:
+                host, port = server.server.server_address
+                crawler = lchelper.crawlers.HTTPCrawler("leetcode", None)
+                crawler.session.mount(
+                    "https://leetcode.com",
+                    ForwardingAdapter(
+                        lchelper.crawlers.fixtures.FixtureStore(fixture_dir),
+                        f"http://{host}:{port}",
+                    ),
+                )
+                problems = lchelper.get_problems(
+                    contest_url, "leetcode", None, backend=crawler
+                )
+
+            # Run `get` as from the command line, with the cache and projects stored
+            # in the temporary directory.
+            argv = ["main.py", "get", "-b", "replay", "--fixtures", "fx"]
+            argv += ["-l", "cpp", "-l", "python", contest_url]
+            cwd = os.getcwd()
+            os.chdir(temp_dir)
+            try:
+                with mock.patch("sys.argv", argv):
+                    main.main()
+                cache = lchelper.ProblemCache()
+                assert cache.get("leetcode", FakeLeetCodeServer.CONTEST) == problems
+                cache.close()
+            finally:
+                os.chdir(cwd)
+            for lang in ["cpp", "python"]:
+                codegen = lchelper.LANGUAGES[lang]()
+                project_path = os.path.join(
+                    temp_dir, f"{FakeLeetCodeServer.CONTEST}_{lang}"
+                )
+                for idx, problem in enumerate(problems):
+                    file_name = codegen.get_problem_file_name(idx, problem)
+                    assert os.path.exists(os.path.join(project_path, file_name))
+
+
+def _put_contests(path: str, contest_names: List[str]) -> None:
+    cache = lchelper.ProblemCache(path, legacy_path=None)
+    for name in contest_names:
+        cache.put("leetcode", name, CacheTest.make_problems(name, ["a", "b"]))
+        assert cache.get("leetcode", name) is not None
+    cache.close()
+
+
+class CacheTest(unittest.TestCase):
+    @staticmethod
+    def make_problems(contest: str, slugs: List[str]) -> List[Problem]:
+        return [
+            Problem(
+                f"https://leetcode.com/contest/{contest}/problems/{slug}/",
+                slug,
+                "statement",
+                ["Input: x = 1\nOutput: 1"],
+                ["class Solution {", "};"],
+            )
+            for slug in slugs
+        ]
+
+    def test_put_and_get(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "cache.db")
+            problems = self.make_problems("weekly-contest-1", ["a", "b"])
+            with lchelper.ProblemCache(path, legacy_path=None) as cache:
+                assert cache.get("leetcode", "weekly-contest-1") is None
+                cache.put("leetcode", "weekly-contest-1", problems)
+                cache.put(None, "weekly-contest-2", [])
+            with lchelper.ProblemCache(path, legacy_path=None) as cache:
+                assert ("leetcode", "weekly-contest-1") in cache
+                assert (None, "weekly-contest-1") not in cache
+                assert cache.get("leetcode", "weekly-contest-1") == problems
+                assert cache.get(None, "weekly-contest-2") == []
+                assert cache.get_problem("b") == problems[1]
+                assert cache.get_problem("b", site="leetcode-cn") is None
+                assert cache.contests() == [
+                    (None, "weekly-contest-2"),
+                    ("leetcode", "weekly-contest-1"),
+                ]
+
+                cache.put("leetcode", "weekly-contest-1", problems[:1])
+                assert cache.get("leetcode", "weekly-contest-1") == problems[:1]
+                cache.remove("leetcode", "weekly-contest-1")
+                assert len(cache) == 1
+                assert cache.get_problem("a") is None
+
+    PROBLEM = Problem(
+        "https://leetcode.com/contest/weekly-contest-1/problems/identity/",
+        "Identity",
+        "statement",
+        ["Input: x = 1\nOutput: 1"],
+        ["class Solution {", "public:", "    int f(int x) {", "    }", "};"],
+    )
+
+    def test_signatures(self):
+        problem = self.PROBLEM
+        signature = lchelper.parse_problem(problem)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = lchelper.ProblemCache(
+                os.path.join(temp_dir, "cache.db"), legacy_path=None
+            )
+            assert cache.get_signature(problem, "leetcode") is None
+            cache.put_signature(problem, "leetcode", signature)
+            assert cache.get_signature(problem, "leetcode") == signature
+            assert cache.get_signature(problem, "leetcode-cn") is None
+            changed = dataclasses.replace(problem, examples=["Input: x = 2\nOutput: 2"])
+            assert cache.get_signature(changed, "leetcode") is None
+            with mock.patch("lchelper.cache.PARSER_VERSION", -1):
+                assert cache.get_signature(problem, "leetcode") is None
+
+            # Problems are parsed once for all languages, and not again in later runs.
+            projects = [
+                (codegen_klass(), os.path.join(temp_dir, lang))
+                for lang, codegen_klass in lchelper.LANGUAGES.items()
+            ]
+            with mock.patch(
+                "lchelper.codegen.base.parse_problem", wraps=lchelper.parse_problem
+            ) as parse:
+                for _ in range(2):
+                    lchelper.create_projects(
+                        projects, [problem, changed], "leetcode", cache=cache
+                    )
+                assert parse.call_count == 1
+            cache.close()
+
+    def test_outputs(self):
+        problem = self.PROBLEM
+        codegen_klass = lchelper.LANGUAGES["python"]
+
+        class CustomCodeGen(codegen_klass):  # type: ignore
+            @property
+            def user_template_code(self) -> str:
+                return "# user template"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = lchelper.ProblemCache(
+                os.path.join(temp_dir, "cache.db"), legacy_path=None
+            )
+            codegen = codegen_klass()
+            custom_codegen = CustomCodeGen()
+            path = os.path.join(temp_dir, "python", "A.py")
+            with mock.patch.object(
+                codegen_klass,
+                "generate_code",
+                autospec=True,
+                side_effect=codegen_klass.generate_code,
+            ) as generate:
+                for _ in range(2):
+                    codegen.create_project(
+                        os.path.dirname(path), [problem], "leetcode", cache=cache
+                    )
+                assert generate.call_count == 1
+                with open(path) as f:
+                    contents = f.read()
+
+                # Changing the template only generates code again for that template.
+                custom_codegen.create_project(
+                    os.path.dirname(path), [problem], "leetcode", cache=cache
+                )
+                assert generate.call_count == 2
+                with open(path) as f:
+                    assert f.read() != contents
+                with mock.patch("lchelper.codegen.base.CODEGEN_VERSION", -1):
+                    codegen.create_project(
+                        os.path.dirname(path), [problem], "leetcode", cache=cache
+                    )
+                assert generate.call_count == 3
+            cache.close()
+
+    def test_eviction(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = lchelper.ProblemCache(
+                os.path.join(temp_dir, "cache.db"), legacy_path=None
+            )
+            names = [f"weekly-contest-{idx}" for idx in range(4)]
+            for name in names:
+                cache.put("leetcode", name, self.make_problems(name, ["a", "b"]))
+            contest_size = cache.size() // len(names)
+            assert cache.pin("leetcode", names[0])
+            assert not cache.pin("leetcode", "weekly-contest-10")
+            assert cache.get("leetcode", names[1]) is not None
+            assert cache.get("leetcode", "weekly-contest-10") is None
+            assert cache.stats() == {"contests": (1, 1)}
+
+            # Least recently used contests are evicted first, except for pinned ones.
+            cache.max_size = contest_size * 2
+            assert cache.contests() == [("leetcode", names[0]), ("leetcode", names[1])]
+            cache.put("leetcode", names[2], self.make_problems(names[2], ["a", "b"]))
+            assert cache.contests() == [("leetcode", names[0]), ("leetcode", names[2])]
+            assert cache.evict(max_size=0) == 1
+            assert cache.contests() == [("leetcode", names[0])]
+            assert [info.pinned for info in cache.contest_info()] == [True]
+
+            cache.max_size = None
+            for name in names:
+                cache.put("leetcode", name, self.make_problems(name, ["a", "b"]))
+            assert len(cache) == len(names)
+            cache.close()
+
+    def test_concurrent_writes(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "cache.db")
+            n_processes, n_contests = 4, 10
+            with multiprocessing.Pool(n_processes) as pool:
+                pool.starmap(
+                    _put_contests,
+                    [
+                        (path, [f"weekly-contest-{idx}-{i}" for i in range(n_contests)])
+                        for idx in range(n_processes)
+                    ],
+                )
+            with lchelper.ProblemCache(path, legacy_path=None) as cache:
+                assert len(cache) == n_processes * n_contests
+                assert cache.stats() == {"contests": (n_processes * n_contests, 0)}
+
+    def test_migrate(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            legacy_path = os.path.join(temp_dir, "cache.pkl")
+            problems = self.make_problems("weekly-contest-1", ["a", "b"])
+            with open(legacy_path, "wb") as f:
+                pickle.dump(
+                    {
+                        ("leetcode", "weekly-contest-1"): [
+                            dataclasses.asdict(p) for p in problems
+                        ],
+                        # Entries in an unknown format are skipped.
+                        ("leetcode", "weekly-contest-2"): [{"url": "", "title": ""}],
+                    },
+                    f,
+                )
+            path = os.path.join(temp_dir, "cache.db")
+            with lchelper.ProblemCache(path, legacy_path) as cache:
+                assert cache.get("leetcode", "weekly-contest-1") == problems
+                assert cache.contests() == [("leetcode", "weekly-contest-1")]
+            assert not os.path.exists(legacy_path)
+            assert os.path.exists(legacy_path + ".migrated")
+
+    def test_unsupported_version(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "cache.db")
+            conn = sqlite3.connect(path)
+            conn.execute("PRAGMA user_version = 1000")
+            conn.close()
+            with self.assertRaises(lchelper.CacheVersionError):
+                lchelper.ProblemCache(path, legacy_path=None)
+
+    def test_lazy_statements(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = lchelper.ProblemCache(
+                os.path.join(temp_dir, "cache.db"), legacy_path=None
+            )
+            problems = self.make_problems("weekly-contest-1", ["a", "b"])
+            cache.put("leetcode", "weekly-contest-1", problems)
+            with mock.patch.object(
+                lchelper.ProblemCache,
+                "_load_statement",
+                autospec=True,
+                side_effect=lchelper.ProblemCache._load_statement,
+            ) as load_statement:
+                cached_problems = cache.get("leetcode", "weekly-contest-1")
+                assert cached_problems is not None
+                digests = [lchelper.problem_digest(p) for p in cached_problems]
+                assert digests == [lchelper.problem_digest(p) for p in problems]
+                assert load_statement.call_count == 0
+                assert cached_problems[0].statement == problems[0].statement
+                assert load_statement.call_count == 1
+
+            # Changing a problem invalidates its stored digest.
+            cached_problems[1].name = "changed"
+            assert lchelper.problem_digest(cached_problems[1]) != digests[1]
+            # Problems are pickled as plain problems, e.g. to send to other processes.
+            problem = pickle.loads(pickle.dumps(cached_problems[1]))
+            assert type(problem) is Problem and problem == cached_problems[1]
+            cache.close()
+
+
+class ProfileTest(unittest.TestCase):
+    def test_clone_profile(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            profile = lchelper.browser.get_profile_path("cookies/user@leetcode.dat")
+            assert profile == os.path.join("profiles", "user@leetcode")
+            profile = os.path.join(temp_dir, "user@leetcode")
+            assert not lchelper.has_profile(profile)
+
+            base = os.path.join(profile, lchelper.browser.PROFILE_BASE)
+            for path in ["Default/Cookies", "Default/Cache/data", "SingletonLock"]:
+                os.makedirs(os.path.dirname(os.path.join(base, path)), exist_ok=True)
+                with open(os.path.join(base, path), "w") as f:
+                    f.write("base")
+            with open(os.path.join(profile, lchelper.browser.LOGIN_MARKER), "w"):
+                pass
+            assert lchelper.has_profile(profile)
+
+            # Locks and caches are not copied.
+            clone = os.path.join(profile, "0", "profile")
+            lchelper.browser._clone_profile(profile, clone)
+            assert os.path.exists(os.path.join(clone, "Default/Cookies"))
+            assert not os.path.exists(os.path.join(clone, "Default/Cache"))
+            assert not os.path.exists(os.path.join(clone, "SingletonLock"))
+
+            # Copies are kept until the account logs in again.
+            with open(os.path.join(clone, "Default/Cookies"), "w") as f:
+                f.write("clone")
+            lchelper.browser._clone_profile(profile, clone)
+            with open(os.path.join(clone, "Default/Cookies")) as f:
+                assert f.read() == "clone"
+            login_marker = os.path.join(profile, lchelper.browser.LOGIN_MARKER)
+            os.utime(login_marker, (time.time() + 10, time.time() + 10))
+            lchelper.browser._clone_profile(profile, clone)
+            with open(os.path.join(clone, "Default/Cookies")) as f:
+                assert f.read() == "base"
+
+    def test_claim_slot(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            slot, lock_file = lchelper.browser._claim_slot(temp_dir)
+            assert slot == 0
+            # Slots locked by another process (or another open file) are skipped.
+            os.makedirs(os.path.join(temp_dir, "1"))
+            other = open(os.path.join(temp_dir, "1", lchelper.browser.SLOT_LOCK), "a")
+            assert lchelper.browser._try_lock(other)
+            slot2, lock_file2 = lchelper.browser._claim_slot(temp_dir)
+            assert slot2 == 2
+            # Released slots can be claimed again.
+            lock_file.close()
+            slot3, lock_file3 = lchelper.browser._claim_slot(temp_dir)
+            assert slot3 == 0
+            for f in [lock_file2, lock_file3, other]:
+                f.close()
+
+    def test_process_memory(self):
+        if lchelper.browser._process_memory(os.getpid()) is None:
+            self.skipTest("Memory usage of processes is not available")
+        child = multiprocessing.Process(target=time.sleep, args=(10,))
+        child.start()
+        try:
+            child_memory = lchelper.browser._process_memory(child.pid)
+            # Memory of child processes is included.
+            assert child_memory is not None and child_memory > 0
+            assert lchelper.browser._process_memory(os.getpid()) > child_memory
+        finally:
+            child.kill()
+            child.join()
+
+
+class UtilsTest(unittest.TestCase):
+    def test_expand_contest_range(self):
+        assert lchelper.utils.expand_contest_range("weekly-contest-182..183") == [
+            "weekly-contest-182",
+            "weekly-contest-183",
+        ]
+        assert lchelper.utils.expand_contest_range(
+            "biweekly-contest-9..biweekly-contest-10"
+        ) == ["biweekly-contest-9", "biweekly-contest-10"]
+        assert lchelper.utils.expand_contest_range("weekly-contest-1") == [
+            "weekly-contest-1"
+        ]
+        with self.assertRaises(ValueError):
+            lchelper.utils.expand_contest_range("weekly-contest-2..1")
+
+    def test_parse_size(self):
+        assert lchelper.utils.parse_size("100") == 100
+        assert lchelper.utils.parse_size("2KB") == 2048
+        assert lchelper.utils.parse_size("0.5 mb") == 512 * 1024
+        with self.assertRaises(ValueError):
+            lchelper.utils.parse_size("1PB")
+        assert lchelper.utils.format_size(2048) == "2.0 KB"
+
+    def test_parse_contest(self):
+        assert main.parse_contest("weekly-contest-1") == ("weekly-contest-1", None)
+        assert main.parse_contest(
+            "https://leetcode.com/contest/weekly-contest-1/problems/two-sum/"
+        ) == ("weekly-contest-1", "leetcode")
+        # Problem URLs outside contests do not tell the contest.
+        with mock.patch("builtins.print"), self.assertRaises(SystemExit):
+            main.parse_contest("https://leetcode.com/problems/two-sum/")
+
+
 class ParseTest(unittest.TestCase):
     def _function_equal(
         self, parsed_function: FunctionSignature, function: FunctionSignature